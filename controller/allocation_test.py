@@ -0,0 +1,176 @@
+"""Allocation budgets of strategy.GetNextMove.
+
+Each dimension has recorded budgets for one heuristics move:
+
+  allocations: the containers, slices and functions built by the bytecode of
+      this package while the move runs, counted with a line tracer.  Python 2
+      has no tracemalloc, and the collector's generation 0 count is net of
+      the objects freed, so neither sees the short lived objects built per
+      cell, which are what drive the collector.
+  retained: the objects tracked by the garbage collector that the move still
+      holds once it returns, and their size as reported by sys.getsizeof.
+"""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+import dis
+import gc
+import os
+import sys
+import unittest
+
+from controller import strategy
+from model import board
+
+
+# Dimension -> (allocations, retained objects, retained bytes), measured on
+# Python 2.7.18.  None of them grows with the board; building a list of the
+# neighbours of every cell in GetLocalityValue takes a 3x3 move to 70
+# allocations and a 19x19 one to 3220.
+BUDGETS = {
+    3: (7, 0, 0),
+    4: (7, 0, 0),
+    5: (7, 0, 0),
+    7: (7, 0, 0),
+    9: (7, 0, 0),
+    13: (7, 0, 0),
+    19: (7, 0, 0),
+}
+
+# The instructions that build a new object.
+_ALLOCATING = frozenset(dis.opmap[name] for name in (
+    "BUILD_TUPLE", "BUILD_LIST", "BUILD_SET", "BUILD_MAP", "BUILD_SLICE",
+    "BUILD_CLASS", "LIST_APPEND", "SET_ADD", "MAP_ADD", "MAKE_FUNCTION",
+    "MAKE_CLOSURE", "SLICE+0", "SLICE+1", "SLICE+2", "SLICE+3"))
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _GetAllocations(code):
+  """Maps the instruction offsets of code to the allocating instructions
+  from there to the end of the line."""
+
+  starts = set(offset for offset, _ in dis.findlinestarts(code))
+  offsets = []
+  offset = 0
+  while offset < len(code.co_code):
+    offsets.append(offset)
+    if ord(code.co_code[offset]) >= dis.HAVE_ARGUMENT:
+      offset += 3
+    else:
+      offset += 1
+
+  allocations = {}
+  count = 0
+  for offset in reversed(offsets):
+    if ord(code.co_code[offset]) in _ALLOCATING:
+      count += 1
+    allocations[offset] = count
+    if offset in starts:
+      count = 0
+  return allocations
+
+
+class _AllocationCounter(object):
+  """Counts the allocating instructions executed by the package's code.
+
+  Line events fire at the start of a line and on a jump back into one, so
+  each event counts the instructions from the current one to the end of its
+  line.  An instruction that is skipped by a jump forward within its line is
+  counted anyway.
+  """
+
+  def __init__(self):
+    self.count = 0
+    # Code object -> the result of _GetAllocations, None outside of the
+    # package.
+    self._allocations = {}
+
+  def _Trace(self, frame, unused_event, unused_arg):
+    code = frame.f_code
+    if code not in self._allocations:
+      if os.path.abspath(code.co_filename).startswith(_ROOT + os.sep):
+        self._allocations[code] = _GetAllocations(code)
+      else:
+        self._allocations[code] = None
+    if self._allocations[code] is None:
+      return None
+    return self._TraceLine
+
+  def _TraceLine(self, frame, event, unused_arg):
+    if event == "line":
+      self.count += self._allocations[frame.f_code][frame.f_lasti]
+    return self._TraceLine
+
+  def __enter__(self):
+    sys.settrace(self._Trace)
+    return self
+
+  def __exit__(self, unused_type, unused_value, unused_traceback):
+    sys.settrace(None)
+
+
+def _GetPosition(dimension):
+  """Returns a scattered undecided position and the side to move."""
+
+  play_board = board.Board(dimension)
+  if dimension > 3:
+    plays = (0, dimension * dimension - 1, dimension + 1, 2 * dimension - 2)
+  else:
+    plays = (0, 8)
+  board_value = board.BoardValue.X
+  for position in plays:
+    play_board.SetPosition(position, board_value)
+    board_value = board.BoardValue.Other(board_value)
+  return play_board, board_value
+
+
+class AllocationTest(unittest.TestCase):
+  """Class that checks the allocations of GetNextMove."""
+
+  def _Measure(self, play_board, board_value):
+    """Returns the (allocations, retained objects, retained bytes) of one
+    heuristics move."""
+
+    # The first call fills the per dimension caches.
+    strategy.GetNextMove(play_board, board_value, endgame_threshold=0)
+    with _AllocationCounter() as counter:
+      strategy.GetNextMove(play_board, board_value, endgame_threshold=0)
+
+    gc.collect()
+    before = gc.get_objects()
+    seen = set(id(value) for value in before)
+    strategy.GetNextMove(play_board, board_value, endgame_threshold=0)
+    gc.collect()
+    retained = []
+    for value in gc.get_objects():
+      if (id(value) not in seen and value is not before and value is not seen
+          and value is not retained):
+        retained.append(value)
+    return (counter.count, len(retained),
+            sum(sys.getsizeof(value) for value in retained))
+
+  def testAllocationCounter(self):
+    def Allocate(count):
+      values = []
+      for index in xrange(count):
+        values.append((index, [index]))
+      return values[1:]
+
+    with _AllocationCounter() as counter:
+      Allocate(10)
+    # The first list and the slice, then a list and a tuple per index.
+    self.assertEqual(2 + 2 * 10, counter.count)
+
+  def testBudgets(self):
+    for dimension, budgets in sorted(BUDGETS.items()):
+      measured = self._Measure(*_GetPosition(dimension))
+      for name, value, budget in zip(
+          ("allocations", "retained objects", "retained bytes"),
+          measured, budgets):
+        self.assertLessEqual(value, budget, "%dx%d: %d %s" % (
+            dimension, dimension, value, name))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,177 @@
+"""Non-interactive batch analysis of tic tac toe positions.
+
+Positions are read one per line in the compact position string format of
+board.Board.ToPositionString, optionally followed by the side to move:
+
+  X.O.X....
+  X.O.X.... O
+
+Each line produces one output line, in input order, of the form
+"<position> <side> <move>" or "<position> error <message>".  Blank input
+lines produce blank output lines so that results can be zipped with the input.
+"""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+import collections
+import itertools
+import multiprocessing
+
+from controller import profiling
+from controller import strategy
+from model import board
+
+
+DEFAULT_CHUNK_SIZE = 256
+
+# The position_cache.SharedPositionCache used by a worker process, if any.
+_worker_cache = None
+
+
+def ParseLine(line):
+  """Parses an input line into a board and the side to move.
+
+  Args:
+    line: A position string optionally followed by "X" or "O".
+
+  Returns:
+    A tuple of (board.Board, board.BoardValue to move).
+
+  Raises:
+    board.InvalidBoardSetting if the line is malformed.
+  """
+
+  fields = line.split()
+  if not 1 <= len(fields) <= 2:
+    raise board.InvalidBoardSetting("Expected 'POSITION [SIDE]'")
+
+  play_board = board.Board.FromPositionString(fields[0])
+  if len(fields) == 2:
+    board_value = board.BoardValue.FromChar(fields[1])
+    if board_value == board.BoardValue.NONE:
+      raise board.InvalidBoardSetting("Side to move must be X or O")
+  else:
+    board_value = play_board.GetSideToMove()
+  return play_board, board_value
+
+
+def AnalyzeLine(line, move_strategy=strategy.Strategy.HEURISTICS, cache=None):
+  """Computes the output line for a single input line.
+
+  Args:
+    line: An input line as described in the module docstring.
+    move_strategy: The strategy.Strategy used to pick the move.
+    cache: An optional object with a GetNextMove method, such as a
+        position_cache.SharedPositionCache, used instead of strategy.
+
+  Returns:
+    The output line without a trailing newline.
+  """
+
+  line = line.strip()
+  if not line:
+    return ""
+
+  try:
+    play_board, board_value = ParseLine(line)
+    if play_board.IsWinner() != board.BoardValue.NONE:
+      raise strategy.StrategyError("Game is already over.")
+    with profiling.Move(play_board, move_strategy):
+      if cache is not None:
+        move = cache.GetNextMove(play_board, board_value, move_strategy)
+      else:
+        move = strategy.GetNextMove(play_board, board_value, move_strategy)
+  except (board.InvalidBoardSetting, board.InvalidBoardPosition,
+          strategy.StrategyError) as ex:
+    return "%s error %s" % (line.split()[0], ex)
+
+  return "%s %s %d" % (line.split()[0], board.BoardValue.ToChar(board_value),
+                       move)
+
+
+def _AnalyzeChunk(args):
+  """Pool entry point that analyzes a list of lines.
+
+  Args:
+    args: A tuple of (lines, strategy.Strategy).
+
+  Returns:
+    The list of output lines.
+  """
+
+  lines, move_strategy = args
+  return [AnalyzeLine(line, move_strategy, _worker_cache) for line in lines]
+
+
+def _InitWorker(shared_cache):
+  """Pool initializer that installs the cache inherited from the parent."""
+
+  global _worker_cache
+  _worker_cache = shared_cache
+
+
+def _Chunks(in_stream, chunk_size):
+  """Lazily yields lists of at most chunk_size lines from the stream."""
+
+  while 1:
+    chunk = list(itertools.islice(in_stream, chunk_size))
+    if not chunk:
+      return
+    yield chunk
+
+
+def AnalyzeStream(in_stream, out_stream,
+                  move_strategy=strategy.Strategy.HEURISTICS,
+                  processes=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                  max_chunks_in_flight=None, shared_cache=None):
+  """Streams positions from in_stream and writes best moves to out_stream.
+
+  At most max_chunks_in_flight chunks are read ahead of the writer, so memory
+  use is bounded regardless of the input size.  Results are written in input
+  order.
+
+  Args:
+    in_stream: An iterable of input lines, e.g. a file object.
+    out_stream: A file-like object the results are written to.
+    move_strategy: The strategy.Strategy used to pick the moves.
+    processes: The number of worker processes.  None uses one per CPU and 0
+        analyzes in the calling process.
+    chunk_size: The number of lines sent to a worker at a time.
+    max_chunks_in_flight: The number of chunks queued or being analyzed at
+        any time.  Defaults to twice the number of workers.
+    shared_cache: An optional position_cache.SharedPositionCache created
+        without a path, shared by every worker.
+
+  Returns:
+    The number of lines analyzed.
+  """
+
+  count = 0
+  if processes == 0:
+    for chunk in _Chunks(in_stream, chunk_size):
+      for line in chunk:
+        out_stream.write(AnalyzeLine(line, move_strategy, shared_cache) + "\n")
+      count += len(chunk)
+    return count
+
+  pool = multiprocessing.Pool(processes, _InitWorker, (shared_cache,))
+  if max_chunks_in_flight is None:
+    max_chunks_in_flight = 2 * (processes or multiprocessing.cpu_count())
+
+  try:
+    in_flight = collections.deque()
+    for chunk in _Chunks(in_stream, chunk_size):
+      in_flight.append(pool.apply_async(_AnalyzeChunk, ((chunk,
+                                                         move_strategy),)))
+      count += len(chunk)
+      if len(in_flight) >= max_chunks_in_flight:
+        out_stream.write("\n".join(in_flight.popleft().get()) + "\n")
+    while in_flight:
+      out_stream.write("\n".join(in_flight.popleft().get()) + "\n")
+  finally:
+    # Every result has been collected at this point unless an error occurred.
+    pool.terminate()
+    pool.join()
+
+  return count
@@ -0,0 +1,72 @@
+"""Tests that correspond to analyze."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+import StringIO
+import unittest
+
+from controller import analyze
+from controller import position_cache
+from controller import strategy
+from model import board
+
+
+class AnalyzeTest(unittest.TestCase):
+  """Class that tests analyze functions."""
+
+  def testParseLine(self):
+    play_board, board_value = analyze.ParseLine("X........")
+    self.assertEqual(board.BoardValue.X, play_board.GetFromPosition(0))
+    self.assertEqual(board.BoardValue.O, board_value)
+
+    play_board, board_value = analyze.ParseLine("X........ X")
+    self.assertEqual(board.BoardValue.X, board_value)
+
+    self.assertRaises(board.InvalidBoardSetting,
+                      analyze.ParseLine, "X........ .")
+    self.assertRaises(board.InvalidBoardSetting,
+                      analyze.ParseLine, "X........ X extra")
+
+  def testAnalyzeLine(self):
+    # O must block the top row.
+    self.assertEqual("XX..O.... O 2", analyze.AnalyzeLine("XX..O....\n"))
+    self.assertEqual("", analyze.AnalyzeLine("\n"))
+    self.assertTrue(analyze.AnalyzeLine("XXXOO....").startswith(
+        "XXXOO.... error"))
+    self.assertTrue(analyze.AnalyzeLine("XX").startswith("XX error"))
+
+  def testAnalyzeLineSharedCacheDimensions(self):
+    # The empty boards of every dimension share a position hash.
+    cache = position_cache.SharedPositionCache(num_slots=64)
+    self.addCleanup(cache.Close)
+    self.assertEqual("......... O 4",
+                     analyze.AnalyzeLine("......... O", cache=cache))
+    self.assertEqual("." * 25 + " O 12",
+                     analyze.AnalyzeLine("." * 25 + " O", cache=cache))
+    self.assertEqual("......... O 4",
+                     analyze.AnalyzeLine("......... O", cache=cache))
+    self.assertEqual(1, cache.hits)
+
+  def testAnalyzeStreamInProcess(self):
+    lines = ["XX..O....\n", "\n", "OO..X...X\n", "bad\n"]
+    out_stream = StringIO.StringIO()
+    count = analyze.AnalyzeStream(iter(lines), out_stream, processes=0,
+                                  chunk_size=3)
+    self.assertEqual(4, count)
+    results = out_stream.getvalue().split("\n")
+    self.assertEqual(["XX..O.... O 2", "", "OO..X...X X 2"], results[:3])
+    self.assertTrue(results[3].startswith("bad error"))
+
+  def testAnalyzeStreamPreservesOrder(self):
+    lines = ["XX..O....\n", "OO..X...X\n"] * 50
+    expected = StringIO.StringIO()
+    analyze.AnalyzeStream(iter(lines), expected, processes=0)
+    out_stream = StringIO.StringIO()
+    analyze.AnalyzeStream(iter(lines), out_stream,
+                          strategy.Strategy.HEURISTICS, processes=2,
+                          chunk_size=7, max_chunks_in_flight=2)
+    self.assertEqual(expected.getvalue(), out_stream.getvalue())
+
+
+if __name__ == '__main__':
+  unittest.main()
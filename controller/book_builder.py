@@ -0,0 +1,122 @@
+"""Offline generator of opening_book files.
+
+For each dimension and each side, the opening tree is walked from the empty
+board up to the requested number of plays.  Where the side plays, only the
+move strategy.GetNextMove picks is followed; where its opponent plays, every
+reply is followed.  Positions are deduplicated under symmetry and evaluated
+one tree level at a time, optionally spread over a process pool.
+"""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+import multiprocessing
+
+from controller import opening_book
+from controller import strategy
+from model import board
+from model import symmetry
+
+
+DEFAULT_DEPTH = 3
+
+
+def _Evaluate(task):
+  """Pool entry point that computes the move of a canonical position.
+
+  Args:
+    task: A tuple of (canonical position string, board.BoardValue to move).
+
+  Returns:
+    The move in the canonical position.
+  """
+
+  text, board_value = task
+  return strategy.GetNextMove(board.Board.FromPositionString(text),
+                              board_value, strategy.Strategy.HEURISTICS)
+
+
+def _Canonical(text, dimension, position, board_value):
+  """Returns the canonical position string after a play."""
+
+  played = "%s%s%s" % (text[:position], board.BoardValue.ToChar(board_value),
+                       text[position + 1:])
+  return symmetry.Canonicalize(played, dimension)[0]
+
+
+def BuildRecords(dimension, depth=DEFAULT_DEPTH, evaluate=map):
+  """Computes the book records of a dimension.
+
+  Args:
+    dimension: The dimension of the board.
+    depth: Positions with fewer plays than depth are included.
+    evaluate: A map like function applied to _Evaluate and a list of tasks,
+        e.g. the map method of a multiprocessing.Pool.
+
+  Returns:
+    A list of (key, dimension, canonical move) records.
+  """
+
+  records = []
+  # Canonical position string -> the sides whose book reaches it.
+  level = {"." * (dimension * dimension): set((board.BoardValue.X,
+                                                 board.BoardValue.O))}
+  for ply in xrange(depth):
+    board_value = board.BoardValue.X if ply % 2 == 0 else board.BoardValue.O
+    texts = []
+    for text in sorted(level):
+      play_board = board.Board.FromPositionString(text)
+      if (not play_board.IsFull()
+          and play_board.IsWinner() == board.BoardValue.NONE):
+        texts.append(text)
+    tasks = [(text, board_value) for text in texts
+             if board_value in level[text]]
+    moves = dict(zip((text for text, _ in tasks),
+                     evaluate(_Evaluate, tasks)))
+
+    next_level = {}
+    for text in texts:
+      if text in moves:
+        records.append((opening_book.MakeKey(text, dimension, board_value),
+                        dimension, moves[text]))
+        child = _Canonical(text, dimension, moves[text], board_value)
+        next_level.setdefault(child, set()).add(board_value)
+      for side in level[text]:
+        if side == board_value:
+          continue
+        for position, char in enumerate(text):
+          if char == ".":
+            child = _Canonical(text, dimension, position, board_value)
+            next_level.setdefault(child, set()).add(side)
+    level = next_level
+  return records
+
+
+def Build(path, dimensions, depth=DEFAULT_DEPTH, processes=None):
+  """Builds a book file.
+
+  Args:
+    path: The path of the file.
+    dimensions: The board dimensions included.
+    depth: Positions with fewer plays than depth are included.
+    processes: The number of worker processes.  None uses one per CPU and 0
+        evaluates in the calling process.
+
+  Returns:
+    The number of records written.
+  """
+
+  records = []
+  if processes == 0:
+    for dimension in dimensions:
+      records.extend(BuildRecords(dimension, depth))
+  else:
+    pool = multiprocessing.Pool(processes)
+    try:
+      for dimension in dimensions:
+        records.extend(BuildRecords(dimension, depth, pool.map))
+    finally:
+      pool.terminate()
+      pool.join()
+  opening_book.Write(path, records, depth)
+  return len(records)
@@ -0,0 +1,318 @@
+"""Coordinator and workers that build a tablebase over TCP.
+
+The coordinator owns the list of tablebase partitions and a checkpoint
+directory.  Workers, on the same host or others, connect to it, take a
+partition, solve it with tablebase.SolvePartition and send back the records,
+which the coordinator writes to the partition file before handing out more
+work.  When every partition is complete the coordinator merges the files
+into the tablebase.
+
+Requests and responses are single lines of JSON:
+
+  {"take": worker name}
+      -> {"partition": [ply, shard], "dimension": N, "shards": S}
+      -> {"wait": seconds} while the remaining partitions are all taken
+      -> {"done": true} once every partition is complete
+  {"complete": [ply, shard], "records": [[key, move], ...]}
+      -> {"ok": true}
+
+Once no partition is pending, idle workers steal: they are given a copy of
+the partition that has been running the longest, and the first copy to
+complete wins.  The same mechanism reissues the partitions of workers that
+died, once their lease has expired.  Completed partitions survive a restart
+of the coordinator, which only hands out the missing ones.
+"""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+import collections
+import json
+import multiprocessing
+import os
+import socket
+import SocketServer
+import threading
+import time
+
+from controller import tablebase
+
+
+# Seconds after which a lease is presumed lost and may be taken again.
+DEFAULT_LEASE = 600.0
+# The number of workers that may solve a partition at once.
+DEFAULT_MAX_COPIES = 2
+# Seconds an idle worker waits before asking again.
+POLL_INTERVAL = 0.5
+
+
+class DistributedError(Exception):
+  """Thrown when the coordinator rejects a request."""
+
+
+class _Handler(SocketServer.StreamRequestHandler):
+  """Answers the requests of one worker in order."""
+
+  def handle(self):
+    coordinator = self.server.coordinator
+    for line in iter(self.rfile.readline, ""):
+      try:
+        request = json.loads(line)
+        if "take" in request:
+          response = coordinator.Take(request["take"])
+        else:
+          ply, shard = request["complete"]
+          coordinator.Complete(ply, shard, request["records"])
+          response = {"ok": True}
+      except (ValueError, KeyError, TypeError, DistributedError) as ex:
+        response = {"error": str(ex)}
+      self.wfile.write(json.dumps(response) + "\n")
+      self.wfile.flush()
+
+
+class _TcpServer(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+  daemon_threads = True
+  allow_reuse_address = True
+
+
+class Coordinator(object):
+  """Hands out the partitions of a tablebase and checkpoints the results."""
+
+  def __init__(self, directory, dimension, max_ply,
+               shards=tablebase.DEFAULT_SHARDS, address=("127.0.0.1", 0),
+               lease=DEFAULT_LEASE, max_copies=DEFAULT_MAX_COPIES):
+    """Initializes and binds the coordinator.  Call Start to serve.
+
+    Args:
+      directory: The existing checkpoint directory of the partition files.
+          Partitions already in it are not handed out.
+      dimension: The dimension of the board.
+      max_ply: Positions with fewer plays than max_ply are solved.
+      shards: The number of partitions of each ply.
+      address: The (host, port) to listen on.  Port 0 picks a free port.
+      lease: Seconds after which a taken partition may be reissued.
+      max_copies: The number of workers a partition may be given to at once.
+    """
+
+    self.directory = directory
+    self.dimension = dimension
+    self.max_ply = max_ply
+    self.shards = shards
+    self.lease = lease
+    self.max_copies = max_copies
+
+    completed = tablebase.GetCompleted(directory, dimension, max_ply, shards)
+    self.resumed = len(completed)
+    self.stolen = 0
+    self.duplicates = 0
+    # Worker name -> the number of partitions handed to it.
+    self.taken = collections.Counter()
+    self._partitions = set(tablebase.GetPartitions(max_ply, shards))
+    self._pending = collections.deque(
+        partition for partition in tablebase.GetPartitions(max_ply, shards)
+        if partition not in completed)
+    self._remaining = set(self._pending)
+    # Partition -> start times of the leases handed out.
+    self._leases = {}
+    self._lock = threading.Lock()
+    self._finished = threading.Event()
+    if not self._remaining:
+      self._finished.set()
+
+    self._server = _TcpServer(address, _Handler)
+    self._server.coordinator = self
+    self.address = self._server.server_address
+    self._thread = None
+
+  def Start(self):
+    """Starts serving in a background thread."""
+
+    self._thread = threading.Thread(target=self._server.serve_forever)
+    self._thread.daemon = True
+    self._thread.start()
+
+  def Stop(self):
+    """Stops serving; connected workers see the connection close."""
+
+    if self._thread is not None:
+      self._server.shutdown()
+      self._thread.join()
+      self._thread = None
+    self._server.server_close()
+
+  def _Steal(self, now):
+    """Returns the running partition an idle worker should copy, or None."""
+
+    best = None
+    best_order = None
+    for partition in self._remaining:
+      live = [start for start in self._leases.get(partition, ())
+              if now - start < self.lease]
+      self._leases[partition] = live
+      if len(live) >= self.max_copies:
+        continue
+      # Partitions without a live lease first, then the longest running.
+      order = (len(live), min(live) if live else 0)
+      if best_order is None or order < best_order:
+        best = partition
+        best_order = order
+    return best
+
+  def Take(self, worker):
+    """Hands out a partition.
+
+    Args:
+      worker: The name of the worker, counted in taken.
+
+    Returns:
+      A response dictionary as described in the module docstring.
+    """
+
+    with self._lock:
+      if not self._remaining:
+        return {"done": True}
+      now = time.time()
+      if self._pending:
+        partition = self._pending.popleft()
+      else:
+        partition = self._Steal(now)
+        if partition is None:
+          return {"wait": POLL_INTERVAL}
+        if self._leases[partition]:
+          self.stolen += 1
+      self._leases.setdefault(partition, []).append(now)
+      self.taken[worker] += 1
+      return {"partition": list(partition), "dimension": self.dimension,
+              "shards": self.shards}
+
+  def Complete(self, ply, shard, records):
+    """Checkpoints the records of a partition.
+
+    Copies that complete after the first are ignored.
+
+    Args:
+      ply: The ply of the partition.
+      shard: The shard of the partition.
+      records: The (key, move) records returned by tablebase.SolvePartition.
+
+    Raises:
+      DistributedError if the partition does not exist or a record is not a
+      (key, move) pair that fits the partition file.
+    """
+
+    partition = (ply, shard)
+    if partition not in self._partitions:
+      raise DistributedError("Unknown partition: %r" % (partition,))
+    cells = self.dimension * self.dimension
+    for record in records:
+      if (not isinstance(record, (list, tuple)) or len(record) != 2
+          or not all(isinstance(value, (int, long)) for value in record)
+          or not 0 <= record[0] < 1 << 64 or not 0 <= record[1] < cells):
+        raise DistributedError("Invalid record: %r" % (record,))
+    with self._lock:
+      if partition not in self._remaining:
+        self.duplicates += 1
+        return
+      tablebase.WritePartition(
+          tablebase.GetPartitionPath(self.directory, self.dimension, ply,
+                                     shard, self.shards),
+          self.dimension, ply, shard, self.shards, records)
+      self._remaining.discard(partition)
+      self._leases.pop(partition, None)
+      if not self._remaining:
+        self._finished.set()
+
+  def _RunLocalWorker(self):
+    """Process entry point of a worker forked by StartWorkers."""
+
+    # The fork inherited the listening socket.  Keeping it open would let
+    # connections made after Stop queue on it instead of being refused.
+    self._server.socket.close()
+    RunWorker(self.address)
+
+  def StartWorkers(self, count):
+    """Forks worker processes that solve partitions for this coordinator.
+
+    Returns:
+      The list of started multiprocessing.Process objects.
+    """
+
+    processes = []
+    for _ in xrange(count):
+      process = multiprocessing.Process(target=self._RunLocalWorker)
+      process.daemon = True
+      process.start()
+      processes.append(process)
+    return processes
+
+  def Wait(self, timeout=None):
+    """Blocks until every partition is complete.
+
+    Returns:
+      True if every partition is complete, False on timeout.
+    """
+
+    self._finished.wait(timeout)
+    return self._finished.is_set()
+
+  def Merge(self, path):
+    """Merges the partition files into the tablebase at path.
+
+    Returns:
+      The number of records written.
+    """
+
+    return tablebase.Merge(path, self.directory, self.dimension,
+                           self.max_ply, self.shards)
+
+
+def _Call(stream, request):
+  """Sends a request and returns the response, None if disconnected."""
+
+  stream.write(json.dumps(request) + "\n")
+  stream.flush()
+  line = stream.readline()
+  if not line:
+    return None
+  response = json.loads(line)
+  if "error" in response:
+    raise DistributedError(response["error"])
+  return response
+
+
+def RunWorker(address, name=None):
+  """Solves partitions for a coordinator until there are none left.
+
+  Args:
+    address: The (host, port) of the coordinator.
+    name: The name reported to the coordinator, host:pid by default.
+
+  Returns:
+    The number of partitions solved.
+
+  Raises:
+    DistributedError if the coordinator rejects a request.
+    socket.error if the coordinator cannot be reached.
+  """
+
+  if name is None:
+    name = "%s:%d" % (socket.gethostname(), os.getpid())
+  connection = socket.create_connection(address)
+  solved = 0
+  try:
+    stream = connection.makefile("r+")
+    while 1:
+      response = _Call(stream, {"take": name})
+      if response is None or response.get("done"):
+        return solved
+      if "wait" in response:
+        time.sleep(response["wait"])
+        continue
+      ply, shard = response["partition"]
+      records = tablebase.SolvePartition(response["dimension"], ply, shard,
+                                         response["shards"])
+      if _Call(stream, {"complete": [ply, shard], "records": records}) is None:
+        return solved
+      solved += 1
+  finally:
+    connection.close()
@@ -0,0 +1,121 @@
+"""Tests that correspond to distributed."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+from controller import distributed
+from controller import tablebase
+
+
+class DistributedTest(unittest.TestCase):
+  """Class that tests the coordinator and workers."""
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.directory)
+
+  def testWorkersOnLocalhost(self):
+    coordinator = distributed.Coordinator(self.directory, 3, 9, shards=3)
+    coordinator.Start()
+    self.addCleanup(coordinator.Stop)
+    solved = []
+    workers = [threading.Thread(
+        target=lambda name=name: solved.append(
+            distributed.RunWorker(coordinator.address, name)))
+               for name in ("a", "b")]
+    for worker in workers:
+      worker.start()
+    self.assertTrue(coordinator.Wait(60))
+    for worker in workers:
+      worker.join()
+    # Stolen copies are solved as well and completed as duplicates.
+    self.assertEqual(27 + coordinator.stolen, sum(coordinator.taken.values()))
+    self.assertEqual(coordinator.stolen, coordinator.duplicates)
+    self.assertEqual(27 + coordinator.duplicates, sum(solved))
+
+    path = os.path.join(self.directory, "distributed.bin")
+    coordinator.Merge(path)
+    local = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, local)
+    local_path = os.path.join(local, "local.bin")
+    tablebase.Build(local_path, local, 3, 9, shards=3)
+    with open(path, "rb") as stream, open(local_path, "rb") as local_stream:
+      self.assertEqual(local_stream.read(), stream.read())
+
+  def testResume(self):
+    for ply in (0, 1):
+      tablebase.WritePartition(
+          tablebase.GetPartitionPath(self.directory, 3, ply, 0, 1), 3, ply,
+          0, 1, tablebase.SolvePartition(3, ply))
+    coordinator = distributed.Coordinator(self.directory, 3, 3, shards=1)
+    self.addCleanup(coordinator.Stop)
+    self.assertEqual(2, coordinator.resumed)
+    self.assertEqual([2, 0], coordinator.Take("a")["partition"])
+    coordinator.Complete(2, 0, tablebase.SolvePartition(3, 2))
+    self.assertTrue(coordinator.Wait(0))
+    self.assertEqual({"done": True}, coordinator.Take("a"))
+
+  def testSteal(self):
+    coordinator = distributed.Coordinator(self.directory, 3, 1, shards=1)
+    self.addCleanup(coordinator.Stop)
+    self.assertEqual([0, 0], coordinator.Take("a")["partition"])
+    # With nothing pending an idle worker copies the running partition.
+    self.assertEqual([0, 0], coordinator.Take("b")["partition"])
+    self.assertEqual(1, coordinator.stolen)
+    self.assertIn("wait", coordinator.Take("c"))
+
+    records = tablebase.SolvePartition(3, 0)
+    coordinator.Complete(0, 0, records)
+    coordinator.Complete(0, 0, records)
+    self.assertEqual(1, coordinator.duplicates)
+    self.assertEqual({"done": True}, coordinator.Take("c"))
+
+  def testExpiredLease(self):
+    coordinator = distributed.Coordinator(self.directory, 3, 1, shards=1,
+                                          lease=0, max_copies=1)
+    self.addCleanup(coordinator.Stop)
+    coordinator.Take("a")
+    # The lease of a has expired, so the partition is reissued.
+    self.assertEqual([0, 0], coordinator.Take("b")["partition"])
+    self.assertEqual(0, coordinator.stolen)
+
+  def testUnknownPartition(self):
+    coordinator = distributed.Coordinator(self.directory, 3, 1, shards=1)
+    self.addCleanup(coordinator.Stop)
+    self.assertRaises(distributed.DistributedError, coordinator.Complete,
+                      5, 0, [])
+
+  def testInvalidRecords(self):
+    coordinator = distributed.Coordinator(self.directory, 3, 1, shards=1)
+    self.addCleanup(coordinator.Stop)
+    for record in ([1 << 64, 0], [-1, 0], [5, 9], [5], ["5", 0], 5):
+      self.assertRaises(distributed.DistributedError, coordinator.Complete,
+                        0, 0, [[5, 0], record])
+    self.assertEqual([], os.listdir(self.directory))
+    # The partition is still handed out.
+    self.assertFalse(coordinator.Wait(0))
+    coordinator.Complete(0, 0, [[5, 0]])
+    self.assertTrue(coordinator.Wait(0))
+
+  def testInvalidRecordsOverTcp(self):
+    coordinator = distributed.Coordinator(self.directory, 3, 1, shards=1)
+    coordinator.Start()
+    self.addCleanup(coordinator.Stop)
+    connection = socket.create_connection(coordinator.address)
+    self.addCleanup(connection.close)
+    stream = connection.makefile("r+")
+    self.assertRaises(distributed.DistributedError, distributed._Call, stream,
+                      {"complete": [0, 0], "records": [[1 << 64, 0]]})
+    # The connection is still served.
+    self.assertEqual([0, 0], distributed._Call(stream, {"take": "a"})[
+        "partition"])
+
+
+if __name__ == '__main__':
+  unittest.main()
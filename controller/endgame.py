@@ -0,0 +1,301 @@
+"""Exact endgame search over bitmasks.
+
+Once few positions are left the game tree is small enough to search
+exhaustively.  Positions are represented as a pair of bitmasks, the plays of
+the side to move and those of its opponent, with bit p set for position p.
+The game is symmetric between the users, so the value of a pair does not
+depend on which of X and O is to move and the memo is shared by both.
+
+Scores are from the point of view of the side to move: 0 for a draw, and for
+a win the number of positions still free when it happens plus one, so that
+faster wins score higher.  Losses are the negation.
+"""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+import random
+import time
+
+from model import board
+
+
+# The number of free cells below which positions are solved exactly, by
+# dimension.  Each is the smallest that Calibrate, with the default
+# arguments, gave for the seeds 0 to 3.  The win, block and fork rules
+# already play 3x3 perfectly, so 3x3 only searches the last 4 cells and
+# leaves the openings to those rules.
+THRESHOLDS = {3: 4, 4: 9, 5: 10, 6: 11, 7: 11, 8: 11, 9: 9, 11: 11, 13: 11}
+# The threshold of the dimensions that were not calibrated, the smallest
+# calibrated one apart from 3x3.
+DEFAULT_THRESHOLD = 9
+DEFAULT_LATENCY_BUDGET = 0.05
+SAFETY_MARGIN = 0.5
+
+_EXACT, _LOWER, _UPPER = xrange(3)
+
+_LINES = {}
+
+
+def _GetLines(dimension):
+  """Returns the line bitmasks of a board.
+
+  Returns:
+    A tuple of (all line masks, tuple of the masks through each position).
+  """
+
+  lines = _LINES.get(dimension)
+  if lines is None:
+    masks = []
+    for index in xrange(dimension):
+      masks.append(sum(1 << (index * dimension + col)
+                       for col in xrange(dimension)))
+      masks.append(sum(1 << (row * dimension + index)
+                       for row in xrange(dimension)))
+    masks.append(sum(1 << (index * (dimension + 1))
+                     for index in xrange(dimension)))
+    masks.append(sum(1 << ((index + 1) * (dimension - 1))
+                     for index in xrange(dimension)))
+    through = tuple(tuple(mask for mask in masks if mask >> position & 1)
+                    for position in xrange(dimension * dimension))
+    lines = _LINES[dimension] = (tuple(masks), through)
+  return lines
+
+
+def GetMasks(play_board, board_value):
+  """Converts a board into bitmasks.
+
+  Args:
+    play_board: The board.Board.
+    board_value: The board.BoardValue of the side to move.
+
+  Returns:
+    A tuple of (own mask, opponent mask).
+  """
+
+  own_char = board.BoardValue.ToChar(board_value)
+  own = 0
+  opponent = 0
+  for position, char in enumerate(play_board.ToPositionString()):
+    if char == own_char:
+      own |= 1 << position
+    elif char != ".":
+      opponent |= 1 << position
+  return own, opponent
+
+
+class EndgameSolver(object):
+  """Alpha-beta negamax over bitmasks with a memo of searched positions."""
+
+  def __init__(self, dimension, memo=None):
+    """Initializes the solver.
+
+    Args:
+      dimension: The dimension of the board.
+      memo: An optional dictionary mapping (own, opponent) masks to
+          (score, bound) entries, to share results between solvers.
+    """
+
+    self.dimension = dimension
+    self.memo = {} if memo is None else memo
+    self.nodes = 0
+    self._full = (1 << (dimension * dimension)) - 1
+    self._lines, self._lines_through = _GetLines(dimension)
+
+  def _IsWin(self, mask, position):
+    """Determines if the plays in mask complete a line through position."""
+
+    for line in self._lines_through[position]:
+      if mask & line == line:
+        return True
+    return False
+
+  def _CanAnyoneWin(self, own, opponent):
+    """Determines if any line can still be completed by either user."""
+
+    for line in self._lines:
+      if not line & opponent or not line & own:
+        return True
+    return False
+
+  def Negamax(self, own, opponent, alpha, beta):
+    """Returns the score of a position for the side to move.
+
+    The previous move is assumed not to have ended the game.
+    """
+
+    self.nodes += 1
+    key = (own, opponent)
+    entry = self.memo.get(key)
+    if entry is not None:
+      score, bound = entry
+      if (bound == _EXACT or (bound == _LOWER and score >= beta)
+          or (bound == _UPPER and score <= alpha)):
+        return score
+
+    empty = self._full & ~(own | opponent)
+    if not empty or not self._CanAnyoneWin(own, opponent):
+      self.memo[key] = (0, _EXACT)
+      return 0
+
+    remaining = bin(empty).count("1")
+    moves = []
+    while empty:
+      bit = empty & -empty
+      empty ^= bit
+      position = bit.bit_length() - 1
+      if self._IsWin(own | bit, position):
+        self.memo[key] = (remaining, _EXACT)
+        return remaining
+      moves.append(bit)
+
+    original_alpha = alpha
+    best = -remaining
+    for bit in moves:
+      score = -self.Negamax(opponent, own | bit, -beta, -alpha)
+      if score > best:
+        best = score
+        if score > alpha:
+          alpha = score
+          if alpha >= beta:
+            break
+
+    if best <= original_alpha:
+      bound = _UPPER
+    elif best >= beta:
+      bound = _LOWER
+    else:
+      bound = _EXACT
+    self.memo[key] = (best, bound)
+    return best
+
+  def GetBestMove(self, play_board, board_value):
+    """Finds the move with the best exact score.
+
+    Ties go to the lowest position.
+
+    Args:
+      play_board: The board.Board that is in play and not yet decided.
+      board_value: The board.BoardValue of the side to move.
+
+    Returns:
+      A tuple of (position, score).
+    """
+
+    own, opponent = GetMasks(play_board, board_value)
+    remaining = play_board.CountEmpty()
+    best_position = -1
+    best_score = -(remaining + 1)
+    empty = self._full & ~(own | opponent)
+    while empty:
+      bit = empty & -empty
+      empty ^= bit
+      position = bit.bit_length() - 1
+      if self._IsWin(own | bit, position):
+        return position, remaining
+      score = -self.Negamax(opponent, own | bit, -(remaining + 1),
+                            -best_score)
+      if score > best_score:
+        best_score = score
+        best_position = position
+    return best_position, best_score
+
+
+def GetBestMove(play_board, board_value, memo=None):
+  """Convenience wrapper around EndgameSolver.GetBestMove.
+
+  Returns:
+    The best position to play.
+  """
+
+  return EndgameSolver(play_board.dimension, memo).GetBestMove(
+      play_board, board_value)[0]
+
+
+def GetThreshold(dimension):
+  """Returns the threshold of a dimension.
+
+  Dimensions that were not calibrated use DEFAULT_THRESHOLD rather than the
+  threshold of a neighbouring dimension, which need not fit their budget.
+  """
+
+  return THRESHOLDS.get(dimension, DEFAULT_THRESHOLD)
+
+
+def _RandomPosition(dimension, empty_count, generator):
+  """Plays random moves that do not end the game until empty_count cells
+  are left.
+
+  Unlike random games, which on large boards are nearly always won long
+  before the endgame, this also reaches positions whose lines are still
+  open, and those are the slow ones to solve.
+
+  Returns:
+    An undecided board.Board, or None if every move left would end the game.
+  """
+
+  lines, _ = _GetLines(dimension)
+  plays = {board.BoardValue.X: 0, board.BoardValue.O: 0}
+  empty = range(dimension * dimension)
+  generator.shuffle(empty)
+  board_value = board.BoardValue.X
+  while len(empty) > empty_count:
+    for index, position in enumerate(empty):
+      mask = plays[board_value] | 1 << position
+      if not any(mask & line == line for line in lines if line >> position & 1):
+        break
+    else:
+      return None
+    plays[board_value] = mask
+    del empty[index]
+    board_value = board.BoardValue.Other(board_value)
+
+  play_board = board.Board(dimension)
+  for board_value, mask in plays.iteritems():
+    for position in xrange(dimension * dimension):
+      if mask >> position & 1:
+        play_board.SetPosition(position, board_value)
+  if play_board.IsWinner() != board.BoardValue.NONE:
+    return None
+  return play_board
+
+
+def Calibrate(dimension, budget=DEFAULT_LATENCY_BUDGET, samples=200, seed=0,
+              margin=SAFETY_MARGIN):
+  """Finds the largest threshold whose searches fit in a latency budget.
+
+  Random undecided positions with an increasing number of free cells are
+  solved from an empty memo until the slowest one exceeds margin times the
+  budget.  The margin leaves room for the positions the samples missed.
+
+  Args:
+    dimension: The dimension of the board.
+    budget: The per move latency budget in seconds.
+    samples: The number of positions timed per number of free cells.  Up to
+        ten times as many are drawn, since some are drawn or decided.
+    seed: The seed of the random positions.
+    margin: The fraction of the budget the slowest search may use.
+
+  Returns:
+    The threshold, at least 1.
+  """
+
+  generator = random.Random(seed)
+  threshold = 1
+  for empty_count in xrange(2, dimension * dimension + 1):
+    slowest = 0.0
+    timed = 0
+    for _ in xrange(samples * 10):
+      if timed == samples:
+        break
+      play_board = _RandomPosition(dimension, empty_count, generator)
+      if play_board is None:
+        continue
+      start = time.time()
+      GetBestMove(play_board, play_board.GetSideToMove())
+      slowest = max(slowest, time.time() - start)
+      timed += 1
+    if slowest > budget * margin:
+      break
+    threshold = empty_count
+  return threshold
@@ -0,0 +1,74 @@
+"""Tests that correspond to endgame."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+import random
+import unittest
+
+from controller import endgame
+from model import board
+
+
+class EndgameTest(unittest.TestCase):
+  """Class that tests endgame functions."""
+
+  def testGetMasks(self):
+    play_board = board.Board.FromPositionString("X...O...X")
+    self.assertEqual((0x101, 0x10), endgame.GetMasks(
+        play_board, board.BoardValue.X))
+    self.assertEqual((0x10, 0x101), endgame.GetMasks(
+        play_board, board.BoardValue.O))
+
+  def testEmptyBoardIsADraw(self):
+    solver = endgame.EndgameSolver(3)
+    position, score = solver.GetBestMove(board.Board(3), board.BoardValue.X)
+    self.assertEqual(0, score)
+    self.assertEqual(0, position)
+
+  def testWinsAndLosses(self):
+    solver = endgame.EndgameSolver(3)
+    # X wins immediately with 5 free cells left before the move.
+    self.assertEqual((2, 5), solver.GetBestMove(
+        board.Board.FromPositionString("XX.OO...."), board.BoardValue.X))
+    # O has to block, after which X forks and wins.
+    position, score = solver.GetBestMove(
+        board.Board.FromPositionString("XO..X...."), board.BoardValue.O)
+    self.assertEqual(8, position)
+    self.assertTrue(score < 0)
+
+  def testFasterWinPreferred(self):
+    # X can win now at 2, or later through 6.
+    play_board = board.Board.FromPositionString("XX..O.X.O")
+    self.assertEqual(2, endgame.GetBestMove(play_board, board.BoardValue.X))
+
+  def testSharedMemo(self):
+    memo = {}
+    endgame.GetBestMove(board.Board(3), board.BoardValue.X, memo)
+    solver = endgame.EndgameSolver(3, memo)
+    solver.GetBestMove(board.Board(3), board.BoardValue.X)
+    self.assertEqual(9, solver.nodes)
+
+  def testGetThreshold(self):
+    self.assertEqual(4, endgame.GetThreshold(3))
+    self.assertEqual(9, endgame.GetThreshold(4))
+    self.assertEqual(11, endgame.GetThreshold(6))
+    self.assertEqual(endgame.DEFAULT_THRESHOLD, endgame.GetThreshold(10))
+    self.assertEqual(endgame.DEFAULT_THRESHOLD, endgame.GetThreshold(19))
+    self.assertEqual(endgame.DEFAULT_THRESHOLD, endgame.GetThreshold(2))
+
+  def testRandomPosition(self):
+    generator = random.Random(0)
+    for dimension in (3, 9):
+      for _ in xrange(20):
+        play_board = endgame._RandomPosition(dimension, 6, generator)
+        if play_board is not None:
+          self.assertEqual(6, play_board.CountEmpty())
+          self.assertEqual(board.BoardValue.NONE, play_board.IsWinner())
+
+  def testCalibrate(self):
+    self.assertEqual(9, endgame.Calibrate(3, budget=10.0, samples=2))
+    self.assertEqual(1, endgame.Calibrate(3, budget=-1, samples=2))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -8,9 +8,28 @@ should be more efficient based on optimizations made to the board.
 __author__ = "Rishi Sharma (rishsharma@gmail.com)"
 
 
+import multiprocessing
+import multiprocessing.pool
+import os
+import sys
+
 from model import board
 
 
+# Boards with fewer rows than this are always scanned in sequence, since the
+# cost of sending them to the workers exceeds the time the scan takes.
+PARALLEL_MIN_DIMENSION = 64
+
+# The pool and number of row bands of the parallel scan, see SetWorkers.
+_pool = None
+_bands = 0
+_min_dimension = PARALLEL_MIN_DIMENSION
+# The process that created the pool.  Processes forked from it, such as the
+# workers of a multiprocessing.Pool, inherit a copy of _pool whose workers
+# they cannot reach, so they scan in sequence.
+_pool_pid = None
+
+
 class Heuristic(object):
   """Heuristic enumeration used as weighted values for the next move."""
 
@@ -63,7 +82,8 @@ def _GetRelativeRowHeuristic(position, play_board, board_value):
     board_value: The board.BoardValue of the user.
   """
 
-  row_num, col_num = play_board.ToCoordinates(position)
+  row_num = position // play_board.dimension
+  col_num = position % play_board.dimension
   if play_board.IsRowPossible(row_num, board_value) == -1:
     return Heuristic.INVALID
 
@@ -92,7 +112,8 @@ def _GetRelativeColumnHeuristic(position, play_board, board_value):
     board_value: The board.BoardValue of the user.
   """
 
-  row_num, col_num = play_board.ToCoordinates(position)
+  row_num = position // play_board.dimension
+  col_num = position % play_board.dimension
   if play_board.IsColumnPossible(col_num, board_value) == -1:
     return Heuristic.INVALID
 
@@ -125,7 +146,8 @@ def _GetDiagonalHeuristic(position, play_board, board_value):
       play_board.IsAscendingDiagonalPossible(board_value) < 0):
     return Heuristic.INVALID
 
-  row, col = play_board.ToCoordinates(position)
+  row = position // play_board.dimension
+  col = position % play_board.dimension
   if row != col and row != play_board.dimension - col - 1:
     return Heuristic.INVALID
 
@@ -180,41 +202,35 @@ def GetLocalityValue(position, play_board, board_value):
   if not play_board.IsValidMoveFromPosition(position):
     return Heuristic.INVALID
 
+  # The position itself is free, so only the surrounding blocks can hold
+  # the opponent.  Blocks off the board are skipped by clamping the ranges.
   value = 0
-  row, col = play_board.ToCoordinates(position)
-  block_map = [
-      (row - 1, col -1),
-      (row - 1, col),
-      (row - 1, col + 1),
-      (row, col - 1),
-      (row, col + 1),
-      (row + 1, col -1),
-      (row + 1, col),
-      (row + 1, col + 1)]
-  for crow, ccol in block_map:
-    if (crow < 0 or ccol < 0
-        or crow > play_board.dimension - 1
-        or ccol > play_board.dimension - 1):
-      continue  # Skip invalid positions.
-    if (play_board.GetFromCoordinates(crow, ccol) not in
-        (board_value, board.BoardValue.NONE)):
-      value += Heuristic.LOCALITY
+  dimension = play_board.dimension
+  row = position // dimension
+  col = position % dimension
+  other_board_value = board.BoardValue.Other(board_value)
+  first_col = col - 1 if col else 0
+  last_col = col + 2 if col < dimension - 1 else dimension
+  for crow in xrange(row - 1 if row else 0,
+                     row + 2 if row < dimension - 1 else dimension):
+    for ccol in xrange(first_col, last_col):
+      if play_board.GetFromCoordinates(crow, ccol) == other_board_value:
+        value += Heuristic.LOCALITY
 
   return value
 
 
-def GetBestPositionBasedOnHeuristics(play_board, board_value):
-  """Determines the best move to make based on heuristics.
+def _ScanBand(play_board, board_value, first, last):
+  """Finds the best position among the positions first to last - 1.
 
-  Args:
-    position: The position on the board.
-    play_board: The board.Board that is in play.
-    board_value: The board.BoardValue of the user.
+  Returns:
+    A tuple of (best value, best position), with a position of -1 if no
+    position of the band is free.  Ties go to the last position.
   """
 
-  best_position = 0
+  best_position = -1
   best_value = 0
-  for index in xrange(play_board.dimension * play_board.dimension):
+  for index in xrange(first, last):
     if play_board.IsValidMoveFromPosition(index):
       computed_value = (GetCenterValue(index, play_board)
                         + GetCornerValue(index, play_board)
@@ -224,5 +240,114 @@ def GetBestPositionBasedOnHeuristics(play_board, board_value):
         best_value = computed_value
         best_position = index
 
+  return best_value, best_position
+
+
+def _ScanBandTask(task):
+  """Pool entry point that scans a band of a packed board.
+
+  Args:
+    task: A tuple of (board.Board.ToBytes of the board, board.BoardValue of
+        the user, first position, last position).  Thread pools are given
+        the board.Board itself.
+  """
+
+  play_board, board_value, first, last = task
+  if not isinstance(play_board, board.Board):
+    play_board = board.Board.FromBytes(play_board)
+  return _ScanBand(play_board, board_value, first, last)
+
+
+def IsFreeThreaded():
+  """Determines if threads run Python code in parallel, i.e. without a GIL."""
+
+  is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+  return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def SetWorkers(workers, use_threads=None,
+               min_dimension=PARALLEL_MIN_DIMENSION):
+  """Sets up the parallel scan of large boards.
+
+  The rows of a board are split into one band per worker and the bands are
+  scored in parallel.  The move played is the same as with the sequential
+  scan.
+
+  Args:
+    workers: The number of workers, None for one per CPU and 0 to scan in
+        sequence.
+    use_threads: Whether the workers are threads rather than processes.
+        Defaults to threads on free-threaded builds only, since elsewhere the
+        GIL serializes them.
+    min_dimension: Boards of smaller dimension are scanned in sequence.
+  """
+
+  global _pool, _bands, _min_dimension, _pool_pid
+  if _pool is not None:
+    if _pool_pid == os.getpid():
+      _pool.terminate()
+      _pool.join()
+    _pool = None
+  _bands = 0
+  _min_dimension = min_dimension
+  if workers == 0:
+    return
+  if workers is None:
+    workers = multiprocessing.cpu_count()
+  if use_threads is None:
+    use_threads = IsFreeThreaded()
+  if use_threads:
+    _pool = multiprocessing.pool.ThreadPool(workers)
+  else:
+    _pool = multiprocessing.Pool(workers)
+  _pool_pid = os.getpid()
+  _bands = workers
+
+
+def _ScanInParallel(play_board, board_value):
+  """Scans the row bands of a board over the pool and reduces the results."""
+
+  dimension = play_board.dimension
+  if isinstance(_pool, multiprocessing.pool.ThreadPool):
+    shared = play_board
+  else:
+    shared = play_board.ToBytes()
+  bands = min(_bands, dimension)
+  tasks = []
+  for band in xrange(bands):
+    tasks.append((shared, board_value,
+                  dimension * (dimension * band // bands),
+                  dimension * (dimension * (band + 1) // bands)))
+
+  # The bands are in order, so keeping the last maximum of the bands keeps
+  # the last maximum of the board.
+  best_position = 0
+  best_value = 0
+  for value, position in _pool.map(_ScanBandTask, tasks, 1):
+    if position >= 0 and value >= best_value:
+      best_value = value
+      best_position = position
+
   return best_position
 
+
+def GetBestPositionBasedOnHeuristics(play_board, board_value):
+  """Determines the best move to make based on heuristics.
+
+  Ties go to the last position.  Boards of at least the minimum dimension
+  are scanned in parallel once SetWorkers has been called, except in
+  processes forked after the call.
+
+  Args:
+    position: The position on the board.
+    play_board: The board.Board that is in play.
+    board_value: The board.BoardValue of the user.
+  """
+
+  if (_pool is not None and play_board.dimension >= _min_dimension
+      and _pool_pid == os.getpid()):
+    return _ScanInParallel(play_board, board_value)
+
+  position = _ScanBand(play_board, board_value, 0,
+                       play_board.dimension * play_board.dimension)[1]
+  return max(position, 0)
@@ -2,6 +2,8 @@
 
 __author__ = "Rishi Sharma (rishsharma@gmail.com)"
 
+import multiprocessing
+import random
 import unittest
 
 from controller import heuristics
@@ -91,6 +93,61 @@ class HeuristicsTest(unittest.TestCase):
                      heuristics.GetLocalityValue(
                          1, play_board, board.BoardValue.X))
 
+  def _CheckParallelScan(self, use_threads):
+    """Compares the parallel and sequential scans on random boards."""
+
+    generator = random.Random(5)
+    cases = []
+    for dimension in (3, 4, 5, 8, 13):
+      for plays in (0, 1, dimension, dimension * dimension - 1):
+        play_board = board.Board(dimension)
+        board_value = board.BoardValue.X
+        positions = range(dimension * dimension)
+        generator.shuffle(positions)
+        for position in positions[:plays]:
+          play_board.SetPosition(position, board_value)
+          board_value = board.BoardValue.Other(board_value)
+        cases.append((play_board, board_value))
+    expected = [heuristics.GetBestPositionBasedOnHeuristics(*case)
+                for case in cases]
+
+    heuristics.SetWorkers(3, use_threads=use_threads, min_dimension=1)
+    try:
+      self.assertEqual(expected,
+                       [heuristics.GetBestPositionBasedOnHeuristics(*case)
+                        for case in cases])
+    finally:
+      heuristics.SetWorkers(0)
+
+  def testParallelScanInThreads(self):
+    self._CheckParallelScan(True)
+
+  def testParallelScanInProcesses(self):
+    self._CheckParallelScan(False)
+
+  def testForkedProcessesScanInSequence(self):
+    play_board = board.Board(8)
+    expected = heuristics.GetBestPositionBasedOnHeuristics(
+        play_board, board.BoardValue.X)
+    # The threads of the pool do not exist in a fork, so using it would hang.
+    heuristics.SetWorkers(2, use_threads=True, min_dimension=1)
+    try:
+      pool = multiprocessing.Pool(1)
+      try:
+        self.assertEqual(expected, pool.apply_async(
+            heuristics.GetBestPositionBasedOnHeuristics,
+            (play_board, board.BoardValue.X)).get(30))
+      finally:
+        pool.terminate()
+        pool.join()
+    finally:
+      heuristics.SetWorkers(0)
+
+  def testScanTieBreak(self):
+    # Every corner scores the same and the last one is played.
+    self.assertEqual(8, heuristics.GetBestPositionBasedOnHeuristics(
+        board.Board.FromPositionString("....X...."), board.BoardValue.O))
+
 
 if __name__ == '__main__':
   unittest.main()
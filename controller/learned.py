@@ -0,0 +1,349 @@
+"""Learned move evaluator running in NumPy.
+
+Every free cell of a board is described by a vector of features built from
+the quantities the heuristics module scores: centre and corner membership,
+the occupancy of the lines through the cell, the plays around it and the
+lines it would win or turn into a fork.  A model maps the features of every
+cell of a batch of boards to scores in one matrix multiply and the best
+free cell is played.
+
+Two models are supported, stored as NumPy .npz weight files:
+
+  linear: "w" of shape (NUM_FEATURES,)
+  mlp:    "w1" (NUM_FEATURES, hidden), "b1" (hidden,), "w2" (hidden,), "b2" ()
+
+Fit trains a linear model on self_play samples.  NumPy is optional; without
+it IsAvailable returns False and the evaluator cannot be used.
+"""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
+from model import board
+
+
+FEATURES = ("bias", "center", "corner",
+            "own_row", "own_column", "own_diagonal",
+            "opponent_row", "opponent_column", "opponent_diagonal",
+            "own_neighbours", "opponent_neighbours",
+            "own_wins", "opponent_wins", "own_forks", "opponent_forks")
+NUM_FEATURES = len(FEATURES)
+
+# Hand set linear weights that follow the priorities of GetNextMove: win,
+# block, fork, block a fork, then the heuristics.
+DEFAULT_WEIGHTS = (0.0, 4.0, 2.0,
+                   3.0, 3.0, 3.0,
+                   2.0, 2.0, 2.0,
+                   0.5, 1.0,
+                   400.0, 200.0, 40.0, 20.0)
+
+# The evaluator used by GetBestMove, created on first use.
+_evaluator = None
+
+
+class LearnedError(Exception):
+  """Thrown when the evaluator cannot be used or the weights are invalid."""
+
+
+def IsAvailable():
+  """Determines if NumPy, and so the evaluator, is available."""
+
+  return numpy is not None
+
+
+def _CheckAvailable():
+  if numpy is None:
+    raise LearnedError("The learned evaluator requires NumPy.")
+
+
+def ToArray(play_board, board_value):
+  """Converts a board into an (N, N) array relative to the side to move.
+
+  Returns:
+    An int8 array holding 1 for the plays of board_value, -1 for those of
+    its opponent and 0 for the free cells.
+  """
+
+  _CheckAvailable()
+  text = numpy.frombuffer(play_board.ToPositionString(), dtype=numpy.uint8)
+  own = ord(board.BoardValue.ToChar(board_value))
+  cells = numpy.where(text == own, 1, numpy.where(text == ord("."), 0, -1))
+  return cells.astype(numpy.int8).reshape(play_board.dimension,
+                                          play_board.dimension)
+
+
+def _LineFeatures(own, opponent, dimension):
+  """Returns the per cell line features of one user.
+
+  Args:
+    own: A (B, N, N) float array of the user's plays.
+    opponent: A (B, N, N) float array of the other user's plays.
+    dimension: N.
+
+  Returns:
+    A tuple of (row, column, diagonal occupancy, wins, forks), each a
+    (B, N, N) array.  Occupancy counts the user's plays in the lines
+    through the cell that the opponent has not blocked, divided by N.
+  """
+
+  index = numpy.arange(dimension)
+  descending = numpy.eye(dimension, dtype=bool)
+  ascending = descending[::-1]
+
+  lines = []
+  row_own = own.sum(axis=2)
+  row_open = opponent.sum(axis=2) == 0
+  lines.append((numpy.where(row_open, row_own, -1.0)[:, :, None],
+                numpy.ones((1, dimension, dimension), dtype=bool)))
+  col_own = own.sum(axis=1)
+  col_open = opponent.sum(axis=1) == 0
+  lines.append((numpy.where(col_open, col_own, -1.0)[:, None, :],
+                numpy.ones((1, dimension, dimension), dtype=bool)))
+  desc_own = own[:, index, index].sum(axis=1)
+  desc_open = opponent[:, index, index].sum(axis=1) == 0
+  lines.append((numpy.where(desc_open, desc_own, -1.0)[:, None, None],
+                descending[None]))
+  asc_own = own[:, index, dimension - 1 - index].sum(axis=1)
+  asc_open = opponent[:, index, dimension - 1 - index].sum(axis=1) == 0
+  lines.append((numpy.where(asc_open, asc_own, -1.0)[:, None, None],
+                ascending[None]))
+
+  # counts holds -1 for blocked lines and the number of plays otherwise.
+  occupancy = []
+  wins = 0
+  forks = 0
+  for counts, through in lines:
+    occupancy.append(numpy.where(through, numpy.maximum(counts, 0), 0)
+                     / float(dimension))
+    wins = wins + (through & (counts == dimension - 1))
+    forks = forks + (through & (counts == dimension - 2))
+  return (occupancy[0], occupancy[1], occupancy[2] + occupancy[3],
+          wins.astype(float), (forks >= 2).astype(float))
+
+
+def _Neighbours(plays):
+  """Returns the number of plays among the 8 cells around each cell."""
+
+  dimension = plays.shape[1]
+  padded = numpy.zeros((plays.shape[0], dimension + 2, dimension + 2))
+  padded[:, 1:-1, 1:-1] = plays
+  total = -plays
+  for row in xrange(3):
+    for col in xrange(3):
+      total = total + padded[:, row:row + dimension, col:col + dimension]
+  return total
+
+
+def GetFeatures(cells):
+  """Computes the features of every cell of a batch of boards.
+
+  Args:
+    cells: A (B, N, N) array as stacked from ToArray.
+
+  Returns:
+    A (B, N * N, NUM_FEATURES) float array.  The win and fork features are
+    0 for occupied cells.
+  """
+
+  _CheckAvailable()
+  batch, dimension = cells.shape[:2]
+  own = (cells == 1).astype(float)
+  opponent = (cells == -1).astype(float)
+  free = (cells == 0).astype(float)
+
+  center = numpy.zeros((dimension, dimension))
+  center.flat[dimension * dimension // 2] = 1
+  corner = numpy.zeros((dimension, dimension))
+  corner[[0, 0, -1, -1], [0, -1, 0, -1]] = 1
+  corner *= 1 - center
+
+  own_lines = _LineFeatures(own, opponent, dimension)
+  opponent_lines = _LineFeatures(opponent, own, dimension)
+  planes = ([numpy.ones((batch, dimension, dimension)),
+             numpy.broadcast_to(center, (batch, dimension, dimension)),
+             numpy.broadcast_to(corner, (batch, dimension, dimension))]
+            + list(own_lines[:3]) + list(opponent_lines[:3])
+            + [_Neighbours(own), _Neighbours(opponent)]
+            + [plane * free for plane in (own_lines[3], opponent_lines[3],
+                                          own_lines[4], opponent_lines[4])])
+  return numpy.stack(planes, axis=-1).reshape(batch, dimension * dimension,
+                                              NUM_FEATURES)
+
+
+class Evaluator(object):
+  """Scores the cells of boards with a linear or MLP model."""
+
+  def __init__(self, weights=None):
+    """Initializes the evaluator.
+
+    Args:
+      weights: A dictionary of weight arrays as described in the module
+          docstring.  Defaults to the linear DEFAULT_WEIGHTS.
+
+    Raises:
+      LearnedError if NumPy is missing or the weights are invalid.
+    """
+
+    _CheckAvailable()
+    if weights is None:
+      weights = {"w": numpy.array(DEFAULT_WEIGHTS)}
+    self.weights = dict((name, numpy.asarray(value, dtype=float))
+                        for name, value in weights.items())
+    if "w" in self.weights:
+      if self.weights["w"].shape != (NUM_FEATURES,):
+        raise LearnedError("Linear weights must have shape (%d,)" %
+                           NUM_FEATURES)
+    elif set(self.weights) >= set(("w1", "b1", "w2", "b2")):
+      hidden = self.weights["b1"].shape
+      if (self.weights["w1"].shape != (NUM_FEATURES,) + hidden
+          or self.weights["w2"].shape != hidden
+          or self.weights["b2"].shape != ()):
+        raise LearnedError("Inconsistent MLP weight shapes")
+    else:
+      raise LearnedError("Expected linear (w) or MLP (w1, b1, w2, b2) "
+                         "weights")
+
+  @staticmethod
+  def Load(path):
+    """Creates an evaluator from an .npz weight file."""
+
+    _CheckAvailable()
+    with numpy.load(path) as data:
+      return Evaluator(dict((name, data[name]) for name in data.files))
+
+  def Save(self, path):
+    """Writes the weights to an .npz file."""
+
+    numpy.savez(path, **self.weights)
+
+  def Score(self, features):
+    """Scores feature vectors.
+
+    Args:
+      features: A (..., NUM_FEATURES) array.
+
+    Returns:
+      The scores, of shape features.shape[:-1].
+    """
+
+    if "w" in self.weights:
+      return features.dot(self.weights["w"])
+    hidden = numpy.maximum(features.dot(self.weights["w1"])
+                           + self.weights["b1"], 0)
+    return hidden.dot(self.weights["w2"]) + self.weights["b2"]
+
+  def GetBestMoves(self, play_boards, board_values):
+    """Finds the best free cell of each of a batch of boards.
+
+    Ties go to the lowest position.
+
+    Args:
+      play_boards: A sequence of board.Board objects of the same dimension,
+          none of them full.
+      board_values: The board.BoardValue to move on each board.
+
+    Returns:
+      A list of positions.
+    """
+
+    cells = numpy.stack([ToArray(play_board, board_value) for
+                         play_board, board_value
+                         in zip(play_boards, board_values)])
+    scores = self.Score(GetFeatures(cells))
+    scores[cells.reshape(len(play_boards), -1) != 0] = -numpy.inf
+    return scores.argmax(axis=1).tolist()
+
+
+def SetEvaluator(evaluator):
+  """Sets the evaluator used by GetBestMove, None for the default weights."""
+
+  global _evaluator
+  _evaluator = evaluator
+
+
+def LoadWeights(path):
+  """Makes GetBestMove use the weights of an .npz file."""
+
+  SetEvaluator(Evaluator.Load(path))
+
+
+def GetEvaluator():
+  """Returns the current evaluator, creating the default one if needed.
+
+  Raises:
+    LearnedError if NumPy is missing.
+  """
+
+  global _evaluator
+  if _evaluator is None:
+    _evaluator = Evaluator()
+  return _evaluator
+
+
+def GetBestMove(play_board, board_value):
+  """Finds the best free cell of a board with the current evaluator.
+
+  Raises:
+    LearnedError if NumPy is missing.
+  """
+
+  return GetEvaluator().GetBestMoves([play_board], [board_value])[0]
+
+
+def Fit(chunks, iterations=300, learning_rate=0.5, l2=1e-4, initial=None):
+  """Trains linear weights to predict the moves of self play samples.
+
+  The model is a softmax over the free cells of each position, fitted by
+  full batch gradient descent.  Only the moves of the sides that did not
+  lose are used as targets.
+
+  Args:
+    chunks: An iterable of self_play.Chunk objects of one dimension.
+    iterations: The number of gradient steps.
+    learning_rate: The step size.
+    l2: The weight decay.
+    initial: The starting weights, DEFAULT_WEIGHTS if None.
+
+  Returns:
+    An Evaluator with the trained weights.
+  """
+
+  _CheckAvailable()
+  features = []
+  free = []
+  targets = []
+  for chunk in chunks:
+    for index in xrange(len(chunk)):
+      if chunk.results[index] < 0:
+        continue
+      cells = ToArray(chunk.GetBoard(index), chunk.sides[index])
+      features.append(GetFeatures(cells[None])[0])
+      free.append(cells.ravel() == 0)
+      targets.append(chunk.moves[index])
+  if not targets:
+    raise LearnedError("No samples to fit.")
+
+  features = numpy.array(features)
+  free = numpy.array(free)
+  targets = numpy.array(targets)
+  # Scale the features so that one learning rate suits all of them.
+  scale = numpy.maximum(numpy.abs(features).max(axis=(0, 1)), 1e-9)
+  scaled = features / scale
+  weights = numpy.array(DEFAULT_WEIGHTS if initial is None else initial,
+                        dtype=float) * scale
+  rows = numpy.arange(len(targets))
+  for _ in xrange(iterations):
+    scores = scaled.dot(weights)
+    scores[~free] = -numpy.inf
+    scores -= scores.max(axis=1)[:, None]
+    probabilities = numpy.exp(scores)
+    probabilities /= probabilities.sum(axis=1)[:, None]
+    probabilities[rows, targets] -= 1
+    gradient = numpy.einsum("bc,bcf->f", probabilities, scaled) / len(targets)
+    weights -= learning_rate * (gradient + l2 * weights)
+  return Evaluator({"w": weights / scale})
@@ -0,0 +1,103 @@
+"""Tests that correspond to learned."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+import os
+import shutil
+import StringIO
+import tempfile
+import unittest
+
+from controller import learned
+from controller import self_play
+from controller import strategy
+from model import board
+
+if learned.IsAvailable():
+  import numpy
+
+
+@unittest.skipUnless(learned.IsAvailable(), "NumPy is not installed")
+class LearnedTest(unittest.TestCase):
+  """Class that tests learned evaluator functions."""
+
+  def tearDown(self):
+    learned.SetEvaluator(None)
+
+  def testToArray(self):
+    cells = learned.ToArray(board.Board.FromPositionString("XO..X...."),
+                            board.BoardValue.O)
+    self.assertEqual([[-1, 1, 0], [0, -1, 0], [0, 0, 0]], cells.tolist())
+
+  def testGetFeatures(self):
+    cells = learned.ToArray(board.Board.FromPositionString("XX..O...."),
+                            board.BoardValue.O)
+    features = learned.GetFeatures(cells[None])
+    self.assertEqual((1, 9, learned.NUM_FEATURES), features.shape)
+    column = dict((name, features[0, :, index]) for index, name
+                  in enumerate(learned.FEATURES))
+    # Only position 2 completes X's top row.
+    self.assertEqual([0, 0, 1, 0, 0, 0, 0, 0, 0],
+                     column["opponent_wins"].tolist())
+    self.assertEqual(0, column["own_wins"].sum())
+    self.assertEqual(1, column["center"][4])
+    self.assertEqual([1, 0, 1, 0, 0, 0, 1, 0, 1],
+                     column["corner"].tolist())
+    # Position 3 touches X at 0 and 1 and O at 4.
+    self.assertEqual(2, column["opponent_neighbours"][3])
+    self.assertEqual(1, column["own_neighbours"][3])
+
+  def testGetNextMove(self):
+    # O must block the top row.
+    self.assertEqual(2, strategy.GetNextMove(
+        board.Board.FromPositionString("XX..O...."), board.BoardValue.O,
+        strategy.Strategy.LEARNED))
+    self.assertEqual(4, learned.GetBestMove(board.Board(3),
+                                            board.BoardValue.X))
+
+  def testBatchMatchesSingleBoards(self):
+    evaluator = learned.Evaluator()
+    boards = [board.Board.FromPositionString(text) for text in
+              ("X...O....", ".........", "XO.OX....", "..X.O..X.")]
+    values = [play_board.GetSideToMove() for play_board in boards]
+    self.assertEqual(
+        [evaluator.GetBestMoves([play_board], [value])[0]
+         for play_board, value in zip(boards, values)],
+        evaluator.GetBestMoves(boards, values))
+
+  def testWeights(self):
+    directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, directory)
+    path = os.path.join(directory, "weights.npz")
+
+    hidden = 4
+    generator = numpy.random.RandomState(0)
+    mlp = learned.Evaluator({
+        "w1": generator.normal(size=(learned.NUM_FEATURES, hidden)),
+        "b1": numpy.zeros(hidden), "w2": generator.normal(size=hidden),
+        "b2": numpy.array(0.0)})
+    mlp.Save(path)
+    learned.LoadWeights(path)
+    play_board = board.Board.FromPositionString("X...O....")
+    self.assertEqual(mlp.GetBestMoves([play_board], [board.BoardValue.X]),
+                     [learned.GetBestMove(play_board, board.BoardValue.X)])
+
+    self.assertRaises(learned.LearnedError, learned.Evaluator,
+                      {"w": numpy.zeros(3)})
+    self.assertRaises(learned.LearnedError, learned.Evaluator,
+                      {"w1": numpy.zeros((learned.NUM_FEATURES, 2))})
+
+  def testFit(self):
+    stream = StringIO.StringIO()
+    self_play.Generate(stream, 3, 20, [strategy.Strategy.HEURISTICS],
+                       processes=0)
+    stream.seek(0)
+    evaluator = learned.Fit(self_play.ReadChunks(stream), iterations=20)
+    self.assertEqual((learned.NUM_FEATURES,), evaluator.weights["w"].shape)
+    self.assertTrue(numpy.isfinite(evaluator.weights["w"]).all())
+    self.assertEqual([2], evaluator.GetBestMoves(
+        [board.Board.FromPositionString("XX..O....")], [board.BoardValue.O]))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,191 @@
+"""Lockstep simulation of many games on one NumPy array.
+
+Playing a game through board.Board costs a chain of Python calls per play,
+so cheap strategies spend nearly all their time in interpreter overhead and
+scale no better than the number of worker processes.  A Simulator instead
+holds a batch of B games in a (B, N, N) array of BoardValues and advances
+all of them by one play per step:
+
+  - the moves of every game are chosen at once by a vectorised policy,
+  - wins are found by reducing the row, column and diagonals of each play,
+  - draws are found when every line holds both an X and an O,
+  - the slots of finished games are refilled with new games, so the batch
+    stays full until the requested number of games has started.
+
+Two strategies have vectorised policies: RANDOM, and LEARNED, which scores
+the free cells with the current learned.Evaluator (by default weights that
+follow the priorities of the heuristics).  NumPy is required.
+"""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
+from controller import learned
+from controller import strategy
+from model import board
+
+
+DEFAULT_BATCH_SIZE = 1024
+
+# The strategies that have a vectorised policy.
+STRATEGIES = (strategy.Strategy.RANDOM, strategy.Strategy.LEARNED)
+
+
+class Simulator(object):
+  """Plays a batch of games between two strategies in lockstep."""
+
+  def __init__(self, dimension, x_strategy=strategy.Strategy.RANDOM,
+               o_strategy=strategy.Strategy.RANDOM,
+               batch_size=DEFAULT_BATCH_SIZE, seed=0, random_plies=0):
+    """Initializes the simulator.
+
+    Args:
+      dimension: The dimension of the boards.
+      x_strategy: The strategy.Strategy playing X, one of STRATEGIES.
+      o_strategy: The strategy.Strategy playing O, one of STRATEGIES.
+      batch_size: The number of games played at once.
+      seed: The seed of the random plays.
+      random_plies: The number of random opening plays of every game.
+
+    Raises:
+      strategy.StrategyError if NumPy is missing or a strategy has no
+      vectorised policy.
+    """
+
+    if numpy is None:
+      raise strategy.StrategyError("Lockstep simulation requires NumPy.")
+    for value in (x_strategy, o_strategy):
+      if value not in STRATEGIES:
+        raise strategy.StrategyError(
+            "No vectorised policy for the %s strategy" %
+            strategy.Strategy.ToString(value))
+    self.dimension = dimension
+    self.batch_size = batch_size
+    self.random_plies = random_plies
+    self._strategies = {board.BoardValue.X: x_strategy,
+                        board.BoardValue.O: o_strategy}
+    self._random = numpy.random.RandomState(seed)
+    self._cells = numpy.zeros((batch_size, dimension, dimension),
+                              dtype=numpy.int8)
+    # A view of the cells indexed by position.
+    self._flat = self._cells.reshape(batch_size, dimension * dimension)
+    self._sides = numpy.full(batch_size, board.BoardValue.X, dtype=numpy.int8)
+    self._plies = numpy.zeros(batch_size, dtype=numpy.int32)
+    self._active = numpy.zeros(batch_size, dtype=bool)
+    index = numpy.arange(dimension)
+    self._descending = (index, index)
+    self._ascending = (index, dimension - 1 - index)
+
+  def _ChooseRandom(self, flat):
+    """Returns a uniformly random free position of every board."""
+
+    scores = self._random.random_sample(flat.shape)
+    scores[flat != board.BoardValue.NONE] = -1
+    return scores.argmax(axis=1)
+
+  def _ChooseLearned(self, cells, sides):
+    """Returns the position the learned evaluator picks on every board."""
+
+    relative = numpy.where(cells == sides[:, None, None], 1,
+                           numpy.where(cells == board.BoardValue.NONE, 0, -1))
+    scores = learned.GetEvaluator().Score(learned.GetFeatures(relative))
+    scores[relative.reshape(len(sides), -1) != 0] = -numpy.inf
+    return scores.argmax(axis=1)
+
+  def _ChooseMoves(self, slots):
+    """Returns the move of every game in the given slots."""
+
+    flat = self._flat[slots]
+    sides = self._sides[slots]
+    moves = self._ChooseRandom(flat)
+    uses_learned = self._plies[slots] >= self.random_plies
+    for board_value, value in self._strategies.items():
+      if value != strategy.Strategy.LEARNED:
+        uses_learned &= sides != board_value
+    if uses_learned.any():
+      learned_slots = slots[uses_learned]
+      moves[uses_learned] = self._ChooseLearned(self._cells[learned_slots],
+                                                sides[uses_learned])
+    return moves
+
+  def _GetOutcomes(self, slots, moves):
+    """Finds the games of the given slots that the last moves ended.
+
+    Returns:
+      A tuple of (won, drawn) boolean arrays over the slots.
+    """
+
+    dimension = self.dimension
+    cells = self._cells[slots]
+    sides = self._sides[slots]
+    rows, cols = numpy.divmod(moves, dimension)
+    own = cells == sides[:, None, None]
+    games = numpy.arange(len(slots))
+    won = (own[games, rows].all(axis=1)
+           | own[games, :, cols].all(axis=1)
+           | ((rows == cols) & own[:, self._descending[0],
+                                   self._descending[1]].all(axis=1))
+           | ((rows + cols == dimension - 1)
+              & own[:, self._ascending[0], self._ascending[1]].all(axis=1)))
+
+    # A line is dead once it holds plays of both users.
+    has_x = cells == board.BoardValue.X
+    has_o = cells == board.BoardValue.O
+    drawn = ((has_x.any(axis=2) & has_o.any(axis=2)).all(axis=1)
+             & (has_x.any(axis=1) & has_o.any(axis=1)).all(axis=1))
+    for diagonal in (self._descending, self._ascending):
+      drawn &= (has_x[:, diagonal[0], diagonal[1]].any(axis=1)
+                & has_o[:, diagonal[0], diagonal[1]].any(axis=1))
+    return won, drawn & ~won
+
+  def Run(self, games):
+    """Plays games until the requested number has finished.
+
+    Args:
+      games: The number of games to play.
+
+    Returns:
+      A dictionary of the number of games, X wins, O wins, draws and plays
+      made.
+    """
+
+    stats = {"games": 0, "x_wins": 0, "o_wins": 0, "draws": 0, "plies": 0}
+    started = min(games, self.batch_size)
+    self._cells[:] = board.BoardValue.NONE
+    self._sides[:] = board.BoardValue.X
+    self._plies[:] = 0
+    self._active[:] = False
+    self._active[:started] = True
+
+    slots = numpy.nonzero(self._active)[0]
+    while len(slots):
+      moves = self._ChooseMoves(slots)
+      self._flat[slots, moves] = self._sides[slots]
+      won, drawn = self._GetOutcomes(slots, moves)
+      stats["plies"] += len(slots)
+
+      winners = self._sides[slots][won]
+      stats["x_wins"] += int((winners == board.BoardValue.X).sum())
+      stats["o_wins"] += int((winners == board.BoardValue.O).sum())
+      stats["draws"] += int(drawn.sum())
+      finished = slots[won | drawn]
+      stats["games"] += len(finished)
+
+      self._sides[slots] = numpy.where(self._sides[slots] == board.BoardValue.X,
+                                       board.BoardValue.O, board.BoardValue.X)
+      self._plies[slots] += 1
+      if len(finished):
+        # Refill as many finished slots as there are games left to start.
+        refill = finished[:games - started]
+        self._active[finished[len(refill):]] = False
+        self._cells[refill] = board.BoardValue.NONE
+        self._sides[refill] = board.BoardValue.X
+        self._plies[refill] = 0
+        started += len(refill)
+        slots = numpy.nonzero(self._active)[0]
+    return stats
@@ -0,0 +1,93 @@
+"""Tests that correspond to lockstep."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+import random
+import unittest
+
+from controller import learned
+from controller import lockstep
+from controller import strategy
+from model import board
+
+if learned.IsAvailable():
+  import numpy
+
+
+@unittest.skipUnless(learned.IsAvailable(), "NumPy is not installed")
+class LockstepTest(unittest.TestCase):
+  """Class that tests the lockstep simulator."""
+
+  def tearDown(self):
+    learned.SetEvaluator(None)
+
+  def testRun(self):
+    simulator = lockstep.Simulator(4, batch_size=64, seed=3)
+    stats = simulator.Run(500)
+    self.assertEqual(500, stats["games"])
+    self.assertEqual(500, stats["x_wins"] + stats["o_wins"] + stats["draws"])
+    # Games end after between 2 * 4 - 1 and 16 plays.
+    self.assertTrue(7 * 500 <= stats["plies"] <= 16 * 500)
+    self.assertEqual(stats, lockstep.Simulator(4, batch_size=64,
+                                               seed=3).Run(500))
+
+  def testRunFewerGamesThanSlots(self):
+    stats = lockstep.Simulator(3, batch_size=32).Run(5)
+    self.assertEqual(5, stats["games"])
+
+  def testOutcomesMatchBoard(self):
+    dimension = 4
+    simulator = lockstep.Simulator(dimension, batch_size=1)
+    generator = random.Random(11)
+    for _ in xrange(200):
+      play_board = board.Board(dimension)
+      simulator._cells[:] = board.BoardValue.NONE
+      board_value = board.BoardValue.X
+      while 1:
+        position = generator.choice([
+            position for position in xrange(dimension * dimension)
+            if play_board.IsValidMoveFromPosition(position)])
+        play_board.SetPosition(position, board_value)
+        simulator._flat[0, position] = board_value
+        simulator._sides[0] = board_value
+        won, drawn = simulator._GetOutcomes(numpy.array([0]),
+                                            numpy.array([position]))
+        has_won = play_board.IsWinner()
+        self.assertEqual(has_won == board_value, won[0])
+        self.assertEqual(has_won is None, drawn[0])
+        if has_won != board.BoardValue.NONE:
+          break
+        board_value = board.BoardValue.Other(board_value)
+
+  def testLearnedBeatsRandom(self):
+    stats = lockstep.Simulator(3, strategy.Strategy.LEARNED,
+                               strategy.Strategy.RANDOM,
+                               batch_size=100).Run(200)
+    self.assertEqual(0, stats["o_wins"])
+    self.assertTrue(stats["x_wins"] > 150)
+
+  def testLearnedMatchesStrategy(self):
+    # Without random plays both sides play the moves of GetNextMove.
+    simulator = lockstep.Simulator(3, strategy.Strategy.LEARNED,
+                                   strategy.Strategy.LEARNED, batch_size=1)
+    stats = simulator.Run(1)
+    play_board = board.Board(3)
+    board_value = board.BoardValue.X
+    while play_board.IsWinner() == board.BoardValue.NONE:
+      play_board.SetPosition(
+          strategy.GetNextMove(play_board, board_value,
+                               strategy.Strategy.LEARNED), board_value)
+      board_value = board.BoardValue.Other(board_value)
+    self.assertEqual(9 - play_board.ToPositionString().count("."),
+                     stats["plies"])
+    self.assertEqual(play_board.ToPositionString(),
+                     "".join(board.BoardValue.ToChar(value)
+                             for value in simulator._flat[0]))
+
+  def testUnsupportedStrategy(self):
+    self.assertRaises(strategy.StrategyError, lockstep.Simulator, 3,
+                      strategy.Strategy.HEURISTICS)
+
+
+if __name__ == '__main__':
+  unittest.main()
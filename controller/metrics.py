@@ -0,0 +1,215 @@
+"""Engine metrics: counters, gauges and latency histograms.
+
+A Registry is queryable in process with GetCounter/GetHistogram/Snapshot and
+can be dumped as JSON at the end of a session.  REGISTRY is the process wide
+default.
+"""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+import json
+import threading
+
+from controller import strategy
+
+
+class Histogram(object):
+  """Histogram with exponentially growing buckets.
+
+  Bucket i counts the observations in (base * 2 ** (i - 1), base * 2 ** i];
+  bucket 0 counts everything up to base and the last bucket is unbounded.
+  """
+
+  BASE = 1e-6
+  NUM_BUCKETS = 32
+
+  def __init__(self, base=BASE):
+    """Initializes the histogram.
+
+    Args:
+      base: The upper bound of the first bucket.  The default suits
+          latencies in seconds.
+    """
+
+    self.base = base
+    self.buckets = [0] * Histogram.NUM_BUCKETS
+    self.count = 0
+    self.total = 0.0
+    self.min = None
+    self.max = None
+
+  def UpperBound(self, index):
+    """Returns the inclusive upper bound of a bucket, None if unbounded."""
+
+    if index >= Histogram.NUM_BUCKETS - 1:
+      return None
+    return self.base * (1 << index)
+
+  def Observe(self, value):
+    """Records a value."""
+
+    index = 0
+    bound = self.base
+    while value > bound and index < Histogram.NUM_BUCKETS - 1:
+      index += 1
+      bound *= 2
+    self.buckets[index] += 1
+    self.count += 1
+    self.total += value
+    if self.min is None or value < self.min:
+      self.min = value
+    if self.max is None or value > self.max:
+      self.max = value
+
+  def Percentile(self, percent):
+    """Estimates a percentile from the buckets.
+
+    Args:
+      percent: A number between 0 and 100.
+
+    Returns:
+      The upper bound of the bucket holding the percentile, clamped to the
+      observed maximum.  None if nothing was observed.
+    """
+
+    if not self.count:
+      return None
+    rank = max(1, int(round(self.count * percent / 100.0)))
+    seen = 0
+    for index, count in enumerate(self.buckets):
+      seen += count
+      if seen >= rank:
+        bound = self.UpperBound(index)
+        if bound is None:
+          return self.max
+        return min(bound, self.max)
+    return self.max
+
+  def ToDict(self):
+    """Returns a JSON serializable summary of the histogram."""
+
+    return {"count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.Percentile(50),
+            "p90": self.Percentile(90),
+            "p99": self.Percentile(99),
+            "buckets": [[self.UpperBound(index), count]
+                        for index, count in enumerate(self.buckets) if count]}
+
+
+class Registry(object):
+  """Thread safe collection of named counters, gauges and histograms."""
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._counters = {}
+    self._gauges = {}
+    self._histograms = {}
+
+  def Increment(self, name, amount=1):
+    """Adds amount to the named counter."""
+
+    with self._lock:
+      self._counters[name] = self._counters.get(name, 0) + amount
+
+  def SetGauge(self, name, value):
+    """Sets the named gauge to value."""
+
+    with self._lock:
+      self._gauges[name] = value
+
+  def Observe(self, name, value, base=Histogram.BASE):
+    """Records value in the named histogram.
+
+    Args:
+      name: The name of the histogram.
+      value: The value to record.
+      base: The upper bound of the first bucket, used when the histogram is
+          created by this call.
+    """
+
+    with self._lock:
+      histogram = self._histograms.get(name)
+      if histogram is None:
+        histogram = self._histograms[name] = Histogram(base)
+      histogram.Observe(value)
+
+  def GetCounter(self, name):
+    """Returns the value of the named counter, 0 if never incremented."""
+
+    with self._lock:
+      return self._counters.get(name, 0)
+
+  def GetGauge(self, name):
+    """Returns the value of the named gauge, None if never set."""
+
+    with self._lock:
+      return self._gauges.get(name)
+
+  def GetHistogram(self, name):
+    """Returns the named Histogram, None if nothing was observed."""
+
+    with self._lock:
+      return self._histograms.get(name)
+
+  def RecordMove(self, move_strategy, dimension, seconds, nodes=0,
+                 playouts=0):
+    """Records a computed move.
+
+    Args:
+      move_strategy: The strategy.Strategy that computed the move.
+      dimension: The dimension of the board.
+      seconds: The time taken to compute the move.
+      nodes: The number of search nodes visited, if the strategy searches.
+      playouts: The number of playouts run, if the strategy plays out games.
+    """
+
+    label = "%s.%d" % (strategy.Strategy.ToString(move_strategy), dimension)
+    self.Observe("move_latency." + label, seconds)
+    self.Increment("moves." + label)
+    if nodes:
+      self.Increment("nodes." + label, nodes)
+    if playouts:
+      self.Increment("playouts." + label, playouts)
+
+  def RecordCache(self, name, cache):
+    """Copies the statistics of a cache into gauges.
+
+    Args:
+      name: The prefix of the gauges.
+      cache: An object with hits and misses attributes and a HitRate method.
+    """
+
+    self.SetGauge(name + ".hits", cache.hits)
+    self.SetGauge(name + ".misses", cache.misses)
+    self.SetGauge(name + ".hit_rate", cache.HitRate())
+
+  def Snapshot(self):
+    """Returns a JSON serializable dictionary of every metric."""
+
+    with self._lock:
+      return {"counters": dict(self._counters),
+              "gauges": dict(self._gauges),
+              "histograms": dict((name, histogram.ToDict()) for name, histogram
+                                 in self._histograms.iteritems())}
+
+  def DumpJson(self, stream):
+    """Writes the Snapshot to a stream as JSON."""
+
+    json.dump(self.Snapshot(), stream, indent=2, sort_keys=True)
+    stream.write("\n")
+
+  def Reset(self):
+    """Removes every metric."""
+
+    with self._lock:
+      self._counters.clear()
+      self._gauges.clear()
+      self._histograms.clear()
+
+
+REGISTRY = Registry()
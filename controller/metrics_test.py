@@ -0,0 +1,83 @@
+"""Tests that correspond to metrics."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+import json
+import StringIO
+import unittest
+
+from controller import metrics
+from controller import move_cache
+from controller import strategy
+
+
+class HistogramTest(unittest.TestCase):
+  """Class that tests the Histogram object."""
+
+  def testObserve(self):
+    histogram = metrics.Histogram()
+    self.assertIsNone(histogram.Percentile(50))
+    for value in (0.5e-6, 3e-6, 3e-6, 1.0):
+      histogram.Observe(value)
+    self.assertEqual(4, histogram.count)
+    self.assertEqual(0.5e-6, histogram.min)
+    self.assertEqual(1.0, histogram.max)
+    self.assertEqual(1, histogram.buckets[0])
+    self.assertEqual(2, histogram.buckets[2])
+    self.assertEqual(4e-6, histogram.Percentile(50))
+    self.assertEqual(1.0, histogram.Percentile(99))
+
+  def testBase(self):
+    histogram = metrics.Histogram(base=1)
+    for value in (1, 2, 3, 3, 9):
+      histogram.Observe(value)
+    self.assertEqual([1, 1, 2, 0, 1], histogram.buckets[:5])
+    self.assertEqual(4, histogram.Percentile(50))
+    self.assertEqual(9, histogram.Percentile(99))
+
+  def testUnboundedBucket(self):
+    histogram = metrics.Histogram()
+    histogram.Observe(1e9)
+    self.assertEqual(1, histogram.buckets[-1])
+    self.assertEqual(1e9, histogram.Percentile(50))
+
+
+class RegistryTest(unittest.TestCase):
+  """Class that tests the Registry object."""
+
+  def testCountersAndGauges(self):
+    registry = metrics.Registry()
+    self.assertEqual(0, registry.GetCounter("calls"))
+    registry.Increment("calls")
+    registry.Increment("calls", 2)
+    self.assertEqual(3, registry.GetCounter("calls"))
+    registry.SetGauge("size", 5)
+    self.assertEqual(5, registry.GetGauge("size"))
+    registry.Reset()
+    self.assertEqual(0, registry.GetCounter("calls"))
+    self.assertIsNone(registry.GetGauge("size"))
+
+  def testRecordMove(self):
+    registry = metrics.Registry()
+    registry.RecordMove(strategy.Strategy.HEURISTICS, 3, 0.01, nodes=9)
+    registry.RecordMove(strategy.Strategy.HEURISTICS, 3, 0.02, nodes=7)
+    self.assertEqual(2, registry.GetCounter("moves.heuristics.3"))
+    self.assertEqual(16, registry.GetCounter("nodes.heuristics.3"))
+    self.assertEqual(0, registry.GetCounter("playouts.heuristics.3"))
+    self.assertEqual(
+        2, registry.GetHistogram("move_latency.heuristics.3").count)
+
+  def testDumpJson(self):
+    registry = metrics.Registry()
+    registry.RecordMove(strategy.Strategy.RANDOM, 4, 0.001)
+    registry.RecordCache("move_cache", move_cache.MoveCache())
+    stream = StringIO.StringIO()
+    registry.DumpJson(stream)
+    snapshot = json.loads(stream.getvalue())
+    self.assertEqual(1, snapshot["counters"]["moves.random.4"])
+    self.assertEqual(0.0, snapshot["gauges"]["move_cache.hit_rate"])
+    self.assertEqual(1, snapshot["histograms"]["move_latency.random.4"]["count"])
+
+
+if __name__ == '__main__':
+  unittest.main()
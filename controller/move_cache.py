@@ -0,0 +1,121 @@
+"""Bounded LRU cache in front of strategy.GetNextMove.
+
+The same early positions come up in almost every game, so a single MoveCache
+is meant to be shared by every game played in a process.
+"""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+import collections
+
+from controller import strategy
+from model import symmetry
+
+
+DEFAULT_CAPACITY = 65536
+
+
+class MoveCache(object):
+  """Least recently used cache of computed moves.
+
+  Entries are keyed by the position, the side to move and the strategy.
+  Strategy.RANDOM moves are never cached.
+  """
+
+  def __init__(self, capacity=DEFAULT_CAPACITY, use_symmetry=False):
+    """Initializes the cache.
+
+    Args:
+      capacity: The maximum number of positions held before the least
+          recently used one is evicted.
+      use_symmetry: If True, positions are keyed by their canonical form
+          under the 8 board symmetries, so that symmetric positions share an
+          entry.  The heuristics are not symmetric when breaking ties, so a
+          symmetric hit may return a different (equally scored) move than a
+          fresh computation would.
+    """
+
+    if capacity < 1:
+      raise ValueError("Capacity must be greater than 0.")
+
+    self.capacity = capacity
+    self.use_symmetry = use_symmetry
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self._entries = collections.OrderedDict()
+
+  def __len__(self):
+    return len(self._entries)
+
+  def GetNextMove(self, play_board, board_value,
+                  move_strategy=strategy.Strategy.HEURISTICS, context=None):
+    """Cached equivalent of strategy.GetNextMove.
+
+    Args:
+      play_board: The board.Board being played.
+      board_value: The board.BoardValue representing the user.
+      move_strategy: The strategy.Strategy to use to generate the next move.
+      context: An optional search_context.SearchContext used on misses.
+
+    Returns:
+      An absolute position for the next move that should be made.
+
+    Raises:
+      strategy.StrategyError if no move can be made.
+    """
+
+    if move_strategy == strategy.Strategy.RANDOM:
+      return strategy.GetNextMove(play_board, board_value, move_strategy)
+
+    text = play_board.ToPositionString()
+    permutation = None
+    if self.use_symmetry:
+      text, permutation = symmetry.Canonicalize(text, play_board.dimension)
+    key = (text, board_value, move_strategy)
+
+    entries = self._entries
+    move = entries.pop(key, None)
+    if move is not None:
+      self.hits += 1
+    else:
+      self.misses += 1
+      move = strategy.GetNextMove(play_board, board_value, move_strategy,
+                                  context=context)
+      if permutation is not None:
+        move = symmetry.Invert(permutation)[move]
+      if len(entries) >= self.capacity:
+        entries.popitem(last=False)
+        self.evictions += 1
+    entries[key] = move
+
+    if permutation is not None:
+      return permutation[move]
+    return move
+
+  def HitRate(self):
+    """Returns the fraction of lookups that were hits, 0.0 if none."""
+
+    lookups = self.hits + self.misses
+    if not lookups:
+      return 0.0
+    return float(self.hits) / lookups
+
+  def GetStats(self):
+    """Returns a dictionary of the cache statistics."""
+
+    return {"capacity": self.capacity,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.HitRate()}
+
+  def Clear(self):
+    """Removes every entry and resets the statistics."""
+
+    self._entries.clear()
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
@@ -0,0 +1,71 @@
+"""Tests that correspond to move_cache."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+import unittest
+
+from controller import move_cache
+from controller import strategy
+from model import board
+
+
+class MoveCacheTest(unittest.TestCase):
+  """Class that tests the MoveCache object."""
+
+  def testHitsAndMisses(self):
+    cache = move_cache.MoveCache(capacity=4)
+    play_board = board.Board.FromPositionString("XX..O....")
+    self.assertEqual(2, cache.GetNextMove(play_board, board.BoardValue.O))
+    self.assertEqual(2, cache.GetNextMove(play_board, board.BoardValue.O))
+    self.assertEqual(1, cache.hits)
+    self.assertEqual(1, cache.misses)
+    self.assertEqual(0.5, cache.HitRate())
+
+    # The side to move is part of the key.
+    cache.GetNextMove(play_board, board.BoardValue.X)
+    self.assertEqual(2, cache.misses)
+    self.assertEqual(2, len(cache))
+
+  def testEviction(self):
+    cache = move_cache.MoveCache(capacity=2)
+    boards = [board.Board.FromPositionString(text)
+              for text in ("X........", ".X.......", "..X......")]
+    cache.GetNextMove(boards[0], board.BoardValue.O)
+    cache.GetNextMove(boards[1], board.BoardValue.O)
+    cache.GetNextMove(boards[0], board.BoardValue.O)  # Refresh the first.
+    cache.GetNextMove(boards[2], board.BoardValue.O)  # Evicts the second.
+    self.assertEqual(1, cache.evictions)
+    cache.GetNextMove(boards[0], board.BoardValue.O)
+    self.assertEqual(2, cache.hits)
+    cache.GetNextMove(boards[1], board.BoardValue.O)
+    self.assertEqual(4, cache.misses)
+
+  def testRandomIsNotCached(self):
+    cache = move_cache.MoveCache()
+    play_board = board.Board(3)
+    cache.GetNextMove(play_board, board.BoardValue.X,
+                      strategy.Strategy.RANDOM)
+    self.assertEqual(0, len(cache))
+    self.assertEqual(0, cache.misses)
+
+  def testSymmetry(self):
+    cache = move_cache.MoveCache(use_symmetry=True)
+    play_board = board.Board.FromPositionString("XX..O....")
+    self.assertEqual(2, cache.GetNextMove(play_board, board.BoardValue.O))
+    # The same threat reflected onto the left column.
+    play_board = board.Board.FromPositionString("X..XO....")
+    self.assertEqual(6, cache.GetNextMove(play_board, board.BoardValue.O))
+    self.assertEqual(1, cache.hits)
+
+  def testClear(self):
+    cache = move_cache.MoveCache()
+    cache.GetNextMove(board.Board(3), board.BoardValue.X)
+    cache.Clear()
+    self.assertEqual(0, len(cache))
+    self.assertEqual({"capacity": move_cache.DEFAULT_CAPACITY, "size": 0,
+                      "hits": 0, "misses": 0, "evictions": 0,
+                      "hit_rate": 0.0}, cache.GetStats())
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,243 @@
+"""Local move service that coalesces concurrent requests into batches.
+
+Clients connect over localhost TCP or a Unix socket and send one request per
+line, in the input format of the analyze module; each request is answered
+with the corresponding analyze output line.  The line "stats" is answered
+with the service statistics as a single line of JSON.
+
+Requests are not evaluated by the connection threads.  A single batcher
+thread collects the requests arriving within a short window, up to a maximum
+batch size, evaluates every distinct position of the batch once, either in
+process or with one pass over a process pool, and then releases the waiting
+connections.  Latencies and batch sizes are recorded in a metrics.Registry.
+"""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+import functools
+import json
+import multiprocessing
+import os
+import Queue
+import SocketServer
+import threading
+import time
+
+from controller import analyze
+from controller import metrics
+from controller import strategy
+
+
+DEFAULT_WINDOW = 0.002
+DEFAULT_MAX_BATCH = 256
+
+STATS_REQUEST = "stats"
+
+
+class _Request(object):
+  """A request waiting for the batcher."""
+
+  __slots__ = ("line", "start", "result", "done")
+
+  def __init__(self, line):
+    self.line = line
+    self.start = time.time()
+    self.result = None
+    self.done = threading.Event()
+
+
+class _Handler(SocketServer.StreamRequestHandler):
+  """Answers the requests of one connection in order."""
+
+  def handle(self):
+    service = self.server.service
+    for line in iter(self.rfile.readline, ""):
+      line = line.strip()
+      if line == STATS_REQUEST:
+        response = json.dumps(service.GetStats(), sort_keys=True)
+      else:
+        response = service.Submit(line)
+      self.wfile.write(response + "\n")
+      self.wfile.flush()
+
+
+class _TcpServer(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+  daemon_threads = True
+  allow_reuse_address = True
+
+
+class _UnixServer(SocketServer.ThreadingMixIn,
+                  SocketServer.UnixStreamServer):
+  daemon_threads = True
+
+
+class MoveService(object):
+  """Move server with a request coalescing batcher."""
+
+  def __init__(self, address=("127.0.0.1", 0),
+               move_strategy=strategy.Strategy.HEURISTICS,
+               window=DEFAULT_WINDOW, max_batch=DEFAULT_MAX_BATCH,
+               processes=0, registry=None):
+    """Initializes and binds the service.  Call Start to serve.
+
+    Args:
+      address: A (host, port) tuple to listen on localhost TCP, or a path to
+          listen on a Unix socket.  Port 0 picks a free port.
+      move_strategy: The strategy.Strategy used to pick the moves.
+      window: The seconds the batcher waits for more requests after the
+          first request of a batch arrives.
+      max_batch: The number of requests after which a batch is evaluated
+          without waiting for the window to end.
+      processes: The number of worker processes each batch is spread over,
+          0 to evaluate in the batcher thread.
+      registry: The metrics.Registry the statistics are recorded in.
+          Defaults to metrics.REGISTRY.
+    """
+
+    self.move_strategy = move_strategy
+    self.window = window
+    self.max_batch = max_batch
+    self.processes = processes
+    self.registry = metrics.REGISTRY if registry is None else registry
+
+    if isinstance(address, basestring):
+      self._server = _UnixServer(address, _Handler)
+    else:
+      self._server = _TcpServer(address, _Handler)
+    self._server.service = self
+    self.address = self._server.server_address
+
+    self._queue = Queue.Queue()
+    self._pool = None
+    self._threads = []
+
+  def Start(self):
+    """Starts the batcher and the server in background threads."""
+
+    if self.processes:
+      self._pool = multiprocessing.Pool(self.processes)
+    for target in (self._RunBatcher, self._server.serve_forever):
+      thread = threading.Thread(target=target)
+      thread.daemon = True
+      thread.start()
+      self._threads.append(thread)
+
+  def Stop(self):
+    """Stops serving and waits for the background threads.
+
+    The socket file of a Unix socket address is removed.
+    """
+
+    if self._threads:
+      self._server.shutdown()
+      self._queue.put(None)
+      for thread in self._threads:
+        thread.join()
+      self._threads = []
+    self._server.server_close()
+    if isinstance(self.address, basestring) and os.path.exists(self.address):
+      os.unlink(self.address)
+    if self._pool is not None:
+      self._pool.terminate()
+      self._pool.join()
+      self._pool = None
+
+  def Submit(self, line):
+    """Queues a request and blocks until its batch has been evaluated.
+
+    Args:
+      line: An input line as described in the analyze module.
+
+    Returns:
+      The output line without a trailing newline.
+    """
+
+    request = _Request(line)
+    self._queue.put(request)
+    request.done.wait()
+    return request.result
+
+  def _RunBatcher(self):
+    """Collects requests into batches until None is queued."""
+
+    while 1:
+      request = self._queue.get()
+      if request is None:
+        return
+      batch = [request]
+      deadline = time.time() + self.window
+      while len(batch) < self.max_batch:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+          break
+        try:
+          request = self._queue.get(timeout=remaining)
+        except Queue.Empty:
+          break
+        if request is None:
+          # Answer the batch before stopping.
+          self._queue.put(None)
+          break
+        batch.append(request)
+      try:
+        self._EvaluateBatch(batch)
+      except Exception as ex:
+        # Answer the batch rather than leave its connections blocked.
+        self._FailBatch(batch, ex)
+
+  def _EvaluateBatch(self, batch):
+    """Evaluates every distinct line of a batch once and answers them all."""
+
+    lines = list(set(request.line for request in batch))
+    if self._pool is None:
+      results = [analyze.AnalyzeLine(line, self.move_strategy)
+                 for line in lines]
+    else:
+      chunk_size = -(-len(lines) // self.processes)
+      results = self._pool.map(
+          functools.partial(analyze.AnalyzeLine,
+                            move_strategy=self.move_strategy),
+          lines, chunk_size)
+    by_line = dict(zip(lines, results))
+
+    end = time.time()
+    for request in batch:
+      self.registry.Observe("service.latency", end - request.start)
+    self.registry.Observe("service.batch_size", len(batch), base=1)
+    self.registry.Increment("service.requests", len(batch))
+    self.registry.Increment("service.evaluations", len(lines))
+    self.registry.Increment("service.batches")
+    for request in batch:
+      request.result = by_line[request.line]
+      request.done.set()
+
+  def _FailBatch(self, batch, ex):
+    """Answers the requests of a batch that could not be evaluated."""
+
+    self.registry.Increment("service.errors")
+    for request in batch:
+      if request.done.is_set():
+        continue
+      fields = request.line.split()
+      request.result = "%s error %s" % (fields[0] if fields else "", ex)
+      request.done.set()
+
+  def GetStats(self):
+    """Returns a dictionary of the request, latency and batch statistics.
+
+    Latencies are in seconds and include the time spent waiting for the
+    batch to fill.  Percentiles are estimated as in metrics.Histogram.
+    """
+
+    stats = {}
+    for name in ("requests", "evaluations", "batches", "errors"):
+      stats[name] = self.registry.GetCounter("service." + name)
+    for name in ("latency", "batch_size"):
+      histogram = self.registry.GetHistogram("service." + name)
+      if histogram is None:
+        histogram = metrics.Histogram()
+      stats[name + "_p50"] = histogram.Percentile(50)
+      stats[name + "_p99"] = histogram.Percentile(99)
+      stats[name + "_max"] = histogram.max
+    return stats
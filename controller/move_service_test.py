@@ -0,0 +1,114 @@
+"""Tests that correspond to move_service."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+from controller import metrics
+from controller import move_service
+
+
+def _Ask(address, lines):
+  """Sends lines to the service over one connection and returns the answers."""
+
+  family = socket.AF_UNIX if isinstance(address, basestring) else (
+      socket.AF_INET)
+  client = socket.socket(family, socket.SOCK_STREAM)
+  client.connect(address)
+  try:
+    stream = client.makefile("r+")
+    answers = []
+    for line in lines:
+      stream.write(line + "\n")
+      stream.flush()
+      answers.append(stream.readline().rstrip("\n"))
+    stream.close()
+    return answers
+  finally:
+    client.close()
+
+
+class MoveServiceTest(unittest.TestCase):
+  """Class that tests MoveService functions."""
+
+  def setUp(self):
+    self.registry = metrics.Registry()
+
+  def _Serve(self, **kwargs):
+    service = move_service.MoveService(registry=self.registry, **kwargs)
+    service.Start()
+    self.addCleanup(service.Stop)
+    return service
+
+  def testAnswers(self):
+    service = self._Serve()
+    self.assertEqual(["XX..O.... O 2", "", "OO..X...X X 2"],
+                     _Ask(service.address,
+                          ["XX..O....", "", "OO..X...X"]))
+    self.assertTrue(_Ask(service.address, ["bad"])[0].startswith("bad error"))
+
+    stats = json.loads(_Ask(service.address, ["stats"])[0])
+    self.assertEqual(4, stats["requests"])
+    self.assertEqual(4, stats["batches"])
+    self.assertEqual(1, stats["batch_size_max"])
+    self.assertTrue(stats["latency_p50"] <= stats["latency_p99"])
+
+  def testCoalescesConcurrentRequests(self):
+    service = self._Serve(window=0.2, max_batch=8)
+    answers = []
+
+    def Client():
+      answers.extend(_Ask(service.address, ["XX..O...."]))
+
+    clients = [threading.Thread(target=Client) for _ in xrange(8)]
+    for client in clients:
+      client.start()
+    for client in clients:
+      client.join()
+
+    self.assertEqual(["XX..O.... O 2"] * 8, answers)
+    stats = service.GetStats()
+    self.assertEqual(8, stats["requests"])
+    self.assertTrue(stats["batches"] < 8)
+    # Identical positions within a batch are evaluated once.
+    self.assertEqual(stats["batches"], stats["evaluations"])
+
+  def testUnixSocketWithPool(self):
+    directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, directory)
+    path = os.path.join(directory, "service.sock")
+    service = self._Serve(address=path, processes=2)
+    self.assertEqual(["XX..O.... O 2", "OO..X...X X 2"],
+                     _Ask(path, ["XX..O....", "OO..X...X"]))
+    service.Stop()
+    self.assertFalse(os.path.exists(path))
+
+  def testFailedBatchIsAnswered(self):
+    service = self._Serve()
+
+    def Fail(line, move_strategy):
+      raise RuntimeError("broken")
+
+    original = move_service.analyze.AnalyzeLine
+    move_service.analyze.AnalyzeLine = Fail
+    self.addCleanup(setattr, move_service.analyze, "AnalyzeLine", original)
+    self.assertEqual(["XX..O.... error broken"],
+                     _Ask(service.address, ["XX..O...."]))
+    move_service.analyze.AnalyzeLine = original
+    # The batcher survives the failure.
+    self.assertEqual(["XX..O.... O 2"], _Ask(service.address, ["XX..O...."]))
+    self.assertEqual(1, service.GetStats()["errors"])
+
+  def testStopWithoutStart(self):
+    service = move_service.MoveService(registry=self.registry)
+    service.Stop()
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,191 @@
+"""Precomputed opening moves, stored in a memory mapped file.
+
+A book maps positions with few plays to the move strategy.GetNextMove picks
+for them.  Positions are canonicalized under the symmetries of the board, so
+one record serves all 8 symmetric positions, and are keyed by the Zobrist
+hash of the canonical position string mixed with the side to move.
+
+The file is a header followed by fixed size records sorted by key and
+dimension (the empty board hashes to the same key in every dimension):
+
+  header: magic "TTTB", format version, maximum ply, record count
+  record: 64 bit key, 16 bit dimension, 32 bit move in the canonical position
+
+Records are looked up with a binary search directly in the mmap, so loading
+a book costs nothing until it is used.  Books are built by book_builder.
+"""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+import mmap
+import struct
+
+from model import symmetry
+from model import zobrist
+
+
+MAGIC = "TTTB"
+VERSION = 2
+
+_HEADER = struct.Struct("<4sHHI")
+# Version 1 stored the dimension in a byte and the move in 16 bits, which
+# does not fit boards above 255x255.
+_RECORD = struct.Struct("<QHI")
+
+# The books consulted by Lookup, in load order.
+_books = []
+
+
+class InvalidBookError(Exception):
+  """Thrown when a book file is malformed."""
+
+
+def MakeKey(canonical_text, dimension, board_value):
+  """Returns the key of a canonical position string.
+
+  Args:
+    canonical_text: A position string as returned by symmetry.Canonicalize.
+    dimension: The dimension of the board.
+    board_value: The board.BoardValue of the side to move.
+  """
+
+  return (zobrist.HashText(canonical_text, dimension)
+          ^ zobrist.SIDE_KEYS[board_value])
+
+
+def Write(path, records, max_ply):
+  """Writes a book file.
+
+  Args:
+    path: The path of the file.
+    records: An iterable of (key, dimension, canonical move) tuples.
+        Duplicate keys of a dimension keep the last record.
+    max_ply: The number of plays below which every position of the book was
+        generated.
+  """
+
+  entries = {}
+  for key, dimension, move in records:
+    entries[(key, dimension)] = move
+  with open(path, "wb") as stream:
+    stream.write(_HEADER.pack(MAGIC, VERSION, max_ply, len(entries)))
+    for key, dimension in sorted(entries):
+      stream.write(_RECORD.pack(key, dimension, entries[(key, dimension)]))
+
+
+class OpeningBook(object):
+  """Read only view of a book file."""
+
+  def __init__(self, path):
+    """Maps a book file.
+
+    Args:
+      path: The path of the file.
+
+    Raises:
+      InvalidBookError if the file is not a book.
+    """
+
+    self.path = path
+    with open(path, "rb") as stream:
+      header = stream.read(_HEADER.size)
+      if len(header) < _HEADER.size:
+        raise InvalidBookError("Truncated book: %s" % path)
+      magic, version, self.max_ply, self.count = _HEADER.unpack(header)
+      if magic != MAGIC or version != VERSION:
+        raise InvalidBookError("Not a version %d book: %s" % (VERSION, path))
+      size = _HEADER.size + self.count * _RECORD.size
+      stream.seek(0, 2)
+      if stream.tell() != size:
+        raise InvalidBookError("Truncated book: %s" % path)
+      self._memory = mmap.mmap(stream.fileno(), size,
+                               access=mmap.ACCESS_READ)
+
+  def __len__(self):
+    return self.count
+
+  def _Find(self, key, dimension):
+    """Returns the canonical move of a key, -1 if absent."""
+
+    target = (key, dimension)
+    low = 0
+    high = self.count
+    while low < high:
+      middle = (low + high) // 2
+      offset = _HEADER.size + middle * _RECORD.size
+      record = _RECORD.unpack_from(self._memory, offset)
+      if record[:2] < target:
+        low = middle + 1
+      elif record[:2] > target:
+        high = middle
+      else:
+        return record[2]
+    return -1
+
+  def Lookup(self, play_board, board_value):
+    """Finds the book move of a position.
+
+    Args:
+      play_board: The board.Board being played.
+      board_value: The board.BoardValue of the side to move.
+
+    Returns:
+      An absolute position, -1 if the position is not in the book.
+    """
+
+    dimension = play_board.dimension
+    if dimension * dimension - play_board.CountEmpty() >= self.max_ply:
+      return -1
+    canonical, permutation = symmetry.Canonicalize(
+        play_board.ToPositionString(), dimension)
+    move = self._Find(MakeKey(canonical, dimension, board_value), dimension)
+    if move < 0:
+      return -1
+    return permutation[move]
+
+  def Close(self):
+    """Unmaps the file."""
+
+    self._memory.close()
+
+
+def Load(path):
+  """Maps a book file and adds it to the books consulted by Lookup.
+
+  Returns:
+    The OpeningBook.
+
+  Raises:
+    InvalidBookError if the file is not a book.
+    IOError if the file cannot be read.
+  """
+
+  book = OpeningBook(path)
+  _books.append(book)
+  return book
+
+
+def Unload():
+  """Closes and forgets every loaded book."""
+
+  while _books:
+    _books.pop().Close()
+
+
+def Lookup(play_board, board_value):
+  """Finds the move of a position in the loaded books.
+
+  Args:
+    play_board: The board.Board being played.
+    board_value: The board.BoardValue of the side to move.
+
+  Returns:
+    An absolute position, -1 if no loaded book has the position.
+  """
+
+  for book in _books:
+    position = book.Lookup(play_board, board_value)
+    if position >= 0 and play_board.IsValidMoveFromPosition(position):
+      return position
+  return -1
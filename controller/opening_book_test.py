@@ -0,0 +1,100 @@
+"""Tests that correspond to opening_book and book_builder."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+from controller import book_builder
+from controller import opening_book
+from controller import strategy
+from model import board
+from model import symmetry
+
+
+class OpeningBookTest(unittest.TestCase):
+  """Class that tests opening book functions."""
+
+  def setUp(self):
+    directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, directory)
+    self.path = os.path.join(directory, "book.bin")
+    self.addCleanup(opening_book.Unload)
+
+  def testBuildRecords(self):
+    records = book_builder.BuildRecords(5, 2)
+    # The empty board for X, and for O the 6 distinct first moves of X.
+    self.assertEqual(1 + 6, len(records))
+    empty_key = opening_book.MakeKey("." * 25, 5, board.BoardValue.X)
+    self.assertIn((empty_key, 5, strategy.GetNextMove(
+        board.Board(5), board.BoardValue.X)), records)
+
+  def testLookupMatchesLiveMoves(self):
+    count = book_builder.Build(self.path, [4, 7], depth=3, processes=0)
+    book = opening_book.OpeningBook(self.path)
+    self.addCleanup(book.Close)
+    self.assertEqual(count, len(book))
+    self.assertEqual(3, book.max_ply)
+
+    for dimension in (4, 7):
+      for position in xrange(dimension * dimension):
+        play_board = board.Board(dimension)
+        play_board.SetPosition(position, board.BoardValue.X)
+        canonical, permutation = symmetry.Canonicalize(
+            play_board.ToPositionString(), dimension)
+        expected = strategy.GetNextMove(
+            board.Board.FromPositionString(canonical), board.BoardValue.O)
+        self.assertEqual(permutation[expected],
+                         book.Lookup(play_board, board.BoardValue.O))
+        # Positions outside of the book miss.
+        self.assertEqual(-1, book.Lookup(play_board, board.BoardValue.X))
+
+    deep_board = board.Board.FromPositionString("XO.X" + "." * 45)
+    self.assertEqual(-1, book.Lookup(deep_board, board.BoardValue.O))
+    self.assertEqual(-1, book.Lookup(board.Board(5), board.BoardValue.X))
+
+  def testGetNextMoveConsultsBook(self):
+    # A book that always answers the corner, which heuristics never would.
+    key = opening_book.MakeKey("." * 49, 7, board.BoardValue.X)
+    opening_book.Write(self.path, [(key, 7, 0)], 1)
+    empty_board = board.Board(7)
+    self.assertNotEqual(0, strategy.GetNextMove(empty_board,
+                                                board.BoardValue.X))
+    opening_book.Load(self.path)
+    self.assertEqual(0, strategy.GetNextMove(empty_board, board.BoardValue.X))
+    opening_book.Unload()
+    self.assertNotEqual(0, strategy.GetNextMove(empty_board,
+                                                board.BoardValue.X))
+
+  def testLargeDimension(self):
+    key = opening_book.MakeKey("." * 300 * 300, 300, board.BoardValue.X)
+    opening_book.Write(self.path, [(key, 300, 300 * 300 - 1)], 1)
+    book = opening_book.OpeningBook(self.path)
+    self.addCleanup(book.Close)
+    self.assertEqual(300 * 300 - 1, book._Find(key, 300))
+    self.assertEqual(-1, book._Find(key, 44))
+
+  def testInvalidBook(self):
+    with open(self.path, "wb") as stream:
+      stream.write("not a book")
+    self.assertRaises(opening_book.InvalidBookError, opening_book.Load,
+                      self.path)
+    # A book of an older format version.
+    opening_book.Write(self.path, [], 2)
+    with open(self.path, "r+b") as stream:
+      stream.seek(4)
+      stream.write(struct.pack("<H", opening_book.VERSION - 1))
+    self.assertRaises(opening_book.InvalidBookError, opening_book.Load,
+                      self.path)
+    opening_book.Write(self.path, [(1, 3, 4)], 2)
+    with open(self.path, "ab") as stream:
+      stream.write("\0")
+    self.assertRaises(opening_book.InvalidBookError, opening_book.Load,
+                      self.path)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,150 @@
+"""Pondering: computing replies while the opponent is thinking.
+
+While the user chooses a move, a background thread computes the reply to
+each move the user could make, starting with the move the engine itself
+would make in the user's place.  When the real move arrives its reply is
+usually ready and is returned without any search.
+"""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+import threading
+
+from controller import strategy
+from model import board
+
+
+class _Pondering(object):
+  """The replies computed by one pondering thread and its stop signal."""
+
+  def __init__(self):
+    self.replies = {}
+    self.stop = threading.Event()
+    # The opponent move whose reply is being computed, None between moves.
+    self.computing = None
+    # Guards replies and computing, and is notified when a reply is stored.
+    self.condition = threading.Condition()
+
+
+class Ponderer(object):
+  """Computes replies to the possible moves of the opponent in the background.
+
+  Start and Finish are called alternately from one thread.  Neither waits
+  for a pondering thread that is no longer needed: it is told to stop and
+  abandoned, and ends once the reply in progress is computed.
+  """
+
+  def __init__(self, board_value=board.BoardValue.O,
+               move_strategy=strategy.Strategy.HEURISTICS):
+    """Initializes the ponderer.
+
+    Args:
+      board_value: The board.BoardValue the engine plays.
+      move_strategy: The strategy.Strategy used to compute the replies.
+    """
+
+    self.board_value = board_value
+    self.move_strategy = move_strategy
+    self.hits = 0
+    self.misses = 0
+    self._pondering = None
+    self._thread = None
+
+  def Start(self, play_board):
+    """Starts pondering a position in which the opponent is to move.
+
+    Args:
+      play_board: The board.Board being played.  It is copied, so it may be
+          changed while pondering.
+    """
+
+    self.Stop()
+    self._pondering = _Pondering()
+    self._thread = threading.Thread(target=self._Ponder,
+                                    args=(self._pondering, play_board.Copy()))
+    self._thread.daemon = True
+    self._thread.start()
+
+  def _GetCandidates(self, play_board):
+    """Returns the opponent's moves, the most likely first."""
+
+    other = board.BoardValue.Other(self.board_value)
+    likely = strategy.GetNextMove(play_board, other,
+                                  strategy.Strategy.HEURISTICS)
+    return [likely] + [
+        position for position in xrange(play_board.dimension *
+                                         play_board.dimension)
+        if position != likely and play_board.IsValidMoveFromPosition(position)]
+
+  def _Ponder(self, pondering, play_board):
+    """Thread body that fills the replies until stopped or done."""
+
+    if pondering.stop.is_set() or play_board.IsFull():
+      return
+    other = board.BoardValue.Other(self.board_value)
+    for position in self._GetCandidates(play_board):
+      child = play_board.Copy()
+      child.SetPosition(position, other)
+      if child.IsFull() or child.IsWinner() != board.BoardValue.NONE:
+        continue
+      with pondering.condition:
+        if pondering.stop.is_set():
+          return
+        pondering.computing = position
+      reply = -1
+      try:
+        reply = strategy.GetNextMove(child, self.board_value,
+                                     self.move_strategy)
+      finally:
+        with pondering.condition:
+          if reply >= 0:
+            pondering.replies[position] = reply
+          pondering.computing = None
+          pondering.condition.notify_all()
+
+  def Wait(self):
+    """Blocks until every reply of the last position started is computed."""
+
+    if self._thread is not None:
+      self._thread.join()
+
+  def Stop(self):
+    """Stops pondering without waiting for the reply in progress."""
+
+    if self._pondering is not None:
+      self._pondering.stop.set()
+      self._pondering = None
+
+  def Finish(self, position):
+    """Stops pondering once the opponent has moved.
+
+    Only waits if the reply to position is being computed; the replies to
+    the other moves are abandoned.
+
+    Args:
+      position: The move the opponent made.
+
+    Returns:
+      The precomputed reply, -1 if it was not computed in time.
+    """
+
+    pondering = self._pondering
+    self.Stop()
+    reply = -1
+    if pondering is not None:
+      with pondering.condition:
+        while pondering.computing == position:
+          pondering.condition.wait()
+        reply = pondering.replies.get(position, -1)
+    if reply >= 0:
+      self.hits += 1
+    else:
+      self.misses += 1
+    return reply
+
+  def HitRate(self):
+    """Returns the fraction of opponent moves whose reply was ready."""
+
+    total = self.hits + self.misses
+    return float(self.hits) / total if total else 0.0
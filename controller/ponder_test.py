@@ -0,0 +1,96 @@
+"""Tests that correspond to ponder."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+import threading
+import unittest
+
+from controller import ponder
+from controller import strategy
+from model import board
+
+
+class PonderTest(unittest.TestCase):
+  """Class that tests Ponderer functions."""
+
+  def testRepliesMatchGetNextMove(self):
+    play_board = board.Board.FromPositionString("X...O....")
+    ponderer = ponder.Ponderer()
+    for position in xrange(9):
+      if not play_board.IsValidMoveFromPosition(position):
+        continue
+      child = play_board.Copy()
+      child.SetPosition(position, board.BoardValue.X)
+      ponderer.Start(play_board)
+      ponderer.Wait()
+      self.assertEqual(strategy.GetNextMove(child, board.BoardValue.O),
+                       ponderer.Finish(position))
+    self.assertEqual(7, ponderer.hits)
+    self.assertEqual(1.0, ponderer.HitRate())
+
+  def _BlockReplies(self):
+    """Makes the replies computed for O block until released.
+
+    Returns:
+      A tuple of (event that releases the replies, event set once a reply
+      is waiting).
+    """
+
+    release = threading.Event()
+    waiting = threading.Event()
+    get_next_move = strategy.GetNextMove
+
+    def GetNextMove(play_board, board_value, move_strategy):
+      if board_value == board.BoardValue.O:
+        waiting.set()
+        release.wait()
+      return get_next_move(play_board, board_value, move_strategy)
+
+    strategy.GetNextMove = GetNextMove
+    self.addCleanup(setattr, strategy, "GetNextMove", get_next_move)
+    self.addCleanup(release.set)
+    return release, waiting
+
+  def testFinishDoesNotWaitForOtherReplies(self):
+    release, waiting = self._BlockReplies()
+    ponderer = ponder.Ponderer()
+    ponderer.Start(board.Board(3))
+    waiting.wait()
+    # The reply to the likely move 4 is in progress, the one to 0 is not.
+    self.assertEqual(-1, ponderer.Finish(0))
+    self.assertEqual(1, ponderer.misses)
+    release.set()
+    ponderer.Wait()
+
+  def testFinishWaitsForReplyInProgress(self):
+    play_board = board.Board(3)
+    child = play_board.Copy()
+    child.SetPosition(4, board.BoardValue.X)
+    reply = strategy.GetNextMove(child, board.BoardValue.O)
+
+    release, waiting = self._BlockReplies()
+    ponderer = ponder.Ponderer()
+    ponderer.Start(play_board)
+    waiting.wait()
+    threading.Timer(0.05, release.set).start()
+    self.assertEqual(reply, ponderer.Finish(4))
+    self.assertEqual(1, ponderer.hits)
+
+  def testStopDiscardsReplies(self):
+    ponderer = ponder.Ponderer()
+    ponderer.Start(board.Board.FromPositionString("X...O...."))
+    ponderer.Wait()
+    ponderer.Stop()
+    self.assertEqual(-1, ponderer.Finish(1))
+
+  def testWinningAndFullPositionsAreSkipped(self):
+    play_board = board.Board.FromPositionString("XX.OO.XO.")
+    ponderer = ponder.Ponderer()
+    ponderer.Start(play_board)
+    ponderer.Wait()
+    # X wins by playing 2, so there is nothing to reply to.
+    self.assertEqual(-1, ponderer.Finish(2))
+
+
+if __name__ == '__main__':
+  unittest.main()
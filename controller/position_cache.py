@@ -0,0 +1,178 @@
+"""Position cache shared by every process that maps the same memory.
+
+The cache is a fixed size open addressing hash table in an mmap.  Every slot
+holds two 64 bit words: the position key XORed with the data, and the data
+(the best move and its score).  Readers take no locks; a slot that was torn
+by a concurrent writer fails the XOR check and is treated as a miss.  Writers
+simply overwrite, preferring an empty slot or one holding the same key within
+a short probe window and otherwise replacing the home slot.
+
+An anonymous cache is shared with the children forked after it is created, a
+file backed one (e.g. under /dev/shm) with any process that opens the file.
+"""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+import mmap
+import os
+import struct
+
+from controller import strategy
+from model import zobrist
+
+
+DEFAULT_SLOTS = 1 << 18
+PROBE_LENGTH = 4
+
+_SLOT = struct.Struct("<QQ")
+_MASK_64 = (1 << 64) - 1
+
+# Distinguishes entries computed by different strategies.
+_STRATEGY_KEYS = {strategy.Strategy.RANDOM: 0x9e3779b97f4a7c15,
+                  strategy.Strategy.HEURISTICS: 0xc2b2ae3d27d4eb4f,
+                  strategy.Strategy.LEARNED: 0x165667b19e3779f9}
+
+
+class SharedPositionCache(object):
+  """Lock free best move table shared between processes."""
+
+  def __init__(self, num_slots=DEFAULT_SLOTS, path=None):
+    """Initializes the cache.
+
+    Args:
+      num_slots: The number of entries in the table.  Rounded up to a power
+          of two.
+      path: If given, the file backing the table.  It is created and sized if
+          needed; an existing table of the same size is reused.  If None the
+          table is anonymous and shared only with forked children.
+    """
+
+    slots = 1
+    while slots < num_slots:
+      slots <<= 1
+    self.num_slots = slots
+    self.path = path
+    self.hits = 0
+    self.misses = 0
+
+    size = slots * _SLOT.size
+    if path is None:
+      self._memory = mmap.mmap(-1, size)
+    else:
+      fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+      try:
+        if os.fstat(fd).st_size != size:
+          os.ftruncate(fd, size)
+        self._memory = mmap.mmap(fd, size)
+      finally:
+        os.close(fd)
+
+  def _Slots(self, key):
+    """Yields the byte offsets of the probe window for a key."""
+
+    index = key & (self.num_slots - 1)
+    for _ in xrange(PROBE_LENGTH):
+      yield index * _SLOT.size
+      index = (index + 1) & (self.num_slots - 1)
+
+  @staticmethod
+  def MakeKey(play_board, board_value, move_strategy):
+    """Builds the table key of a position.
+
+    Args:
+      play_board: The board.Board.
+      board_value: The board.BoardValue to move.
+      move_strategy: The strategy.Strategy that computed the move.
+
+    Returns:
+      A non zero 64 bit integer.
+    """
+
+    key = (zobrist.Hash(play_board)
+           ^ zobrist.GetDimensionKey(play_board.dimension)
+           ^ zobrist.SIDE_KEYS[board_value]
+           ^ _STRATEGY_KEYS[move_strategy]) & _MASK_64
+    return key or 1
+
+  def Get(self, key):
+    """Looks a key up.
+
+    Args:
+      key: A key as returned by MakeKey.
+
+    Returns:
+      A tuple of (move, score), or None if the key is not in the table.
+    """
+
+    for offset in self._Slots(key):
+      check, data = _SLOT.unpack_from(self._memory, offset)
+      if not data:
+        break  # Entries are never removed, so the key cannot be further on.
+      if check ^ data == key:
+        self.hits += 1
+        move = (data & 0xffffffff) - 1
+        score = (data >> 32) - (1 << 31)
+        return move, score
+    self.misses += 1
+    return None
+
+  def Put(self, key, move, score=0):
+    """Stores the best move and its score for a key.
+
+    Args:
+      key: A key as returned by MakeKey.
+      move: A non negative position.
+      score: A signed 32 bit score of the move.
+    """
+
+    data = (move + 1) | ((score + (1 << 31)) << 32)
+    target = None
+    for offset in self._Slots(key):
+      check, old_data = _SLOT.unpack_from(self._memory, offset)
+      if not old_data or check ^ old_data == key:
+        target = offset
+        break
+    if target is None:
+      target = key & (self.num_slots - 1)
+      target *= _SLOT.size
+    _SLOT.pack_into(self._memory, target, key ^ data, data)
+
+  def GetNextMove(self, play_board, board_value,
+                  move_strategy=strategy.Strategy.HEURISTICS):
+    """Cached equivalent of strategy.GetNextMove.
+
+    Strategy.RANDOM moves are never cached.
+
+    Raises:
+      strategy.StrategyError if no move can be made.
+    """
+
+    if move_strategy == strategy.Strategy.RANDOM:
+      return strategy.GetNextMove(play_board, board_value, move_strategy)
+
+    key = self.MakeKey(play_board, board_value, move_strategy)
+    entry = self.Get(key)
+    if entry is not None:
+      return entry[0]
+    move = strategy.GetNextMove(play_board, board_value, move_strategy)
+    self.Put(key, move)
+    return move
+
+  def HitRate(self):
+    """Returns the fraction of lookups by this process that were hits."""
+
+    lookups = self.hits + self.misses
+    if not lookups:
+      return 0.0
+    return float(self.hits) / lookups
+
+  def Clear(self):
+    """Empties the table for every process sharing it."""
+
+    self._memory[:] = "\0" * len(self._memory)
+
+  def Close(self):
+    """Unmaps the table.  The backing file, if any, is left in place."""
+
+    self._memory.close()
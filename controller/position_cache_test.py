@@ -0,0 +1,84 @@
+"""Tests that correspond to position_cache."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+from controller import position_cache
+from controller import strategy
+from model import board
+
+
+def _PutFromChild(cache, key):
+  cache.Put(key, 7, -3)
+
+
+class SharedPositionCacheTest(unittest.TestCase):
+  """Class that tests the SharedPositionCache object."""
+
+  def testGetAndPut(self):
+    cache = position_cache.SharedPositionCache(num_slots=10)
+    self.assertEqual(16, cache.num_slots)
+    self.assertIsNone(cache.Get(12345))
+    cache.Put(12345, 0, -5)
+    self.assertEqual((0, -5), cache.Get(12345))
+    cache.Put(12345, 3, 9)
+    self.assertEqual((3, 9), cache.Get(12345))
+    self.assertEqual(2, cache.hits)
+    self.assertEqual(1, cache.misses)
+    cache.Clear()
+    self.assertIsNone(cache.Get(12345))
+    cache.Close()
+
+  def testCollidingKeys(self):
+    cache = position_cache.SharedPositionCache(num_slots=4)
+    # Every key shares the same home slot.
+    keys = [(index << 8) | 1 for index in xrange(1, 7)]
+    for move, key in enumerate(keys):
+      cache.Put(key, move)
+    # The first PROBE_LENGTH keys fill the window, the rest overwrite the home.
+    self.assertEqual((5, 0), cache.Get(keys[5]))
+    for move in xrange(1, position_cache.PROBE_LENGTH):
+      self.assertEqual((move, 0), cache.Get(keys[move]))
+    self.assertIsNone(cache.Get(keys[0]))
+    cache.Close()
+
+  def testSharedWithChild(self):
+    cache = position_cache.SharedPositionCache(num_slots=64)
+    child = multiprocessing.Process(target=_PutFromChild, args=(cache, 99))
+    child.start()
+    child.join()
+    self.assertEqual((7, -3), cache.Get(99))
+    cache.Close()
+
+  def testFileBacked(self):
+    directory = tempfile.mkdtemp()
+    try:
+      path = os.path.join(directory, "cache")
+      writer = position_cache.SharedPositionCache(num_slots=64, path=path)
+      writer.Put(42, 1)
+      reader = position_cache.SharedPositionCache(num_slots=64, path=path)
+      self.assertEqual((1, 0), reader.Get(42))
+      writer.Close()
+      reader.Close()
+    finally:
+      shutil.rmtree(directory)
+
+  def testGetNextMove(self):
+    cache = position_cache.SharedPositionCache(num_slots=64)
+    play_board = board.Board.FromPositionString("XX..O....")
+    self.assertEqual(2, cache.GetNextMove(play_board, board.BoardValue.O))
+    self.assertEqual(2, cache.GetNextMove(play_board, board.BoardValue.O))
+    self.assertEqual(1, cache.hits)
+    key = cache.MakeKey(play_board, board.BoardValue.X,
+                        strategy.Strategy.HEURISTICS)
+    self.assertIsNone(cache.Get(key))
+    cache.Close()
+
+
+if __name__ == '__main__':
+  unittest.main()
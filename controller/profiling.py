@@ -0,0 +1,331 @@
+"""Opt-in profiling of the moves and games of real runs.
+
+The game loops wrap every computed move in Move and every game in Game.
+Without a profiler set with SetProfiler these do nothing but the wrapping.
+A Profiler captures either the moves or the whole games (its scope) in one
+of two modes:
+
+  cprofile: a cProfile.Profile per label, written as pstats files.
+  sample:   a thread that records the stack of the profiled thread every
+            interval, written as collapsed stacks ("frame;frame count"
+            lines) that flame graph tools read.  Its cost does not grow
+            with the number of calls, so it suits long runs.
+
+Labels name the strategies and the dimension, e.g. "heuristics.7x7", and
+are the root frame of the collapsed stacks.  Whatever the mode, the time of
+every move is recorded and the slowest moves are reported as a timeline.
+
+Only the thread that computes a move is captured.  A reply that the game
+takes from its ponder thread (see MarkPondered) is reported under its own
+label, since its capture holds the wait for that thread rather than the
+search, which ran while the user was thinking.
+"""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+import collections
+import contextlib
+import cProfile
+import heapq
+import os
+import sys
+import thread
+import threading
+import time
+
+from controller import strategy
+
+
+class Mode(object):
+  """Defines the profiling modes."""
+
+  CPROFILE = "cprofile"
+  SAMPLE = "sample"
+  ALL_MODES = (CPROFILE, SAMPLE)
+
+
+class Scope(object):
+  """Defines what is captured."""
+
+  MOVE = "move"
+  GAME = "game"
+  ALL_SCOPES = (MOVE, GAME)
+
+
+DEFAULT_INTERVAL = 0.005
+DEFAULT_SLOWEST = 20
+
+# Names the moves of the endgame solver, which is not a strategy.Strategy,
+# in labels.
+ENDGAME = "endgame"
+
+# Appended to the label of the moves that were answered by a ponder thread.
+PONDERED_SUFFIX = ".pondered"
+
+# The profiler used by Move and Game.
+_profiler = None
+
+
+def GetLabel(dimension, *strategies):
+  """Returns the label of the moves or games of strategies on a dimension.
+
+  ENDGAME may be given in place of a strategy.Strategy.
+  """
+
+  names = []
+  for value in strategies:
+    if value == ENDGAME:
+      name = ENDGAME
+    else:
+      name = strategy.Strategy.ToString(value)
+    if name not in names:
+      names.append(name)
+  return "%s.%dx%d" % ("-".join(names), dimension, dimension)
+
+
+class Profiler(object):
+  """Collects profiles and move times, see the module docstring."""
+
+  def __init__(self, mode=Mode.CPROFILE, scope=Scope.MOVE,
+               interval=DEFAULT_INTERVAL, slowest=DEFAULT_SLOWEST):
+    """Initializes the profiler.
+
+    Args:
+      mode: The Mode of capture.
+      scope: The Scope captured.
+      interval: The seconds between two samples in the sample mode.
+      slowest: The number of slowest moves kept for the timeline.
+    """
+
+    self.mode = mode
+    self.scope = scope
+    self.interval = interval
+    self.slowest = slowest
+    self.games = 0
+    self._start = time.time()
+    self._sequence = 0
+    # Label -> cProfile.Profile.
+    self._profiles = {}
+    # Collapsed stack -> number of samples.
+    self.stacks = collections.Counter()
+    # Label -> [moves, seconds].
+    self._totals = {}
+    # Min heap of (seconds, sequence, start offset, game, ply, label).
+    self._slowest = []
+    # (thread id, label) of the capture in progress, read by the sampler.
+    self._active = None
+    # Whether the move in progress was answered by a ponder thread.
+    self._pondered = False
+    self.pondered_moves = 0
+    self._sampler = None
+    self._stop = threading.Event()
+
+  def _Sample(self):
+    """Sampler thread body."""
+
+    this_file = os.path.splitext(__file__)[0]
+    while not self._stop.is_set():
+      time.sleep(self.interval)
+      active = self._active
+      if active is None:
+        continue
+      frame = sys._current_frames().get(active[0])
+      frames = []
+      while frame is not None:
+        code = frame.f_code
+        if os.path.splitext(code.co_filename)[0] != this_file:
+          frames.append("%s:%s" % (
+              os.path.splitext(os.path.basename(code.co_filename))[0],
+              code.co_name))
+        frame = frame.f_back
+      frames.append(active[1])
+      self.stacks[";".join(reversed(frames))] += 1
+
+  @contextlib.contextmanager
+  def _Capture(self, label):
+    """Captures the profile of the enclosed code under a label."""
+
+    if self.mode == Mode.CPROFILE:
+      profile = self._profiles.get(label)
+      if profile is None:
+        profile = self._profiles[label] = cProfile.Profile()
+      profile.enable()
+      try:
+        yield
+      finally:
+        profile.disable()
+    else:
+      if self._sampler is None:
+        self._sampler = threading.Thread(target=self._Sample)
+        self._sampler.daemon = True
+        self._sampler.start()
+      self._active = (thread.get_ident(), label)
+      try:
+        yield
+      finally:
+        self._active = None
+
+  @contextlib.contextmanager
+  def Move(self, play_board, move_strategy):
+    """Times, and in the move scope captures, the computation of a move.
+
+    Args:
+      play_board: The board.Board the move is computed for.
+      move_strategy: The strategy.Strategy computing the move.
+    """
+
+    label = GetLabel(play_board.dimension, move_strategy)
+    ply = play_board.dimension * play_board.dimension - play_board.CountEmpty()
+    self._pondered = False
+    start = time.time()
+    try:
+      if self.scope == Scope.MOVE:
+        with self._Capture(label):
+          yield
+      else:
+        yield
+    finally:
+      if self._pondered:
+        self.pondered_moves += 1
+        label += PONDERED_SUFFIX
+      self._Record(label, ply, start, time.time() - start)
+
+  def MarkPondered(self):
+    """Marks the move in progress as answered by a ponder thread."""
+
+    self._pondered = True
+
+  @contextlib.contextmanager
+  def Game(self, dimension, *strategies):
+    """Counts, and in the game scope captures, a game.
+
+    Args:
+      dimension: The dimension of the board.
+      strategies: The strategy.Strategy values playing.
+    """
+
+    self.games += 1
+    if self.scope == Scope.GAME:
+      with self._Capture(GetLabel(dimension, *strategies)):
+        yield
+    else:
+      yield
+
+  def _Record(self, label, ply, start, seconds):
+    """Adds a move to the totals and the slowest moves."""
+
+    totals = self._totals.setdefault(label, [0, 0.0])
+    totals[0] += 1
+    totals[1] += seconds
+    self._sequence += 1
+    entry = (seconds, self._sequence, start - self._start, self.games, ply,
+             label)
+    if len(self._slowest) < self.slowest:
+      heapq.heappush(self._slowest, entry)
+    elif entry > self._slowest[0]:
+      heapq.heapreplace(self._slowest, entry)
+
+  def Close(self):
+    """Stops the sampler thread."""
+
+    self._stop.set()
+    if self._sampler is not None:
+      self._sampler.join()
+      self._sampler = None
+
+  def Report(self):
+    """Returns the move times per label and the slowest moves as text.
+
+    The slowest moves are listed in the order they were played, with the
+    seconds since the profiler was created.
+    """
+
+    lines = ["%-24s %7s %10s %10s" % ("label", "moves", "seconds",
+                                      "mean ms")]
+    for label in sorted(self._totals):
+      moves, seconds = self._totals[label]
+      lines.append("%-24s %7d %10.3f %10.3f" % (label, moves, seconds,
+                                                1000.0 * seconds / moves))
+    lines.append("")
+    lines.append("slowest moves")
+    lines.append("%4s %10s %10s %6s %4s  %s" % ("rank", "at s", "ms", "game",
+                                                "ply", "label"))
+    ranks = dict((entry, rank + 1) for rank, entry
+                 in enumerate(sorted(self._slowest, reverse=True)))
+    for entry in sorted(self._slowest, key=lambda entry: entry[1]):
+      seconds, _, offset, game, ply, label = entry
+      lines.append("%4d %10.3f %10.3f %6d %4d  %s" % (
+          ranks[entry], offset, 1000.0 * seconds, game, ply, label))
+    if self.pondered_moves:
+      lines.append("")
+      lines.append("*%s: answered by the ponder thread, whose search is not "
+                   "profiled." % PONDERED_SUFFIX)
+    return "\n".join(lines)
+
+  def Dump(self, prefix):
+    """Writes the profiles and the report.
+
+    Writes PREFIX.LABEL.pstats per label in the cprofile mode,
+    PREFIX.folded in the sample mode and PREFIX.txt with the Report.  The
+    directory of PREFIX is created if needed.
+
+    Returns:
+      The list of paths written.
+    """
+
+    directory = os.path.dirname(prefix)
+    if directory and not os.path.isdir(directory):
+      os.makedirs(directory)
+    paths = []
+    if self.mode == Mode.CPROFILE:
+      for label in sorted(self._profiles):
+        path = "%s.%s.pstats" % (prefix, label)
+        self._profiles[label].dump_stats(path)
+        paths.append(path)
+    else:
+      path = prefix + ".folded"
+      with open(path, "w") as stream:
+        for stack, count in sorted(self.stacks.items()):
+          stream.write("%s %d\n" % (stack, count))
+      paths.append(path)
+    path = prefix + ".txt"
+    with open(path, "w") as stream:
+      stream.write(self.Report() + "\n")
+    paths.append(path)
+    return paths
+
+
+def SetProfiler(profiler):
+  """Sets the profiler used by Move and Game, None to stop profiling."""
+
+  global _profiler
+  _profiler = profiler
+
+
+@contextlib.contextmanager
+def _NotProfiled():
+  yield
+
+
+def Move(play_board, move_strategy):
+  """Returns a context that profiles a move with the current profiler."""
+
+  if _profiler is None:
+    return _NotProfiled()
+  return _profiler.Move(play_board, move_strategy)
+
+
+def MarkPondered():
+  """Marks the move being profiled as answered by a ponder thread."""
+
+  if _profiler is not None:
+    _profiler.MarkPondered()
+
+
+def Game(dimension, *strategies):
+  """Returns a context that profiles a game with the current profiler."""
+
+  if _profiler is None:
+    return _NotProfiled()
+  return _profiler.Game(dimension, *strategies)
@@ -0,0 +1,132 @@
+"""Tests that correspond to profiling."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+import os
+import pstats
+import shutil
+import tempfile
+import unittest
+
+from controller import analyze
+from controller import profiling
+from controller import self_play
+from controller import strategy
+from controller import tablebase
+from controller import tournament
+from model import board
+
+
+class ProfilingTest(unittest.TestCase):
+  """Class that tests Profiler functions."""
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.directory)
+    self.addCleanup(profiling.SetProfiler, None)
+
+  def _Profile(self, **kwargs):
+    profiler = profiling.Profiler(**kwargs)
+    self.addCleanup(profiler.Close)
+    profiling.SetProfiler(profiler)
+    return profiler
+
+  def testNotProfiled(self):
+    with profiling.Game(3, strategy.Strategy.HEURISTICS):
+      with profiling.Move(board.Board(3), strategy.Strategy.HEURISTICS):
+        pass
+
+  def testGetLabel(self):
+    self.assertEqual("heuristics.5x5",
+                     profiling.GetLabel(5, strategy.Strategy.HEURISTICS,
+                                        strategy.Strategy.HEURISTICS))
+    self.assertEqual("random-heuristics.3x3",
+                     profiling.GetLabel(3, strategy.Strategy.RANDOM,
+                                        strategy.Strategy.HEURISTICS))
+    self.assertEqual("endgame.4x4", profiling.GetLabel(4, profiling.ENDGAME))
+
+  def testCProfileMoves(self):
+    profiler = self._Profile()
+    tournament.PlayGame(strategy.Strategy.HEURISTICS,
+                        strategy.Strategy.RANDOM, 5, 0)
+    self.assertEqual(1, profiler.games)
+
+    prefix = os.path.join(self.directory, "profiles", "run")
+    paths = profiler.Dump(prefix)
+    self.assertEqual([prefix + ".heuristics.5x5.pstats",
+                      prefix + ".random.5x5.pstats", prefix + ".txt"], paths)
+    functions = [function for _, _, function
+                 in pstats.Stats(paths[0]).stats]
+    self.assertIn("GetBestPositionBasedOnHeuristics", functions)
+    # Only the moves are captured, not the game loop.
+    self.assertNotIn("IsWinner", functions)
+
+    report = profiler.Report()
+    self.assertIn("heuristics.5x5", report)
+    self.assertIn("slowest moves", report)
+
+  def testCProfileGames(self):
+    profiler = self._Profile(scope=profiling.Scope.GAME)
+    tournament.PlayGame(strategy.Strategy.RANDOM,
+                        strategy.Strategy.HEURISTICS, 3, 0)
+    paths = profiler.Dump(os.path.join(self.directory, "run"))
+    self.assertTrue(paths[0].endswith(".random-heuristics.3x3.pstats"))
+    functions = [function for _, _, function
+                 in pstats.Stats(paths[0]).stats]
+    self.assertIn("IsWinner", functions)
+
+  def testSample(self):
+    profiler = self._Profile(mode=profiling.Mode.SAMPLE, interval=0.0005)
+    while not profiler.stacks:
+      self_play.PlayGame(strategy.Strategy.HEURISTICS,
+                         strategy.Strategy.HEURISTICS, 9, 0)
+    profiler.Close()
+    for stack in profiler.stacks:
+      frames = stack.split(";")
+      self.assertEqual("heuristics.9x9", frames[0])
+      self.assertIn("self_play:PlayGame", frames)
+
+    path = profiler.Dump(os.path.join(self.directory, "run"))[0]
+    with open(path) as stream:
+      lines = stream.read().splitlines()
+    self.assertEqual(len(profiler.stacks), len(lines))
+    for line in lines:
+      stack, count = line.rsplit(" ", 1)
+      self.assertEqual(profiler.stacks[stack], int(count))
+
+  def testHeadlessMoves(self):
+    profiler = self._Profile()
+    analyze.AnalyzeLine("X........")
+    solved = len(tablebase.SolvePartition(3, 8))
+    lines = profiler.Report().splitlines()
+    self.assertEqual(["endgame.3x3", str(solved)], lines[1].split()[:2])
+    self.assertEqual(["heuristics.3x3", "1"], lines[2].split()[:2])
+
+  def testPondered(self):
+    profiler = self._Profile()
+    for pondered in (False, True):
+      with profiling.Move(board.Board(3), strategy.Strategy.HEURISTICS):
+        if pondered:
+          profiling.MarkPondered()
+    self.assertEqual(1, profiler.pondered_moves)
+    report = profiler.Report()
+    self.assertIn("heuristics.3x3.pondered", report)
+    self.assertIn("search is not profiled", report)
+    self.assertNotIn("pondered", self._Profile().Report())
+
+  def testSlowest(self):
+    profiler = self._Profile(slowest=3)
+    with profiling.Game(3, strategy.Strategy.HEURISTICS):
+      for _ in xrange(5):
+        with profiling.Move(board.Board(3), strategy.Strategy.HEURISTICS):
+          pass
+    lines = profiler.Report().splitlines()
+    self.assertEqual(["heuristics.3x3", "5"], lines[1].split()[:2])
+    timeline = lines[lines.index("slowest moves") + 2:]
+    self.assertEqual(3, len(timeline))
+    self.assertEqual([1, 2, 3], sorted(int(line.split()[0])
+                                       for line in timeline))
+
+
+if __name__ == '__main__':
+  unittest.main()
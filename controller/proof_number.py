@@ -0,0 +1,283 @@
+"""Depth-first proof-number (df-pn) search for post-game analysis.
+
+The solver answers "is this position a forced win for a user" on boards far
+too large for minimax by always expanding the most proving node.  Draws count
+as failures for the attacker.  Positions are explored as immutable
+board_state.BoardState objects and stored in a transposition table keyed by
+the position string and the side to move.
+
+Proof and disproof numbers are kept from the attacker's point of view: a
+proof number of 0 means the attacker wins, a disproof number of 0 means the
+attacker cannot.
+"""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+from controller import strategy
+from model import board
+from model import board_state
+
+
+INFINITY = 1 << 40
+DEFAULT_MAX_NODES = 1000000
+DEFAULT_MAX_ENTRIES = 2000000
+
+
+class ProofStatus(object):
+  """Result of a proof search from the attacker's point of view."""
+
+  UNKNOWN, PROVEN, DISPROVEN = xrange(3)
+
+
+class ProofResult(object):
+  """Outcome of Solver.Solve."""
+
+  def __init__(self, status, proof_number, disproof_number, nodes,
+               best_move, move_status):
+    """Initializes the result.
+
+    Args:
+      status: The ProofStatus of the root position.
+      proof_number: The root proof number, 0 if proven.
+      disproof_number: The root disproof number, 0 if disproven.
+      nodes: The number of nodes expanded.
+      best_move: The move that achieves the result for the side to move:
+          a winning move if the attacker is to move and the root is proven,
+          a refutation if the defender is to move and the root is disproven.
+          -1 otherwise.
+      move_status: A dictionary mapping each root move to the ProofStatus of
+          the position it leads to.  This is a partial proof when the search
+          ran out of budget.
+    """
+
+    self.status = status
+    self.proof_number = proof_number
+    self.disproof_number = disproof_number
+    self.nodes = nodes
+    self.best_move = best_move
+    self.move_status = move_status
+
+
+class _BudgetExceeded(Exception):
+  """Raised inside the search when the node budget is spent."""
+
+
+class Solver(object):
+  """df-pn solver with a node and memory budget.
+
+  The transposition table survives between calls to Solve, so analysing
+  consecutive positions of the same game reuses earlier work.
+  """
+
+  def __init__(self, max_nodes=DEFAULT_MAX_NODES,
+               max_entries=DEFAULT_MAX_ENTRIES):
+    """Initializes the solver.
+
+    Args:
+      max_nodes: The number of node expansions allowed per call to Solve.
+      max_entries: The number of transposition table entries kept.  When it
+          is exceeded the entries that are not yet proven or disproven are
+          dropped.
+    """
+
+    self.max_nodes = max_nodes
+    self.max_entries = max_entries
+    self.nodes = 0
+    self._attacker = None
+    self._table = {}
+
+  def __len__(self):
+    return len(self._table)
+
+  def Solve(self, play_board, attacker, to_move=None):
+    """Determines whether the attacker has a forced win.
+
+    Args:
+      play_board: The board.Board or board_state.BoardState to analyse.
+      attacker: The board.BoardValue of the user trying to win.
+      to_move: The board.BoardValue to move.  If None it is given by
+          play_board.GetSideToMove.
+
+    Returns:
+      A ProofResult.
+    """
+
+    if attacker != self._attacker:
+      self._table.clear()
+      self._attacker = attacker
+
+    if to_move is None:
+      to_move = play_board.GetSideToMove()
+    if not isinstance(play_board, board_state.BoardState):
+      play_board = board_state.BoardState.FromBoard(play_board)
+
+    self.nodes = 0
+    try:
+      self._Search(play_board, to_move, INFINITY, INFINITY)
+    except _BudgetExceeded:
+      pass
+
+    proof_number, disproof_number = self._Lookup(play_board, to_move)
+    status = _GetStatus(proof_number, disproof_number)
+
+    move_status = {}
+    best_move = -1
+    other = board.BoardValue.Other(to_move)
+    if play_board.IsWinner() == board.BoardValue.NONE:
+      for move in self._GetMoves(play_board, to_move):
+        child = play_board.Play(move, to_move)
+        move_status[move] = _GetStatus(*self._Lookup(child, other))
+        if best_move < 0 and (
+            (to_move == attacker and status == ProofStatus.PROVEN
+             and move_status[move] == ProofStatus.PROVEN) or
+            (to_move != attacker and status == ProofStatus.DISPROVEN
+             and move_status[move] == ProofStatus.DISPROVEN)):
+          best_move = move
+
+    return ProofResult(status, proof_number, disproof_number, self.nodes,
+                       best_move, move_status)
+
+  @staticmethod
+  def _MakeKey(state, to_move):
+    """Returns the transposition table key of a position."""
+
+    return state.ToPositionString() + board.BoardValue.ToChar(to_move)
+
+  def _Lookup(self, state, to_move, key=None):
+    """Returns the (proof, disproof) numbers of a position.
+
+    Terminal positions are evaluated and stored on first sight; other
+    unseen positions are (1, 1).
+    """
+
+    if key is None:
+      key = self._MakeKey(state, to_move)
+    numbers = self._table.get(key)
+    if numbers is not None:
+      return numbers
+
+    winner = state.IsWinner()
+    if winner == board.BoardValue.NONE:
+      return 1, 1
+    if winner == self._attacker:
+      numbers = (0, INFINITY)
+    else:
+      numbers = (INFINITY, 0)
+    self._Store(key, numbers)
+    return numbers
+
+  def _Store(self, key, numbers):
+    """Stores the numbers of a position, enforcing the memory budget."""
+
+    table = self._table
+    if len(table) >= self.max_entries and key not in table:
+      for old_key in [old_key for old_key, (proof, disproof)
+                      in table.iteritems() if proof and disproof]:
+        del table[old_key]
+    table[key] = numbers
+
+  @staticmethod
+  def _GetMoves(state, to_move):
+    """Returns the moves worth searching in a position.
+
+    A winning move makes every other move irrelevant, and a move that does
+    not block an immediate threat loses, so both cases yield a single move.
+    """
+
+    position = strategy.CanWin(state, to_move)
+    if position >= 0:
+      return [position]
+    position = strategy.CanWin(state, board.BoardValue.Other(to_move))
+    if position >= 0:
+      return [position]
+    return [position for position in xrange(state.dimension * state.dimension)
+            if state.IsValidMoveFromPosition(position)]
+
+  def _Search(self, state, to_move, phi_threshold, delta_threshold):
+    """Multiple iterative deepening step of df-pn.
+
+    phi and delta are the proof and disproof numbers from the point of view
+    of the side to move: (proof, disproof) at attacker nodes and
+    (disproof, proof) at defender nodes.
+    """
+
+    key = self._MakeKey(state, to_move)
+    is_or_node = to_move == self._attacker
+    if state.IsWinner() != board.BoardValue.NONE:
+      self._Lookup(state, to_move, key)
+      return
+
+    self.nodes += 1
+    if self.nodes > self.max_nodes:
+      raise _BudgetExceeded()
+
+    other = board.BoardValue.Other(to_move)
+    children = []
+    for move in self._GetMoves(state, to_move):
+      child = state.Play(move, to_move)
+      children.append((child, self._MakeKey(child, other)))
+
+    while 1:
+      delta = 0
+      best_child = None
+      best_delta = INFINITY
+      second_delta = INFINITY
+      best_phi = INFINITY
+      for child, child_key in children:
+        proof, disproof = self._Lookup(child, other, child_key)
+        # The child's phi and delta are from the other side's point of view.
+        child_phi, child_delta = ((disproof, proof) if is_or_node
+                                  else (proof, disproof))
+        delta = min(INFINITY, delta + child_phi)
+        if child_delta < best_delta:
+          second_delta = best_delta
+          best_delta = child_delta
+          best_phi = child_phi
+          best_child = child
+        elif child_delta < second_delta:
+          second_delta = child_delta
+      phi = best_delta
+
+      if phi >= phi_threshold or delta >= delta_threshold:
+        self._Store(key, (phi, delta) if is_or_node else (delta, phi))
+        return
+
+      child_phi_threshold = min(INFINITY,
+                                delta_threshold + best_phi - delta)
+      child_delta_threshold = min(phi_threshold, second_delta + 1)
+      try:
+        self._Search(best_child, other, child_phi_threshold,
+                     child_delta_threshold)
+      except _BudgetExceeded:
+        self._Store(key, (phi, delta) if is_or_node else (delta, phi))
+        raise
+
+
+def _GetStatus(proof_number, disproof_number):
+  """Converts proof and disproof numbers into a ProofStatus."""
+
+  if proof_number == 0:
+    return ProofStatus.PROVEN
+  if disproof_number == 0:
+    return ProofStatus.DISPROVEN
+  return ProofStatus.UNKNOWN
+
+
+def IsForcedWin(play_board, board_value, max_nodes=DEFAULT_MAX_NODES):
+  """Determines whether a user has a forced win.
+
+  Args:
+    play_board: The board.Board to analyse.  The side to move is given by
+        play_board.GetSideToMove.
+    board_value: The board.BoardValue of the user.
+    max_nodes: The node budget.
+
+  Returns:
+    True or False, or None if the budget ran out first.
+  """
+
+  status = Solver(max_nodes).Solve(play_board, board_value).status
+  if status == ProofStatus.UNKNOWN:
+    return None
+  return status == ProofStatus.PROVEN
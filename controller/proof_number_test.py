@@ -0,0 +1,71 @@
+"""Tests that correspond to proof_number."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+import unittest
+
+from controller import proof_number
+from model import board
+
+
+class SolverTest(unittest.TestCase):
+  """Class that tests the df-pn Solver."""
+
+  def _Solve(self, text, attacker=board.BoardValue.X, **kwargs):
+    return proof_number.Solver(**kwargs).Solve(
+        board.Board.FromPositionString(text), attacker)
+
+  def testEmptyBoardIsADraw(self):
+    result = self._Solve(".........")
+    self.assertEqual(proof_number.ProofStatus.DISPROVEN, result.status)
+    self.assertEqual(0, result.disproof_number)
+    result = self._Solve(".........", board.BoardValue.O)
+    self.assertEqual(proof_number.ProofStatus.DISPROVEN, result.status)
+
+  def testForcedWin(self):
+    # O answered the corner with an edge, X to move forks.
+    result = self._Solve("XO.......")
+    self.assertEqual(proof_number.ProofStatus.PROVEN, result.status)
+    self.assertEqual(0, result.proof_number)
+    self.assertEqual(proof_number.ProofStatus.PROVEN,
+                     result.move_status[result.best_move])
+
+  def testRefutation(self):
+    # After a corner opening only the center holds the draw for O.
+    result = self._Solve("X........")
+    self.assertEqual(proof_number.ProofStatus.DISPROVEN, result.status)
+    self.assertEqual(4, result.best_move)
+
+  def testLargeBoardDoubleThreat(self):
+    result = self._Solve("XXXX." "XOOO." "X.OO." "XO..." ".....")
+    self.assertEqual(proof_number.ProofStatus.PROVEN, result.status)
+    # O only considers blocking one of the two threats.
+    self.assertEqual([4], result.move_status.keys())
+    self.assertTrue(result.nodes < 10)
+
+  def testBudget(self):
+    result = self._Solve("X" + "." * 15, max_nodes=50)
+    self.assertEqual(proof_number.ProofStatus.UNKNOWN, result.status)
+    self.assertTrue(result.proof_number > 0)
+    self.assertTrue(result.disproof_number > 0)
+    self.assertEqual(15, len(result.move_status))
+    self.assertEqual(-1, result.best_move)
+
+  def testMemoryBudget(self):
+    # The full search stores 431 entries.
+    solver = proof_number.Solver(max_entries=400)
+    result = solver.Solve(board.Board(3), board.BoardValue.X)
+    self.assertEqual(proof_number.ProofStatus.DISPROVEN, result.status)
+    self.assertTrue(len(solver) <= 400)
+
+  def testIsForcedWin(self):
+    self.assertTrue(proof_number.IsForcedWin(
+        board.Board.FromPositionString("XO......."), board.BoardValue.X))
+    self.assertFalse(proof_number.IsForcedWin(
+        board.Board.FromPositionString("X...O...."), board.BoardValue.X))
+    self.assertIsNone(proof_number.IsForcedWin(
+        board.Board(4), board.BoardValue.X, max_nodes=10))
+
+
+if __name__ == '__main__':
+  unittest.main()
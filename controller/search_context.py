@@ -0,0 +1,84 @@
+"""Search state that is kept for the whole of a game.
+
+Consecutive moves of a game search overlapping trees: the positions reached
+from the current position are a subset of those reached from the previous
+one.  A SearchContext keeps the endgame memo between calls to
+strategy.GetNextMove and, each time the game advances, drops the entries of
+positions that can no longer occur, i.e. those that do not contain every
+play of the current position.
+"""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+from controller import endgame
+from model import board
+
+
+class SearchContext(object):
+  """Persistent search memo of one game."""
+
+  def __init__(self):
+    self.memo = {}
+    # The total number of endgame nodes searched and memo entries dropped.
+    self.nodes = 0
+    self.collected = 0
+    # (dimension, X mask, O mask) of the position last advanced to.
+    self._root = None
+
+  def __len__(self):
+    return len(self.memo)
+
+  def Advance(self, play_board):
+    """Moves the root of the context to the position of a board.
+
+    If the board does not follow from the previous root, e.g. because a new
+    game started, the memo is cleared.
+
+    Args:
+      play_board: The board.Board being played.
+    """
+
+    x_mask, o_mask = endgame.GetMasks(play_board, board.BoardValue.X)
+    root = (play_board.dimension, x_mask, o_mask)
+    if root == self._root:
+      return
+    if (self._root is None or self._root[0] != root[0]
+        or self._root[1] & ~x_mask or self._root[2] & ~o_mask):
+      self.collected += len(self.memo)
+      self.memo.clear()
+    else:
+      self._Collect(x_mask, o_mask)
+    self._root = root
+
+  def _Collect(self, x_mask, o_mask):
+    """Drops the memo entries that are unreachable from the root.
+
+    The memo is keyed by (side to move, opponent) masks, so a position is
+    reachable if either orientation contains the plays of the root.
+    """
+
+    memo = self.memo
+    for key in memo.keys():
+      own, opponent = key
+      if ((x_mask & ~own or o_mask & ~opponent)
+          and (x_mask & ~opponent or o_mask & ~own)):
+        del memo[key]
+        self.collected += 1
+
+  def SolveEndgame(self, play_board, board_value):
+    """Finds the best move exactly, reusing the work of earlier moves.
+
+    Args:
+      play_board: The board.Board being played.
+      board_value: The board.BoardValue of the side to move.
+
+    Returns:
+      The best position to play.
+    """
+
+    self.Advance(play_board)
+    solver = endgame.EndgameSolver(play_board.dimension, self.memo)
+    position = solver.GetBestMove(play_board, board_value)[0]
+    self.nodes += solver.nodes
+    return position
@@ -0,0 +1,56 @@
+"""Tests that correspond to search_context."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+import unittest
+
+from controller import endgame
+from controller import search_context
+from controller import strategy
+from model import board
+
+
+class SearchContextTest(unittest.TestCase):
+  """Class that tests SearchContext functions."""
+
+  def testAdvanceCollectsUnreachableEntries(self):
+    context = search_context.SearchContext()
+    play_board = board.Board.FromPositionString("X...O....")
+    self.assertEqual(endgame.GetBestMove(play_board, board.BoardValue.X),
+                     context.SolveEndgame(play_board, board.BoardValue.X))
+    size = len(context)
+    self.assertTrue(size > 0)
+
+    play_board.SetPosition(1, board.BoardValue.X)
+    play_board.SetPosition(2, board.BoardValue.O)
+    context.Advance(play_board)
+    self.assertTrue(0 < len(context) < size)
+    self.assertEqual(size - len(context), context.collected)
+    x_mask, o_mask = endgame.GetMasks(play_board, board.BoardValue.X)
+    for own, opponent in context.memo:
+      self.assertTrue((x_mask & ~own == 0 and o_mask & ~opponent == 0) or
+                      (x_mask & ~opponent == 0 and o_mask & ~own == 0))
+
+    # A position that does not follow from the root starts afresh.
+    context.Advance(board.Board(3))
+    self.assertEqual(0, len(context))
+    self.assertEqual(size, context.collected)
+
+  def testGetNextMoveReusesContext(self):
+    context = search_context.SearchContext()
+    play_board = board.Board.FromPositionString("X...O....")
+    for _ in xrange(2):
+      play_board.SetPosition(play_board.ToPositionString().rindex("."),
+                             board.BoardValue.X)
+      if play_board.IsWinner() != board.BoardValue.NONE:
+        break
+      position = strategy.GetNextMove(play_board, board.BoardValue.O,
+                                      endgame_threshold=9, context=context)
+      self.assertEqual(strategy.GetNextMove(play_board, board.BoardValue.O,
+                                            endgame_threshold=9),
+                       position)
+      play_board.SetPosition(position, board.BoardValue.O)
+    self.assertTrue(context.nodes > 0)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,397 @@
+"""Self-play generation of labelled training positions.
+
+Worker processes play games between strategies, after a few random opening
+plays so that games differ, and turn every strategy move into a sample of
+(position, side to move, chosen move, final result).  The result is 1 if the
+side to move went on to win, -1 if it lost and 0 for a draw.  Samples are
+augmented with the 8 symmetries of the board, deduplicated by the Zobrist
+hash of the position and side to move, and streamed to a file in chunks.
+
+The file holds one dimension and is a header followed by chunks:
+
+  header: magic "TTTS", format version, dimension
+  chunk:  magic "CHNK", sample count, then one column after the other:
+          hashes (uint64), boards (the cells of board.Board.ToBytes),
+          sides (uint8 BoardValue), moves (uint16), results (int8)
+
+Every number is little endian except the packed cells.  Only the chunk being
+filled is held in memory, along with the hashes of the samples written.
+"""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+import array
+import collections
+import multiprocessing
+import random
+import struct
+import sys
+
+from controller import profiling
+from controller import strategy
+from model import board
+from model import symmetry
+from model import zobrist
+
+
+MAGIC = "TTTS"
+CHUNK_MAGIC = "CHNK"
+VERSION = 1
+
+DEFAULT_CHUNK_SIZE = 65536
+DEFAULT_RANDOM_PLIES = 2
+DEFAULT_GAMES_PER_TASK = 16
+# Beyond this many hashes the deduplication starts over, bounding memory.
+DEFAULT_MAX_SEEN = 1 << 22
+
+_HEADER = struct.Struct("<4sHH")
+_CHUNK_HEADER = struct.Struct("<4sI")
+
+
+class InvalidSampleFileError(Exception):
+  """Thrown when a sample file is malformed."""
+
+
+def _GetCellBytes(dimension):
+  """Returns the number of bytes of the packed cells of a board."""
+
+  return board.Board.PackedSize(dimension) - board.Board.PackedSize(0)
+
+
+def PlayGame(x_strategy, o_strategy, dimension, seed,
+             random_plies=DEFAULT_RANDOM_PLIES):
+  """Plays a game and records the moves chosen by the strategies.
+
+  Args:
+    x_strategy: The strategy.Strategy playing X.
+    o_strategy: The strategy.Strategy playing O.
+    dimension: The dimension of the board.
+    seed: The seed of the random opening and of the random strategy.
+    random_plies: The number of random plays made before the strategies
+        take over.  They are not recorded.
+
+  Returns:
+    A tuple of (list of (position string, board.BoardValue to move, move),
+    winner as a board.BoardValue).
+  """
+
+  random.seed(seed)
+  play_board = board.Board(dimension)
+  strategies = {board.BoardValue.X: x_strategy, board.BoardValue.O: o_strategy}
+  board_value = board.BoardValue.X
+  history = []
+  ply = 0
+  with profiling.Game(dimension, x_strategy, o_strategy):
+    while not play_board.IsFull():
+      if ply < random_plies:
+        position = random.choice([
+            position for position in xrange(dimension * dimension)
+            if play_board.IsValidMoveFromPosition(position)])
+      else:
+        with profiling.Move(play_board, strategies[board_value]):
+          position = strategy.GetNextMove(play_board, board_value,
+                                          strategies[board_value])
+        history.append((play_board.ToPositionString(), board_value,
+                        position))
+      play_board.SetPosition(position, board_value)
+      has_won = play_board.IsWinner()
+      if has_won is None:
+        # No line can be completed any more.
+        return history, board.BoardValue.NONE
+      if has_won != board.BoardValue.NONE:
+        return history, has_won
+      board_value = board.BoardValue.Other(board_value)
+      ply += 1
+  return history, board.BoardValue.NONE
+
+
+def MakeSamples(history, winner, dimension, augment=True):
+  """Turns a game into samples.
+
+  Args:
+    history: The moves as returned by PlayGame.
+    winner: The board.BoardValue that won, NONE for a draw.
+    dimension: The dimension of the board.
+    augment: Whether to add the symmetric positions of every move.
+
+  Returns:
+    A list of (hash, packed cells, side, move, result) tuples.  Symmetric
+    positions that are identical appear once.
+  """
+
+  transforms = symmetry.GetTransforms(dimension)
+  if not augment:
+    transforms = transforms[:1]
+  header_size = board.Board.PackedSize(0)
+  samples = []
+  for text, board_value, move in history:
+    if winner == board.BoardValue.NONE:
+      result = 0
+    elif winner == board_value:
+      result = 1
+    else:
+      result = -1
+    seen = set()
+    for permutation in transforms:
+      transformed = symmetry.Transform(text, permutation)
+      if transformed in seen:
+        continue
+      seen.add(transformed)
+      key = (zobrist.HashText(transformed, dimension)
+             ^ zobrist.SIDE_KEYS[board_value])
+      cells = board.Board.FromPositionString(transformed).ToBytes()
+      samples.append((key, cells[header_size:], board_value,
+                      symmetry.Invert(permutation)[move], result))
+  return samples
+
+
+def _PlayTask(task):
+  """Pool entry point that plays a batch of games.
+
+  Args:
+    task: A tuple of (list of (x strategy, o strategy, seed), dimension,
+        random plies, augment).
+
+  Returns:
+    A tuple of (number of games, list of samples).
+  """
+
+  games, dimension, random_plies, augment = task
+  samples = []
+  for x_strategy, o_strategy, seed in games:
+    history, winner = PlayGame(x_strategy, o_strategy, dimension, seed,
+                               random_plies)
+    samples.extend(MakeSamples(history, winner, dimension, augment))
+  return len(games), samples
+
+
+class SampleWriter(object):
+  """Buffers samples into columns and writes them a chunk at a time."""
+
+  def __init__(self, stream, dimension, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Initializes the writer and writes the file header.
+
+    Args:
+      stream: A binary file object.
+      dimension: The dimension of every board written.
+      chunk_size: The number of samples per chunk.
+    """
+
+    self._stream = stream
+    self.dimension = dimension
+    self.chunk_size = chunk_size
+    self.count = 0
+    self.chunks = 0
+    stream.write(_HEADER.pack(MAGIC, VERSION, dimension))
+    self._Reset()
+
+  def _Reset(self):
+    self._hashes = []
+    self._boards = bytearray()
+    self._sides = bytearray()
+    self._moves = array.array("H")
+    self._results = array.array("b")
+
+  def Add(self, key, cells, side, move, result):
+    """Adds a sample, writing a chunk when one is full."""
+
+    self._hashes.append(key)
+    self._boards.extend(cells)
+    self._sides.append(side)
+    self._moves.append(move)
+    self._results.append(result)
+    if len(self._hashes) >= self.chunk_size:
+      self.Flush()
+
+  def Flush(self):
+    """Writes the buffered samples as a chunk."""
+
+    count = len(self._hashes)
+    if not count:
+      return
+    if sys.byteorder != "little":
+      self._moves.byteswap()
+    stream = self._stream
+    stream.write(_CHUNK_HEADER.pack(CHUNK_MAGIC, count))
+    stream.write(struct.pack("<%dQ" % count, *self._hashes))
+    stream.write(self._boards)
+    stream.write(self._sides)
+    stream.write(self._moves.tostring())
+    stream.write(self._results.tostring())
+    self.count += count
+    self.chunks += 1
+    self._Reset()
+
+  def Close(self):
+    """Writes the last chunk and flushes the stream."""
+
+    self.Flush()
+    self._stream.flush()
+
+
+class Chunk(object):
+  """The columns of one chunk of a sample file."""
+
+  def __init__(self, dimension, hashes, boards, sides, moves, results):
+    self.dimension = dimension
+    self.hashes = hashes
+    self.boards = boards
+    self.sides = sides
+    self.moves = moves
+    self.results = results
+
+  def __len__(self):
+    return len(self.hashes)
+
+  def GetBoard(self, index):
+    """Unpacks the board of a sample."""
+
+    size = _GetCellBytes(self.dimension)
+    return board.Board.FromBytes(
+        struct.pack(">H", self.dimension)
+        + str(self.boards[index * size:(index + 1) * size]))
+
+
+def ReadChunks(stream):
+  """Lazily reads the chunks of a sample file.
+
+  Args:
+    stream: A binary file object positioned at the start of the file.
+
+  Yields:
+    Chunk objects.
+
+  Raises:
+    InvalidSampleFileError if the file is malformed.
+  """
+
+  header = stream.read(_HEADER.size)
+  if len(header) < _HEADER.size:
+    raise InvalidSampleFileError("Truncated header")
+  magic, version, dimension = _HEADER.unpack(header)
+  if magic != MAGIC or version != VERSION:
+    raise InvalidSampleFileError("Not a version %d sample file" % VERSION)
+  cell_bytes = _GetCellBytes(dimension)
+
+  while 1:
+    chunk_header = stream.read(_CHUNK_HEADER.size)
+    if not chunk_header:
+      return
+    if len(chunk_header) < _CHUNK_HEADER.size:
+      raise InvalidSampleFileError("Truncated chunk header")
+    magic, count = _CHUNK_HEADER.unpack(chunk_header)
+    if magic != CHUNK_MAGIC:
+      raise InvalidSampleFileError("Invalid chunk")
+    columns = []
+    for size in (8 * count, cell_bytes * count, count, 2 * count, count):
+      column = stream.read(size)
+      if len(column) < size:
+        raise InvalidSampleFileError("Truncated chunk")
+      columns.append(column)
+    moves = array.array("H", columns[3])
+    if sys.byteorder != "little":
+      moves.byteswap()
+    yield Chunk(dimension, struct.unpack("<%dQ" % count, columns[0]),
+                bytearray(columns[1]), bytearray(columns[2]), moves,
+                array.array("b", columns[4]))
+
+
+def ReadSamples(stream):
+  """Lazily reads every sample of a sample file.
+
+  Yields:
+    Tuples of (board.Board, board.BoardValue to move, move, result).
+  """
+
+  for chunk in ReadChunks(stream):
+    for index in xrange(len(chunk)):
+      yield (chunk.GetBoard(index), chunk.sides[index], chunk.moves[index],
+             chunk.results[index])
+
+
+def _Tasks(strategies, dimension, games, seed, random_plies, augment,
+           games_per_task):
+  """Lazily yields the pool tasks of a run."""
+
+  pairings = [(x_strategy, o_strategy) for x_strategy in strategies
+              for o_strategy in strategies]
+  batch = []
+  for game in xrange(games):
+    x_strategy, o_strategy = pairings[game % len(pairings)]
+    batch.append((x_strategy, o_strategy, seed + game))
+    if len(batch) == games_per_task or game == games - 1:
+      yield batch, dimension, random_plies, augment
+      batch = []
+
+
+def Generate(stream, dimension, games,
+             strategies=strategy.Strategy.AVAILABLE_STRATEGIES,
+             processes=None,
+             seed=0, random_plies=DEFAULT_RANDOM_PLIES, augment=True,
+             chunk_size=DEFAULT_CHUNK_SIZE,
+             games_per_task=DEFAULT_GAMES_PER_TASK,
+             max_seen=DEFAULT_MAX_SEEN):
+  """Runs self-play and writes the deduplicated samples to a stream.
+
+  Every ordered pairing of the strategies plays in turn.  At most twice as
+  many batches of games as there are workers are in flight at any time.
+
+  Args:
+    stream: A binary file object the sample file is written to.
+    dimension: The dimension of the board.
+    games: The number of games played.
+    strategies: The strategy.Strategy values playing.
+    processes: The number of worker processes.  None uses one per CPU and 0
+        plays in the calling process.
+    seed: The seed from which every game's seed is derived.
+    random_plies: The number of random opening plays of every game.
+    augment: Whether to add the symmetric positions of every sample.
+    chunk_size: The number of samples per chunk.
+    games_per_task: The number of games sent to a worker at a time.
+    max_seen: The number of hashes kept for deduplication.
+
+  Returns:
+    A dictionary of the number of games, samples written and duplicates
+    dropped.
+  """
+
+  writer = SampleWriter(stream, dimension, chunk_size)
+  seen = set()
+  stats = {"games": 0, "samples": 0, "duplicates": 0}
+
+  def Consume(outcome):
+    played, samples = outcome
+    stats["games"] += played
+    for sample in samples:
+      if sample[0] in seen:
+        stats["duplicates"] += 1
+        continue
+      if len(seen) >= max_seen:
+        seen.clear()
+      seen.add(sample[0])
+      writer.Add(*sample)
+      stats["samples"] += 1
+
+  tasks = _Tasks(strategies, dimension, games, seed, random_plies, augment,
+                 games_per_task)
+  if processes == 0:
+    for task in tasks:
+      Consume(_PlayTask(task))
+  else:
+    pool = multiprocessing.Pool(processes)
+    max_in_flight = 2 * (processes or multiprocessing.cpu_count())
+    try:
+      in_flight = collections.deque()
+      for task in tasks:
+        in_flight.append(pool.apply_async(_PlayTask, (task,)))
+        if len(in_flight) >= max_in_flight:
+          Consume(in_flight.popleft().get())
+      while in_flight:
+        Consume(in_flight.popleft().get())
+    finally:
+      pool.terminate()
+      pool.join()
+
+  writer.Close()
+  return stats
@@ -0,0 +1,89 @@
+"""Tests that correspond to self_play."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+import StringIO
+import unittest
+
+from controller import self_play
+from controller import strategy
+from model import board
+
+
+class SelfPlayTest(unittest.TestCase):
+  """Class that tests self play functions."""
+
+  def testMakeSamples(self):
+    history = [("X...O....", board.BoardValue.X, 8)]
+    samples = self_play.MakeSamples(history, board.BoardValue.O, 3)
+    # The 4 rotations of the position are distinct, its reflections are not.
+    self.assertEqual(4, len(samples))
+    self.assertEqual(4, len(set(sample[0] for sample in samples)))
+    for _, _, side, move, result in samples:
+      self.assertEqual(board.BoardValue.X, side)
+      self.assertEqual(-1, result)
+      self.assertIn(move, (0, 2, 6, 8))
+
+    samples = self_play.MakeSamples(history, board.BoardValue.NONE, 3,
+                                    augment=False)
+    self.assertEqual(1, len(samples))
+    self.assertEqual((board.BoardValue.X, 8, 0), samples[0][2:])
+
+  def testPlayGame(self):
+    history, winner = self_play.PlayGame(strategy.Strategy.HEURISTICS,
+                                         strategy.Strategy.HEURISTICS, 3, 7)
+    self.assertTrue(history)
+    for index, (text, board_value, move) in enumerate(history):
+      # The 2 random opening plays are not recorded.
+      self.assertEqual(2 + index, 9 - text.count("."))
+      play_board = board.Board.FromPositionString(text)
+      self.assertEqual(play_board.GetSideToMove(), board_value)
+      self.assertEqual(strategy.GetNextMove(play_board, board_value), move)
+    self.assertIn(winner, (board.BoardValue.NONE, board.BoardValue.X,
+                           board.BoardValue.O))
+
+  def testPlayGameDraw(self):
+    # Seed 0 ends with no line left to complete, which is a draw.
+    _, winner = self_play.PlayGame(strategy.Strategy.HEURISTICS,
+                                   strategy.Strategy.HEURISTICS, 3, 0)
+    self.assertEqual(board.BoardValue.NONE, winner)
+
+  def testGenerateAndRead(self):
+    stream = StringIO.StringIO()
+    stats = self_play.Generate(stream, 4, 12, processes=0, chunk_size=50)
+    self.assertEqual(12, stats["games"])
+    self.assertTrue(stats["samples"] > 50)
+
+    stream.seek(0)
+    chunks = list(self_play.ReadChunks(stream))
+    self.assertEqual(stats["samples"], sum(len(chunk) for chunk in chunks))
+    self.assertEqual(50, len(chunks[0]))
+
+    stream.seek(0)
+    keys = set()
+    for play_board, side, move, result in self_play.ReadSamples(stream):
+      self.assertTrue(play_board.IsValidMoveFromPosition(move))
+      self.assertIn(result, (-1, 0, 1))
+      keys.add((play_board.ToPositionString(), side))
+    # Samples are unique.
+    self.assertEqual(stats["samples"], len(keys))
+
+  def testGenerateInPool(self):
+    expected = StringIO.StringIO()
+    self_play.Generate(expected, 3, 8, processes=0, games_per_task=3)
+    stream = StringIO.StringIO()
+    self_play.Generate(stream, 3, 8, processes=2, games_per_task=3)
+    self.assertEqual(expected.getvalue(), stream.getvalue())
+
+  def testInvalidFile(self):
+    self.assertRaises(self_play.InvalidSampleFileError, list,
+                      self_play.ReadChunks(StringIO.StringIO("TTTX")))
+    stream = StringIO.StringIO()
+    self_play.Generate(stream, 3, 2, processes=0)
+    truncated = StringIO.StringIO(stream.getvalue()[:-1])
+    self.assertRaises(self_play.InvalidSampleFileError, list,
+                      self_play.ReadChunks(truncated))
+
+
+if __name__ == '__main__':
+  unittest.main()
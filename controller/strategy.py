@@ -4,7 +4,10 @@ __author__ = "Rishi Sharma (rishsharma@gmail.com)"
 
 import random
 
+from controller import endgame
 from controller import heuristics
+from controller import learned
+from controller import opening_book
 from model import board
 
 
@@ -15,16 +18,54 @@ class StrategyError(Exception):
 class Strategy(object):
   """Strategy to use to play."""
 
-  RANDOM, HEURISTICS = xrange(2)
+  RANDOM, HEURISTICS, LEARNED = xrange(3)
+  ALL_STRATEGIES = (RANDOM, HEURISTICS, LEARNED)
+  # The strategies that can be used with the installed packages.
+  AVAILABLE_STRATEGIES = (ALL_STRATEGIES if learned.IsAvailable()
+                          else (RANDOM, HEURISTICS))
 
+  _NAMES = {RANDOM: "random", HEURISTICS: "heuristics", LEARNED: "learned"}
 
-def GetNextMove(play_board, board_value, strategy=Strategy.HEURISTICS):
+  @staticmethod
+  def ToString(strategy):
+    """Converts a Strategy value into its command line name.
+
+    Raises:
+      StrategyError if the value is not a Strategy.
+    """
+
+    try:
+      return Strategy._NAMES[strategy]
+    except KeyError:
+      raise StrategyError("Unknown strategy: %r" % strategy)
+
+  @staticmethod
+  def FromString(name):
+    """Converts a command line name into its Strategy value.
+
+    Raises:
+      StrategyError if the name is not recognized.
+    """
+
+    for strategy, strategy_name in Strategy._NAMES.iteritems():
+      if strategy_name == name.lower():
+        return strategy
+    raise StrategyError("Unknown strategy: %r" % name)
+
+
+def GetNextMove(play_board, board_value, strategy=Strategy.HEURISTICS,
+                endgame_threshold=None, context=None):
   """Returns the next move in absolute positioning given a board.
 
   Args:
     play_board: The board.Board being played.
     board_value: The board.BoardValue representing the user.
     strategy: The Strategy to use to generate the next move.
+    endgame_threshold: With the HEURISTICS strategy, positions with at most
+        this many free cells are solved exactly.  0 disables the endgame
+        search and None uses endgame.GetThreshold of the dimension.
+    context: An optional search_context.SearchContext kept for the whole
+        game, so that the endgame search reuses the work of earlier moves.
 
   Returns:
     An absolute position for the next move that should be made.
@@ -36,6 +77,12 @@ def GetNextMove(play_board, board_value, strategy=Strategy.HEURISTICS):
   if play_board.IsFull():
     raise StrategyError("Play board is full. No moves can be made.")
 
+  # Is the position in a loaded opening book?
+  if strategy == Strategy.HEURISTICS:
+    position = opening_book.Lookup(play_board, board_value)
+    if position >= 0:
+      return position
+
   # Can I win?
   position = CanWin(play_board, board_value)
   if position >= 0:
@@ -52,6 +99,30 @@ def GetNextMove(play_board, board_value, strategy=Strategy.HEURISTICS):
   if strategy == Strategy.RANDOM:
     return _RandomStrategy(play_board)
 
+  if strategy == Strategy.LEARNED:
+    try:
+      return learned.GetBestMove(play_board, board_value)
+    except learned.LearnedError as ex:
+      raise StrategyError(str(ex))
+
+  # Can the rest of the game be searched exhaustively?
+  if endgame_threshold is None:
+    endgame_threshold = endgame.GetThreshold(play_board.dimension)
+  if play_board.CountEmpty() <= endgame_threshold:
+    if context is not None:
+      return context.SolveEndgame(play_board, board_value)
+    return endgame.GetBestMove(play_board, board_value)
+
+  # Can I fork?
+  positions = GetForkPositions(play_board, board_value)
+  if positions:
+    return positions[0]
+
+  # Can I block a fork?
+  position = BlockFork(play_board, board_value)
+  if position >= 0:
+    return position
+
   return heuristics.GetBestPositionBasedOnHeuristics(play_board, board_value)
 
 
@@ -116,3 +187,117 @@ def CanWin(play_board, board_value):
         return play_board.ToPosition((play_board.dimension - index - 1), index)
 
   return -1
+
+
+_LINES = {}
+
+
+def _GetLines(dimension):
+  """Returns the positions of every line of a board.
+
+  Args:
+    dimension: The dimension of the board.
+
+  Returns:
+    A tuple of (rows, columns, descending diagonal, ascending diagonal) where
+    rows and columns are lists of position tuples indexed by row or column.
+  """
+
+  lines = _LINES.get(dimension)
+  if lines is None:
+    rows = [tuple(xrange(row * dimension, (row + 1) * dimension))
+            for row in xrange(dimension)]
+    cols = [tuple(xrange(col, dimension * dimension, dimension))
+            for col in xrange(dimension)]
+    desc = tuple(index * (dimension + 1) for index in xrange(dimension))
+    asc = tuple((index + 1) * (dimension - 1) for index in xrange(dimension))
+    lines = _LINES[dimension] = (rows, cols, desc, asc)
+  return lines
+
+
+def _GetLinesWithCount(play_board, board_value, count):
+  """Finds the lines the user can still win that hold exactly count plays.
+
+  Only the line counters of the board's sentinels are examined.
+
+  Args:
+    play_board: The board.Board that is in play.
+    board_value: The board.BoardValue representing the user.
+    count: The number of plays the user must have in the line.
+
+  Returns:
+    A list of position tuples, one per line.
+  """
+
+  rows, cols, desc, asc = _GetLines(play_board.dimension)
+  lines = []
+  for index in xrange(play_board.dimension):
+    if play_board.IsRowPossible(index, board_value) == count:
+      lines.append(rows[index])
+    if play_board.IsColumnPossible(index, board_value) == count:
+      lines.append(cols[index])
+  if play_board.IsDescendingDiagonalPossible(board_value) == count:
+    lines.append(desc)
+  if play_board.IsAscendingDiagonalPossible(board_value) == count:
+    lines.append(asc)
+  return lines
+
+
+def GetForkPositions(play_board, board_value):
+  """Finds the moves that would give the user two simultaneous threats.
+
+  A threat is a line the user can still win that holds dimension - 1 plays.
+  Only lines that are one play short of a threat are examined, and each of
+  those has exactly two free positions.
+
+  Args:
+    play_board: The board.Board that is in play.
+    board_value: The board.BoardValue representing the user.
+
+  Returns:
+    A sorted list of the positions that create a fork.
+  """
+
+  if play_board.dimension < 2:
+    return []
+
+  line_counts = {}
+  for line in _GetLinesWithCount(play_board, board_value,
+                                 play_board.dimension - 2):
+    for position in line:
+      if play_board.IsValidMoveFromPosition(position):
+        line_counts[position] = line_counts.get(position, 0) + 1
+  return sorted(position for position, count in line_counts.iteritems()
+                if count > 1)
+
+
+def BlockFork(play_board, board_value):
+  """Determines how the user can stop the opponent from forking.
+
+  With a single fork available the opponent's fork position is taken.  With
+  several, the user instead makes a threat whose forced answer is not a fork
+  position, falling back to taking the first fork position.
+
+  Args:
+    play_board: The board.Board that is in play.
+    board_value: The board.BoardValue representing the user.
+
+  Returns:
+    The position to play. -1 if the opponent cannot fork.
+  """
+
+  forks = GetForkPositions(play_board, board.BoardValue.Other(board_value))
+  if not forks:
+    return -1
+  if len(forks) == 1:
+    return forks[0]
+
+  for line in _GetLinesWithCount(play_board, board_value,
+                                 play_board.dimension - 2):
+    free = [position for position in line
+            if play_board.IsValidMoveFromPosition(position)]
+    for threat, answer in ((free[0], free[1]), (free[1], free[0])):
+      if answer not in forks:
+        return threat
+
+  return forks[0]
@@ -39,6 +39,54 @@ class StrategyTest(unittest.TestCase):
     play_board.SetPosition(6, board.BoardValue.X)
     self.assertEqual(4, strategy.CanWin(play_board, board.BoardValue.X))
 
+  def testGetForkPositions(self):
+    play_board = board.Board.FromPositionString("X...O...X")
+    self.assertEqual([2, 6], strategy.GetForkPositions(
+        play_board, board.BoardValue.X))
+    self.assertEqual([], strategy.GetForkPositions(
+        play_board, board.BoardValue.O))
+
+    play_board = board.Board.FromPositionString(
+        "X...." "....." "....." "....." "....X")
+    self.assertEqual([], strategy.GetForkPositions(
+        play_board, board.BoardValue.X))
+    play_board = board.Board.FromPositionString(
+        ".XXX." "X...." "X...." "X...." ".....")
+    self.assertEqual([0], strategy.GetForkPositions(
+        play_board, board.BoardValue.X))
+
+  def testBlockFork(self):
+    # O has no fork to block.
+    play_board = board.Board.FromPositionString("X........")
+    self.assertEqual(-1, strategy.BlockFork(play_board, board.BoardValue.O))
+
+    # X threatens forks at 2 and 6.  O must not take a corner, but force X
+    # to answer on an edge.
+    play_board = board.Board.FromPositionString("X...O...X")
+    self.assertEqual(3, strategy.BlockFork(play_board, board.BoardValue.O))
+
+    # A single fork is blocked directly.
+    play_board = board.Board.FromPositionString("X.O.O...X")
+    self.assertEqual([6], strategy.GetForkPositions(
+        play_board, board.BoardValue.X))
+    self.assertEqual(6, strategy.BlockFork(play_board, board.BoardValue.O))
+
+  def testGetNextMoveForks(self):
+    play_board = board.Board.FromPositionString("X...O...X")
+    self.assertEqual(3, strategy.GetNextMove(play_board, board.BoardValue.O))
+    play_board = board.Board.FromPositionString(".X.X.O.O.")
+    self.assertEqual(0, strategy.GetNextMove(play_board, board.BoardValue.X))
+
+  def testGetNextMoveEndgame(self):
+    # Every edge holds the draw, the exact search picks the first one.
+    play_board = board.Board.FromPositionString("X...O...X")
+    self.assertEqual(1, strategy.GetNextMove(
+        play_board, board.BoardValue.O, endgame_threshold=9))
+    play_board = board.Board.FromPositionString("X" + "." * 15)
+    self.assertEqual(15, play_board.CountEmpty())
+    # Too many free cells, the heuristics decide.
+    self.assertEqual(8, strategy.GetNextMove(play_board, board.BoardValue.O))
+
 
 if __name__ == '__main__':
   unittest.main()
@@ -0,0 +1,229 @@
+"""Exactly solved positions, generated in independent partitions.
+
+A tablebase holds the best move, found by the endgame solver, of every
+undecided canonical position with fewer than max_ply plays.  It is written
+in the opening_book format, so it is loaded with opening_book.Load and
+consulted by strategy.GetNextMove like any other book.
+
+The work is split into partitions of (ply, shard).  A partition holds the
+positions with ply plays whose CRC-32 of the canonical position string falls
+in the shard-th of shards equal ranges, which spreads the positions of a ply
+evenly however few of them there are.  Partitions are solved independently,
+each with its own memo, and written to partition files of (key, move)
+records:
+
+  header: magic "TTTP", format version, dimension, ply, shard, shards, count
+  record: 64 bit key, move in the canonical position
+
+Merge combines the partition files into the final book.  The distributed
+module spreads partitions over workers; Build solves them in process.
+"""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+import itertools
+import os
+import struct
+import zlib
+
+from controller import endgame
+from controller import opening_book
+from controller import profiling
+from model import board
+from model import symmetry
+
+
+MAGIC = "TTTP"
+# Version 1 partitions were sharded by the placement of the X plays.
+VERSION = 2
+
+DEFAULT_SHARDS = 8
+
+_HEADER = struct.Struct("<4sHHHHHI")
+_RECORD = struct.Struct("<QH")
+
+
+class InvalidPartitionError(Exception):
+  """Thrown when a partition file is malformed."""
+
+
+def GetPartitions(max_ply, shards=DEFAULT_SHARDS):
+  """Returns the (ply, shard) partitions of a tablebase, fewest plays first.
+
+  Positions with fewer plays have deeper trees, so the partitions that take
+  the longest come first.
+  """
+
+  return [(ply, shard) for ply in xrange(max_ply) for shard in xrange(shards)]
+
+
+def GetShard(text, shards):
+  """Returns the shard of a canonical position string."""
+
+  return ((zlib.crc32(text) & 0xffffffff) * shards) >> 32
+
+
+def GetPositions(dimension, ply, shard=0, shards=1):
+  """Lazily enumerates the positions of a partition.
+
+  Args:
+    dimension: The dimension of the board.
+    ply: The number of plays of the positions.
+    shard: The index of the partition among the shards of the ply.
+    shards: The number of partitions of the ply.
+
+  Yields:
+    The canonical position strings with ply plays that are still undecided.
+  """
+
+  cells = dimension * dimension
+  x_count = (ply + 1) // 2
+  o_count = ply // 2
+  for x_plays in itertools.combinations(xrange(cells), x_count):
+    chars = ["."] * cells
+    for position in x_plays:
+      chars[position] = "X"
+    free = [position for position in xrange(cells) if chars[position] == "."]
+    for o_plays in itertools.combinations(free, o_count):
+      for position in o_plays:
+        chars[position] = "O"
+      text = "".join(chars)
+      for position in o_plays:
+        chars[position] = "."
+      # Only canonical strings are yielded, so the shard of the string itself
+      # is checked first, before the costlier canonicalization.
+      if GetShard(text, shards) != shard:
+        continue
+      if symmetry.Canonicalize(text, dimension)[0] != text:
+        continue
+      if (board.Board.FromPositionString(text).IsWinner()
+          == board.BoardValue.NONE):
+        yield text
+
+
+def SolvePartition(dimension, ply, shard=0, shards=1):
+  """Solves every position of a partition.
+
+  Returns:
+    A list of (key, canonical move) records.
+  """
+
+  board_value = board.BoardValue.X if ply % 2 == 0 else board.BoardValue.O
+  solver = endgame.EndgameSolver(dimension)
+  records = []
+  for text in GetPositions(dimension, ply, shard, shards):
+    play_board = board.Board.FromPositionString(text)
+    with profiling.Move(play_board, profiling.ENDGAME):
+      move = solver.GetBestMove(play_board, board_value)[0]
+    records.append((opening_book.MakeKey(text, dimension, board_value), move))
+  return records
+
+
+def GetPartitionPath(directory, dimension, ply, shard, shards):
+  """Returns the path of the file of a partition in a checkpoint directory."""
+
+  return os.path.join(directory, "%d-%d-%d-of-%d.part" % (dimension, ply,
+                                                          shard, shards))
+
+
+def WritePartition(path, dimension, ply, shard, shards, records):
+  """Writes a partition file atomically.
+
+  The records are written to a temporary file that is then renamed, so a
+  partition file exists only once it is complete.  The temporary file is
+  removed if the records cannot be written.
+
+  Raises:
+    struct.error if a record does not fit the record format.
+  """
+
+  temporary = path + ".tmp"
+  try:
+    with open(temporary, "wb") as stream:
+      stream.write(_HEADER.pack(MAGIC, VERSION, dimension, ply, shard, shards,
+                                len(records)))
+      for key, move in records:
+        stream.write(_RECORD.pack(key, move))
+  except (IOError, struct.error, TypeError, ValueError):
+    if os.path.exists(temporary):
+      os.remove(temporary)
+    raise
+  os.rename(temporary, path)
+
+
+def ReadPartition(path):
+  """Reads a partition file.
+
+  Returns:
+    A tuple of (dimension, ply, shard, shards, list of (key, move)).
+
+  Raises:
+    InvalidPartitionError if the file is malformed.
+  """
+
+  with open(path, "rb") as stream:
+    data = stream.read()
+  if len(data) < _HEADER.size:
+    raise InvalidPartitionError("Truncated partition: %s" % path)
+  magic, version, dimension, ply, shard, shards, count = _HEADER.unpack_from(
+      data)
+  if magic != MAGIC or version != VERSION:
+    raise InvalidPartitionError("Not a version %d partition: %s" %
+                                (VERSION, path))
+  if len(data) != _HEADER.size + count * _RECORD.size:
+    raise InvalidPartitionError("Truncated partition: %s" % path)
+  records = [_RECORD.unpack_from(data, _HEADER.size + index * _RECORD.size)
+             for index in xrange(count)]
+  return dimension, ply, shard, shards, records
+
+
+def GetCompleted(directory, dimension, max_ply, shards):
+  """Returns the set of (ply, shard) partitions checkpointed in a directory."""
+
+  return set(partition for partition in GetPartitions(max_ply, shards)
+             if os.path.exists(GetPartitionPath(directory, dimension,
+                                                *(partition + (shards,)))))
+
+
+def Merge(path, directory, dimension, max_ply, shards):
+  """Combines the partition files of a directory into a book file.
+
+  Returns:
+    The number of records written.
+
+  Raises:
+    InvalidPartitionError if a partition is missing or malformed.
+  """
+
+  records = []
+  for ply, shard in GetPartitions(max_ply, shards):
+    partition_path = GetPartitionPath(directory, dimension, ply, shard,
+                                      shards)
+    if not os.path.exists(partition_path):
+      raise InvalidPartitionError("Missing partition: %s" % partition_path)
+    header = ReadPartition(partition_path)
+    if header[:4] != (dimension, ply, shard, shards):
+      raise InvalidPartitionError("Mismatched partition: %s" % partition_path)
+    records.extend((key, dimension, move) for key, move in header[4])
+  opening_book.Write(path, records, max_ply)
+  return len(records)
+
+
+def Build(path, directory, dimension, max_ply, shards=DEFAULT_SHARDS):
+  """Solves every partition in process and merges them into a book file.
+
+  Partitions already in the checkpoint directory are not solved again.
+
+  Returns:
+    The number of records written.
+  """
+
+  completed = GetCompleted(directory, dimension, max_ply, shards)
+  for ply, shard in GetPartitions(max_ply, shards):
+    if (ply, shard) not in completed:
+      WritePartition(GetPartitionPath(directory, dimension, ply, shard,
+                                      shards),
+                     dimension, ply, shard, shards,
+                     SolvePartition(dimension, ply, shard, shards))
+  return Merge(path, directory, dimension, max_ply, shards)
@@ -0,0 +1,99 @@
+"""Tests that correspond to tablebase."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+from controller import endgame
+from controller import opening_book
+from controller import tablebase
+from model import board
+from model import symmetry
+
+
+class TablebaseTest(unittest.TestCase):
+  """Class that tests tablebase functions."""
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.directory)
+
+  def testGetPositions(self):
+    self.assertEqual(["........."], list(tablebase.GetPositions(3, 0)))
+    self.assertEqual(["........X", ".......X.", "....X...."],
+                     sorted(tablebase.GetPositions(3, 1)))
+    positions = list(tablebase.GetPositions(3, 5))
+    self.assertEqual(len(positions), len(set(positions)))
+    for text in positions:
+      self.assertEqual(symmetry.Canonicalize(text, 3)[0], text)
+      self.assertEqual(board.BoardValue.NONE,
+                       board.Board.FromPositionString(text).IsWinner())
+
+    sharded = []
+    for shard in xrange(4):
+      sharded.extend(tablebase.GetPositions(3, 5, shard, 4))
+    self.assertEqual(sorted(positions), sorted(sharded))
+
+    # The 33 positions of the third ply of 4x4 leave no shard empty.
+    counts = [len(list(tablebase.GetPositions(4, 2, shard, 8)))
+              for shard in xrange(8)]
+    self.assertEqual(33, sum(counts))
+    self.assertTrue(min(counts) >= 3, counts)
+
+  def testPartitionFile(self):
+    path = os.path.join(self.directory, "part")
+    records = [(1 << 63, 2), (5, 0)]
+    tablebase.WritePartition(path, 3, 4, 1, 2, records)
+    self.assertEqual((3, 4, 1, 2, records), tablebase.ReadPartition(path))
+    self.assertFalse(os.path.exists(path + ".tmp"))
+
+    with open(path, "r+b") as stream:
+      stream.truncate(os.path.getsize(path) - 1)
+    self.assertRaises(tablebase.InvalidPartitionError,
+                      tablebase.ReadPartition, path)
+
+  def testWritePartitionFailure(self):
+    path = os.path.join(self.directory, "part")
+    self.assertRaises(struct.error, tablebase.WritePartition, path, 3, 4, 1,
+                      2, [(5, 0), (1 << 64, 0)])
+    self.assertEqual([], os.listdir(self.directory))
+
+  def testBuild(self):
+    path = os.path.join(self.directory, "tablebase.bin")
+    count = tablebase.Build(path, self.directory, 3, 9, shards=2)
+    self.assertEqual(count, sum(len(list(tablebase.GetPositions(3, ply)))
+                                for ply in xrange(9)))
+    self.assertEqual(set(tablebase.GetPartitions(9, 2)),
+                     tablebase.GetCompleted(self.directory, 3, 9, 2))
+
+    book = opening_book.OpeningBook(path)
+    self.addCleanup(book.Close)
+    solver = endgame.EndgameSolver(3)
+    for text, board_value in (("X...O....", board.BoardValue.X),
+                              ("XX..O....", board.BoardValue.O),
+                              ("X.O.X....", board.BoardValue.O)):
+      play_board = board.Board.FromPositionString(text)
+      move = book.Lookup(play_board, board_value)
+      best_score = solver.GetBestMove(play_board, board_value)[1]
+      play_board.SetPosition(move, board_value)
+      if play_board.IsWinner() == board_value:
+        continue
+      own, opponent = endgame.GetMasks(play_board, board_value)
+      self.assertEqual(best_score,
+                       -solver.Negamax(opponent, own, -10, 10))
+
+  def testMergeMissingPartition(self):
+    tablebase.WritePartition(
+        tablebase.GetPartitionPath(self.directory, 3, 0, 0, 1), 3, 0, 0, 1,
+        tablebase.SolvePartition(3, 0))
+    self.assertRaises(tablebase.InvalidPartitionError, tablebase.Merge,
+                      os.path.join(self.directory, "tablebase.bin"),
+                      self.directory, 3, 2, 1)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,250 @@
+"""Round-robin tournaments between strategies.
+
+Every ordered pair of distinct strategies plays the same number of games on
+every dimension, so each pairing is played with both colours.  Games run in a
+process pool; the results are rated with a Bradley-Terry (Elo) model fitted
+by maximum likelihood.
+"""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+import itertools
+import math
+import multiprocessing
+import os
+import random
+import time
+
+from controller import profiling
+from controller import strategy
+from model import board
+
+
+# Elo points per natural logarithm unit of the Bradley-Terry strength.
+_ELO_SCALE = 400.0 / math.log(10)
+
+# Normal quantile of the 95% confidence interval.
+_Z_95 = 1.96
+
+
+def PlayGame(x_strategy, o_strategy, dimension, seed=None):
+  """Plays a game between two strategies.
+
+  Args:
+    x_strategy: The strategy.Strategy playing X, which moves first.
+    o_strategy: The strategy.Strategy playing O.
+    dimension: The dimension of the board.
+    seed: The seed of the random number generator used by the strategies.
+
+  Returns:
+    The winner as represented by BoardValue, None if it is a draw.
+  """
+
+  random.seed(seed)
+  play_board = board.Board(dimension)
+  board_value = board.BoardValue.X
+  strategies = {board.BoardValue.X: x_strategy, board.BoardValue.O: o_strategy}
+  with profiling.Game(dimension, x_strategy, o_strategy):
+    while 1:
+      with profiling.Move(play_board, strategies[board_value]):
+        position = strategy.GetNextMove(play_board, board_value,
+                                        strategies[board_value])
+      play_board.SetPosition(position, board_value)
+      has_won = play_board.IsWinner()
+      if has_won != board.BoardValue.NONE:
+        return has_won
+      board_value = board.BoardValue.Other(board_value)
+
+
+def _PlayTask(task):
+  """Pool entry point that plays one game.
+
+  Args:
+    task: A tuple of (x strategy, o strategy, dimension, seed).
+
+  Returns:
+    A tuple of (task, winner, worker pid, seconds spent).
+  """
+
+  start = time.time()
+  has_won = PlayGame(*task)
+  return task, has_won, os.getpid(), time.time() - start
+
+
+def ComputeElo(scores, iterations=1000, tolerance=1e-9):
+  """Fits Elo ratings to pairwise results.
+
+  Draws count as half a win for each side.  Every pair of players that met
+  is given one extra virtual draw so that unbeaten or winless players still
+  get finite ratings.
+
+  Args:
+    scores: A dictionary mapping (player, opponent) to a tuple of
+        (points scored by player, games played).
+    iterations: The maximum number of fitting iterations.
+    tolerance: The change in strength below which the fit stops.
+
+  Returns:
+    A dictionary mapping each player to (elo, half width of the 95%
+    confidence interval).  The ratings average 0.
+  """
+
+  points = {}
+  games = {}
+  for (player, opponent), (scored, played) in scores.iteritems():
+    for first, second, first_points in ((player, opponent, scored),
+                                        (opponent, player, played - scored)):
+      key = (first, second)
+      points[key] = points.get(key, 0.0) + first_points + 0.5
+      games[key] = games.get(key, 0.0) + played + 1
+
+  players = sorted(set(player for player, _ in games))
+  if not players:
+    return {}
+  strength = dict((player, 1.0) for player in players)
+  for _ in xrange(iterations):
+    change = 0.0
+    for player in players:
+      wins = 0.0
+      denominator = 0.0
+      for opponent in players:
+        played = games.get((player, opponent))
+        if played:
+          wins += points[(player, opponent)]
+          denominator += played / (strength[player] + strength[opponent])
+      new_strength = wins / denominator
+      change = max(change, abs(new_strength - strength[player]))
+      strength[player] = new_strength
+    if change < tolerance:
+      break
+
+  mean = sum(math.log(value) for value in strength.itervalues()) / len(players)
+  ratings = {}
+  for player in players:
+    information = 0.0
+    for opponent in players:
+      played = games.get((player, opponent))
+      if played:
+        expected = strength[player] / (strength[player] + strength[opponent])
+        information += played * expected * (1 - expected)
+    ratings[player] = (_ELO_SCALE * (math.log(strength[player]) - mean),
+                       _Z_95 * _ELO_SCALE / math.sqrt(information))
+  return ratings
+
+
+class TournamentResult(object):
+  """Outcome of RunTournament."""
+
+  def __init__(self):
+    # (x strategy, o strategy, dimension) -> [x wins, o wins, draws]
+    self.results = {}
+    # Worker pid -> [games played, seconds spent playing]
+    self.workers = {}
+    self.elapsed = 0.0
+
+  def Add(self, task, has_won, pid, seconds):
+    """Records the result of one game."""
+
+    counts = self.results.setdefault(task[:3], [0, 0, 0])
+    if has_won == board.BoardValue.X:
+      counts[0] += 1
+    elif has_won == board.BoardValue.O:
+      counts[1] += 1
+    else:
+      counts[2] += 1
+    worker = self.workers.setdefault(pid, [0, 0.0])
+    worker[0] += 1
+    worker[1] += seconds
+
+  def GetScores(self):
+    """Returns the pairwise scores in the format expected by ComputeElo.
+
+    Each pair of strategies appears once, with the lower strategy first.
+    """
+
+    scores = {}
+    for (x_strategy, o_strategy, _), (x_wins, o_wins, draws) in (
+        self.results.iteritems()):
+      played = x_wins + o_wins + draws
+      if x_strategy < o_strategy:
+        key, scored = (x_strategy, o_strategy), x_wins + 0.5 * draws
+      else:
+        key, scored = (o_strategy, x_strategy), o_wins + 0.5 * draws
+      old_scored, old_played = scores.get(key, (0.0, 0))
+      scores[key] = (old_scored + scored, old_played + played)
+    return scores
+
+  def GetElo(self):
+    """Returns the Elo ratings as computed by ComputeElo."""
+
+    return ComputeElo(self.GetScores())
+
+  def Report(self):
+    """Returns a human readable report of the tournament."""
+
+    lines = ["%-12s %8s %8s" % ("strategy", "elo", "95% ci")]
+    for player, (elo, interval) in sorted(self.GetElo().iteritems(),
+                                          key=lambda item: -item[1][0]):
+      lines.append("%-12s %8.1f %8.1f" % (strategy.Strategy.ToString(player),
+                                          elo, interval))
+
+    lines.append("")
+    lines.append("%-12s %-12s %4s %6s %6s %6s" % (
+        "x", "o", "dim", "x wins", "o wins", "draws"))
+    for (x_strategy, o_strategy, dimension), counts in sorted(
+        self.results.iteritems()):
+      lines.append("%-12s %-12s %4d %6d %6d %6d" % (
+          (strategy.Strategy.ToString(x_strategy),
+           strategy.Strategy.ToString(o_strategy), dimension) + tuple(counts)))
+
+    lines.append("")
+    total = 0
+    for pid, (games, seconds) in sorted(self.workers.iteritems()):
+      total += games
+      lines.append("worker %d: %d games, %.1f games/s" % (
+          pid, games, games / seconds if seconds else 0.0))
+    lines.append("total: %d games in %.1fs, %.1f games/s" % (
+        total, self.elapsed, total / self.elapsed if self.elapsed else 0.0))
+    return "\n".join(lines)
+
+
+def RunTournament(strategies=strategy.Strategy.AVAILABLE_STRATEGIES,
+                  dimensions=(3,), games_per_pairing=10, processes=None,
+                  seed=0):
+  """Plays a round-robin tournament.
+
+  Args:
+    strategies: The strategy.Strategy values taking part.
+    dimensions: The board dimensions played.
+    games_per_pairing: The games played by each ordered pair of strategies on
+        each dimension.
+    processes: The number of worker processes.  None uses one per CPU and 0
+        plays in the calling process.
+    seed: The seed from which every game's seed is derived.
+
+  Returns:
+    A TournamentResult.
+  """
+
+  tasks = []
+  for x_strategy, o_strategy in itertools.permutations(strategies, 2):
+    for dimension in dimensions:
+      for game in xrange(games_per_pairing):
+        tasks.append((x_strategy, o_strategy, dimension, seed + len(tasks)))
+
+  result = TournamentResult()
+  start = time.time()
+  if processes == 0:
+    for task in tasks:
+      result.Add(*_PlayTask(task))
+  else:
+    pool = multiprocessing.Pool(processes)
+    try:
+      for outcome in pool.imap_unordered(_PlayTask, tasks, chunksize=4):
+        result.Add(*outcome)
+    finally:
+      pool.terminate()
+      pool.join()
+  result.elapsed = time.time() - start
+  return result
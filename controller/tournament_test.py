@@ -0,0 +1,72 @@
+"""Tests that correspond to tournament."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+import unittest
+
+from controller import strategy
+from controller import tournament
+from model import board
+
+
+class TournamentTest(unittest.TestCase):
+  """Class that tests tournament functions."""
+
+  def testPlayGame(self):
+    has_won = tournament.PlayGame(strategy.Strategy.HEURISTICS,
+                                  strategy.Strategy.HEURISTICS, 3)
+    self.assertIsNone(has_won)
+    # The same seed replays the same game.
+    self.assertEqual(
+        tournament.PlayGame(strategy.Strategy.RANDOM,
+                            strategy.Strategy.RANDOM, 4, seed=3),
+        tournament.PlayGame(strategy.Strategy.RANDOM,
+                            strategy.Strategy.RANDOM, 4, seed=3))
+
+  def testComputeElo(self):
+    ratings = tournament.ComputeElo({("a", "b"): (5.0, 10)})
+    self.assertAlmostEqual(0.0, ratings["a"][0])
+    self.assertAlmostEqual(0.0, ratings["b"][0])
+
+    ratings = tournament.ComputeElo({("a", "b"): (75.0, 100),
+                                     ("b", "c"): (75.0, 100)})
+    self.assertTrue(ratings["a"][0] > ratings["b"][0] > ratings["c"][0])
+    self.assertAlmostEqual(0.0, sum(elo for elo, _ in ratings.itervalues()))
+    # 75% is worth a little less than 191 Elo once the virtual draw is added.
+    self.assertTrue(170 < ratings["a"][0] - ratings["b"][0] < 191)
+    for _, interval in ratings.itervalues():
+      self.assertTrue(0 < interval < 200)
+
+    # An unbeaten player still gets a finite rating.
+    ratings = tournament.ComputeElo({("a", "b"): (10.0, 10)})
+    self.assertTrue(0 < ratings["a"][0] < 1000)
+    self.assertEqual({}, tournament.ComputeElo({}))
+
+  def testRunTournament(self):
+    result = tournament.RunTournament(
+        (strategy.Strategy.RANDOM, strategy.Strategy.HEURISTICS),
+        dimensions=(3, 4), games_per_pairing=3, processes=0)
+    self.assertEqual(4, len(result.results))
+    self.assertEqual(12, sum(sum(counts)
+                             for counts in result.results.itervalues()))
+    elo = result.GetElo()
+    self.assertTrue(elo[strategy.Strategy.HEURISTICS][0]
+                    > elo[strategy.Strategy.RANDOM][0])
+    self.assertEqual(1, len(result.workers))
+    report = result.Report()
+    self.assertIn("heuristics", report)
+    self.assertIn("total: 12 games", report)
+
+  def testRunTournamentInPool(self):
+    strategies = (strategy.Strategy.RANDOM, strategy.Strategy.HEURISTICS)
+    result = tournament.RunTournament(strategies, games_per_pairing=4,
+                                      processes=2)
+    self.assertEqual(8, sum(games for games, _ in result.workers.itervalues()))
+    self.assertEqual(
+        result.results,
+        tournament.RunTournament(strategies, games_per_pairing=4,
+                                 processes=0).results)
+
+
+if __name__ == '__main__':
+  unittest.main()
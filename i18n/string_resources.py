@@ -1,15 +1,59 @@
-"""String resources for the tic tac toe game."""
+"""String resources for the tic tac toe game.
+
+Messages are written in English and translated with gettext catalogs found
+under LOCALE_DIR as <locale>/LC_MESSAGES/tic_tac_toe.mo.  Catalogs are only
+loaded the first time a message is needed in their locale and are then
+shared by every StringResources of that locale; the English default never
+loads one.  Formatted messages are cached, so a session does not rebuild the
+same string on every move.
+"""
 
 
 __author__ = "Rishi Sharma (rishsharma@gmail.com)"
 
 
+import gettext
+import os
+import threading
+
 from model import board
 
 
-class StringResources(object):
+DOMAIN = "tic_tac_toe"
+LOCALE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "locale")
+DEFAULT_LOCALE = "en"
+
+# The number of formatted messages kept per StringResources.
+MAX_FORMATTED = 4096
+
+_lock = threading.Lock()
+# Locale -> gettext translations, loaded on first use.
+_catalogs = {}
+# Locale -> StringResources, as returned by GetResources.
+_resources = {}
+
+
+def _IsDefault(locale):
+  """Determines if a locale uses the untranslated English messages."""
+
+  return locale is None or locale.split("_")[0].lower() == DEFAULT_LOCALE
+
+
+def _GetCatalog(locale):
+  """Returns the translations of a locale, loading them on first use."""
 
-  # TODO(rishsharma): Use gettext for i18n.
+  catalog = _catalogs.get(locale)
+  if catalog is None:
+    with _lock:
+      catalog = _catalogs.get(locale)
+      if catalog is None:
+        catalog = _catalogs[locale] = gettext.translation(
+            DOMAIN, LOCALE_DIR, [locale], fallback=True)
+  return catalog
+
+
+class StringResources(object):
 
   YOU_STRING = "You have put an X in position %03d."
   I_STRING = "I will put an O in position %03d."
@@ -29,6 +73,50 @@ class StringResources(object):
 
   SUMMARY = "X Wins: %s, O Wins: %s, Draws: %s"
 
+  def __init__(self, locale=None):
+    """Initializes the resources.
+
+    Args:
+      locale: The locale name, e.g. "fr" or "pt_BR".  None or any English
+          locale uses the messages above as they are.
+    """
+
+    self.locale = locale
+    self._default = _IsDefault(locale)
+    self._translated = {}
+    self._formatted = {}
+
+  def Get(self, message):
+    """Translates one of the messages above.
+
+    Args:
+      message: The English message.
+    """
+
+    if self._default:
+      return message
+    translated = self._translated.get(message)
+    if translated is None:
+      translated = self._translated[message] = _GetCatalog(
+          self.locale).gettext(message)
+    return translated
+
+  def Format(self, message, *args):
+    """Translates and formats one of the messages above, with caching.
+
+    Args:
+      message: The English message.
+      args: The values substituted into the message.
+    """
+
+    key = (message, args)
+    formatted = self._formatted.get(key)
+    if formatted is None:
+      if len(self._formatted) >= MAX_FORMATTED:
+        self._formatted.clear()
+      formatted = self._formatted[key] = self.Get(message) % args
+    return formatted
+
   def GetYouString(self, position):
     """Retrieves the corresponding you string.
 
@@ -36,7 +124,7 @@ class StringResources(object):
       position: The position the user place their move.
     """
 
-    return StringResources.YOU_STRING % position
+    return self.Format(StringResources.YOU_STRING, position)
 
   def GetIString(self, position):
     """Retrieves the corresponding you string.
@@ -45,7 +133,7 @@ class StringResources(object):
       position: The position the user place their move.
     """
 
-    return StringResources.I_STRING % position
+    return self.Format(StringResources.I_STRING, position)
 
   def GetWinnerString(self, board_value):
     """Returns a string that indicates the winner.
@@ -55,7 +143,34 @@ class StringResources(object):
     """
 
     if board_value == board.BoardValue.X:
-      return StringResources.YOU_WIN
+      return self.Get(StringResources.YOU_WIN)
     if board_value == board.BoardValue.O:
-      return StringResources.I_WIN
-    return StringResources.DRAW
+      return self.Get(StringResources.I_WIN)
+    return self.Get(StringResources.DRAW)
+
+  def GetSummaryString(self, x_wins, o_wins, draws):
+    """Returns the summary of a session.
+
+    Args:
+      x_wins: The number of times the X player has won.
+      o_wins: The number of times the O player has won.
+      draws: The number of times a draw has occurred.
+    """
+
+    return self.Format(StringResources.SUMMARY, x_wins, o_wins, draws)
+
+
+def GetResources(locale=None):
+  """Returns the StringResources of a locale, shared by every caller.
+
+  Args:
+    locale: The locale name, None for English.
+  """
+
+  resources = _resources.get(locale)
+  if resources is None:
+    with _lock:
+      resources = _resources.get(locale)
+      if resources is None:
+        resources = _resources[locale] = StringResources(locale)
+  return resources
@@ -0,0 +1,115 @@
+"""Tests that correspond to string_resources."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+from i18n import string_resources
+from model import board
+
+
+_FRENCH = {
+    string_resources.StringResources.WELCOME: "Bienvenue au Tic-Tac-Toe.",
+    string_resources.StringResources.I_STRING:
+        "Je mets un O en position %03d.",
+    string_resources.StringResources.DRAW: "Match nul !",
+}
+
+
+def _WriteCatalog(path, messages):
+  """Writes messages as a GNU gettext .mo file without a hash table."""
+
+  keys = sorted(messages)
+  originals = "".join(key + "\0" for key in keys)
+  translations = "".join(messages[key] + "\0" for key in keys)
+  header_size = 7 * 4
+  tables_size = 2 * 8 * len(keys)
+  offset = header_size + tables_size
+  original_table = []
+  for key in keys:
+    original_table.append((len(key), offset))
+    offset += len(key) + 1
+  translation_table = []
+  for key in keys:
+    translation_table.append((len(messages[key]), offset))
+    offset += len(messages[key]) + 1
+  with open(path, "wb") as stream:
+    stream.write(struct.pack("<7I", 0x950412de, 0, len(keys), header_size,
+                             header_size + tables_size / 2, 0, 0))
+    for length, start in original_table + translation_table:
+      stream.write(struct.pack("<2I", length, start))
+    stream.write(originals)
+    stream.write(translations)
+
+
+class StringResourcesTest(unittest.TestCase):
+  """Class that tests StringResources functions."""
+
+  def setUp(self):
+    directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, directory)
+    messages = os.path.join(directory, "fr", "LC_MESSAGES")
+    os.makedirs(messages)
+    _WriteCatalog(os.path.join(messages, string_resources.DOMAIN + ".mo"),
+                  _FRENCH)
+
+    self.addCleanup(setattr, string_resources, "LOCALE_DIR",
+                    string_resources.LOCALE_DIR)
+    string_resources.LOCALE_DIR = directory
+    # Start from, and restore, the shared caches.
+    for cache in (string_resources._catalogs, string_resources._resources):
+      self.addCleanup(cache.update, dict(cache))
+      self.addCleanup(cache.clear)
+      cache.clear()
+
+  def testLocale(self):
+    resources = string_resources.GetResources("fr")
+    self.assertEqual("Bienvenue au Tic-Tac-Toe.", resources.Get(
+        string_resources.StringResources.WELCOME))
+    self.assertEqual("Match nul !",
+                     resources.GetWinnerString(board.BoardValue.NONE))
+    self.assertIs(resources, string_resources.GetResources("fr"))
+
+  def testFallbackToEnglish(self):
+    # A message missing from the catalog.
+    self.assertEqual(string_resources.StringResources.YOU_WIN,
+                     string_resources.GetResources("fr").GetWinnerString(
+                         board.BoardValue.X))
+    # A locale without a catalog.
+    self.assertEqual(string_resources.StringResources.WELCOME,
+                     string_resources.GetResources("de").Get(
+                         string_resources.StringResources.WELCOME))
+    self.assertEqual("You have put an X in position 004.",
+                     string_resources.GetResources(None).GetYouString(4))
+
+  def testFormatCaching(self):
+    resources = string_resources.GetResources("fr")
+    formatted = resources.GetIString(7)
+    self.assertEqual("Je mets un O en position 007.", formatted)
+    self.assertIs(formatted, resources.GetIString(7))
+    self.assertEqual("Je mets un O en position 008.", resources.GetIString(8))
+
+    self.addCleanup(setattr, string_resources, "MAX_FORMATTED",
+                    string_resources.MAX_FORMATTED)
+    string_resources.MAX_FORMATTED = 2
+    resources.GetIString(9)
+    self.assertEqual(1, len(resources._formatted))
+
+  def testLazyLoading(self):
+    resources = string_resources.GetResources("fr")
+    self.assertNotIn("fr", string_resources._catalogs)
+    resources.Get(string_resources.StringResources.WELCOME)
+    self.assertIn("fr", string_resources._catalogs)
+
+    # English never loads a catalog.
+    string_resources.GetResources("en_US").Get(
+        string_resources.StringResources.WELCOME)
+    self.assertEqual(["fr"], string_resources._catalogs.keys())
+
+
+if __name__ == '__main__':
+  unittest.main()
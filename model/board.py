@@ -3,6 +3,9 @@
 __author__ = "Rishi Sharma (rishsharma@gmail.com)"
 
 
+import struct
+
+
 class InvalidBoardSetting(Exception):
   """Thrown when an invalid setting is attempted on the Board."""
 
@@ -17,6 +20,10 @@ class BoardValue(object):
   NONE, O, X = xrange(3)
   ALL_VALUES = (NONE, O, X)
 
+  # Single character codes used by the compact position string format.
+  _CHAR_MAP = {NONE: ".", O: "O", X: "X"}
+  _VALUE_MAP = {".": NONE, "O": O, "X": X}
+
   @staticmethod
   def ToString(board_value):
     """Converts an enumeration value into its string counterpart.
@@ -40,6 +47,52 @@ class BoardValue(object):
 
     raise InvalidBoardSetting()
 
+  @staticmethod
+  def ToChar(board_value):
+    """Converts an enumeration value into its position string character.
+
+    Args:
+      board_value: A BoardValue to be converted.
+
+    Returns:
+      "X", "O" or "." for an empty cell.
+
+    Raises:
+      InvalidBoardSetting if the value is not a BoardValue.
+    """
+
+    try:
+      return BoardValue._CHAR_MAP[board_value]
+    except KeyError:
+      raise InvalidBoardSetting()
+
+  @staticmethod
+  def FromChar(char):
+    """Converts a position string character into its enumeration value.
+
+    Args:
+      char: One of "X", "O" or "." (case insensitive for X and O).
+
+    Returns:
+      The matching BoardValue.
+
+    Raises:
+      InvalidBoardSetting if the character is not recognized.
+    """
+
+    try:
+      return BoardValue._VALUE_MAP[char.upper()]
+    except KeyError:
+      raise InvalidBoardSetting("Unknown board character: %r" % char)
+
+  @staticmethod
+  def Other(board_value):
+    """Returns the opponent of the given user's BoardValue."""
+
+    if board_value == BoardValue.X:
+      return BoardValue.O
+    return BoardValue.X
+
 
 class UserSentinel(object):
   """Object structure used for determination of winner in O(1) time."""
@@ -58,6 +111,18 @@ class UserSentinel(object):
     self.diagonal_asc_counter = 0
     self.is_winner = False
 
+  def Copy(self):
+    """Returns an independent copy of the sentinel."""
+
+    clone = UserSentinel.__new__(UserSentinel)
+    clone.dimension = self.dimension
+    clone.row_counter = self.row_counter[:]
+    clone.col_counter = self.col_counter[:]
+    clone.diagonal_desc_counter = self.diagonal_desc_counter
+    clone.diagonal_asc_counter = self.diagonal_asc_counter
+    clone.is_winner = self.is_winner
+    return clone
+
   def Update(self, row, col):
     """Updates the various trackers with the result of a move on the board.
 
@@ -90,6 +155,18 @@ class UserSentinel(object):
     return self.is_winner
 
 
+# Header of the packed format: the dimension as an unsigned short.
+_PACKED_HEADER = struct.Struct(">H")
+
+# Cells are packed 5 to a byte as base 3 digits, least significant first.
+_CELLS_PER_BYTE = 5
+
+# Maps a packed byte to the tuple of the 5 BoardValues it holds.
+_UNPACK_TABLE = tuple(
+    tuple((byte // 3 ** index) % 3 for index in xrange(_CELLS_PER_BYTE))
+    for byte in xrange(3 ** _CELLS_PER_BYTE))
+
+
 class Board(object):
   """A Tic Tac Toe Board."""
 
@@ -105,9 +182,17 @@ class Board(object):
 
     self._board = []
     self._set_counter = 0
+    # The number of IsWinner calls made on this board, read by the metrics.
+    # Copies start from 0, so searches on copies in other threads are not
+    # counted and never race with the owner of the board.
+    self.is_winner_calls = 0
     self._user_x_sentinel = UserSentinel(dimension)
     self._user_o_sentinel = UserSentinel(dimension)
 
+    # None if every row list is owned by this board, otherwise a flag per row
+    # that is False while the row list is shared with a snapshot.
+    self._row_owned = None
+
     if dimension is None:
       dimension = Board.DEFAULT_DIMENSION
 
@@ -155,10 +240,8 @@ class Board(object):
       InvalidBoardPosition if the position is invalid.
     """
 
-    if 0 <= position <= self.dimension * self.dimension - 1:
-      row = int(position / self.dimension)
-      col = int(position % self.dimension)
-      return row, col
+    if 0 <= position < self.dimension * self.dimension:
+      return position // self.dimension, position % self.dimension
     raise InvalidBoardPosition()
 
   def SetPosition(self, position, board_value):
@@ -207,6 +290,11 @@ class Board(object):
     if self._board[row][col] != BoardValue.NONE:
       raise InvalidBoardSetting("row: %s, col: %s" % (row, col))
 
+    row_owned = self._row_owned
+    if row_owned is not None and not row_owned[row]:
+      self._board[row] = self._board[row][:]
+      row_owned[row] = True
+
     self._board[row][col] = board_value
     self._set_counter += 1
     if board_value == BoardValue.X:
@@ -227,8 +315,12 @@ class Board(object):
       InvalidBoardPosition if the position is invalid.
     """
 
-    row, col = self.ToCoordinates(position)
-    return self.GetFromCoordinates(row, col)
+    # Indexes the rows directly rather than building a coordinate tuple, as
+    # this is called for every cell probed by the strategies.
+    dimension = self.dimension
+    if 0 <= position < dimension * dimension:
+      return self._board[position // dimension][position % dimension]
+    raise InvalidBoardPosition()
 
   def GetFromCoordinates(self, row, col):
     """Retrieves a board value from the row and column.
@@ -250,6 +342,11 @@ class Board(object):
 
     return self._set_counter == (self.dimension * self.dimension)
 
+  def CountEmpty(self):
+    """Returns the number of positions that are still available."""
+
+    return self.dimension * self.dimension - self._set_counter
+
   def IsValidMoveFromPosition(self, position):
     """Determines if the spot referred to by a given position is available.
 
@@ -289,6 +386,12 @@ class Board(object):
       BoardValue.NONE if moves can still be made.
     """
 
+    self.is_winner_calls += 1
+    return self._GetWinner()
+
+  def _GetWinner(self):
+    """IsWinner without counting the call."""
+
     if self._user_x_sentinel.IsWinner():
       return BoardValue.X
     if self._user_o_sentinel.IsWinner():
@@ -389,6 +492,197 @@ class Board(object):
 
     return -1
 
+  def GetSideToMove(self):
+    """Determines whose turn it is, assuming X always plays first.
+
+    Returns:
+      BoardValue.X if both users have made the same number of moves,
+      BoardValue.O otherwise.
+    """
+
+    if sum(self._user_x_sentinel.row_counter) > sum(
+        self._user_o_sentinel.row_counter):
+      return BoardValue.O
+    return BoardValue.X
+
+  def ToPositionString(self):
+    """Serializes the board into the compact position string format.
+
+    The format is one character per cell in position order: "X", "O" or "."
+    for an empty cell.  The dimension is implied by the length.
+
+    Returns:
+      A string of length self.dimension * self.dimension.
+    """
+
+    char_map = BoardValue._CHAR_MAP
+    return "".join(char_map[value] for row in self._board for value in row)
+
+  @staticmethod
+  def FromPositionString(text):
+    """Builds a Board from the compact position string format.
+
+    Args:
+      text: A string as produced by ToPositionString.  Surrounding whitespace
+          is ignored.
+
+    Returns:
+      A new Board with the cells set.
+
+    Raises:
+      InvalidBoardSetting if the string is not a square number of valid
+      characters.
+    """
+
+    text = text.strip()
+    dimension = int(round(len(text) ** 0.5))
+    if dimension < 1 or dimension * dimension != len(text):
+      raise InvalidBoardSetting("Position length %d is not square" % len(text))
+
+    play_board = Board(dimension)
+    for position, char in enumerate(text):
+      board_value = BoardValue.FromChar(char)
+      if board_value != BoardValue.NONE:
+        play_board.SetPosition(position, board_value)
+    return play_board
+
+  @staticmethod
+  def PackedSize(dimension):
+    """Returns the number of bytes ToBytes produces for a dimension."""
+
+    cells = dimension * dimension
+    return _PACKED_HEADER.size + (cells + _CELLS_PER_BYTE - 1) // _CELLS_PER_BYTE
+
+  def ToBytes(self):
+    """Serializes the board into the packed base 3 format.
+
+    The format is the dimension as a big endian unsigned short followed by
+    the cells in position order, 5 to a byte as base 3 digits (BoardValue
+    values) with the first cell least significant.
+
+    Returns:
+      A string of Board.PackedSize(self.dimension) bytes.
+    """
+
+    values = [value for row in self._board for value in row]
+    packed = bytearray(_PACKED_HEADER.pack(self.dimension))
+    for index in xrange(0, len(values), _CELLS_PER_BYTE):
+      byte = 0
+      for value in reversed(values[index:index + _CELLS_PER_BYTE]):
+        byte = byte * 3 + value
+      packed.append(byte)
+    return str(packed)
+
+  @staticmethod
+  def FromBytes(data, offset=0):
+    """Builds a Board from the packed base 3 format.
+
+    The cells and the sentinels are rebuilt in a single pass.
+
+    Args:
+      data: A string or any object supporting the buffer interface, e.g. a
+          bytearray, mmap or memoryview slice of a larger buffer.  It is read
+          in place without being copied.
+      offset: The byte offset of the packed board within data.
+
+    Returns:
+      A new Board.
+
+    Raises:
+      InvalidBoardSetting if the data is truncated or holds invalid cells.
+    """
+
+    try:
+      dimension, = _PACKED_HEADER.unpack_from(data, offset)
+      cells = dimension * dimension
+      num_bytes = (cells + _CELLS_PER_BYTE - 1) // _CELLS_PER_BYTE
+      packed = struct.unpack_from("%dB" % num_bytes, data,
+                                  offset + _PACKED_HEADER.size)
+    except struct.error as ex:
+      raise InvalidBoardSetting("Truncated board data: %s" % ex)
+    if dimension < 1:
+      raise InvalidBoardSetting("Invalid dimension: %d" % dimension)
+
+    play_board = Board(dimension)
+    sentinels = {BoardValue.X: play_board._user_x_sentinel,
+                 BoardValue.O: play_board._user_o_sentinel}
+    last = dimension - 1
+    position = 0
+    for byte in packed:
+      if byte >= len(_UNPACK_TABLE):
+        raise InvalidBoardSetting("Invalid packed byte: %d" % byte)
+      for board_value in _UNPACK_TABLE[byte]:
+        if position == cells:
+          break
+        if board_value != BoardValue.NONE:
+          row, col = divmod(position, dimension)
+          play_board._board[row][col] = board_value
+          play_board._set_counter += 1
+          sentinel = sentinels[board_value]
+          sentinel.row_counter[row] += 1
+          sentinel.col_counter[col] += 1
+          if row == col:
+            sentinel.diagonal_desc_counter += 1
+          if row == last - col:
+            sentinel.diagonal_asc_counter += 1
+        position += 1
+
+    for sentinel in sentinels.itervalues():
+      sentinel.is_winner = (dimension in sentinel.row_counter
+                            or dimension in sentinel.col_counter
+                            or dimension in (sentinel.diagonal_desc_counter,
+                                             sentinel.diagonal_asc_counter))
+    return play_board
+
+  def _Clone(self, board_rows):
+    """Returns a board with the given rows and copies of the sentinels."""
+
+    clone = Board.__new__(Board)
+    clone.dimension = self.dimension
+    clone._board = board_rows
+    clone._set_counter = self._set_counter
+    clone.is_winner_calls = 0
+    clone._user_x_sentinel = self._user_x_sentinel.Copy()
+    clone._user_o_sentinel = self._user_o_sentinel.Copy()
+    clone._row_owned = None
+    return clone
+
+  def Copy(self):
+    """Returns an independent copy of the board.
+
+    Much cheaper than copy.deepcopy, which also uses this method.
+    """
+
+    return self._Clone([row[:] for row in self._board])
+
+  def Snapshot(self):
+    """Returns a copy-on-write copy of the board.
+
+    The snapshot shares the row lists of this board until either board writes
+    to a row, at which point the writer copies that row.  Taking a snapshot
+    is O(dimension) rather than O(dimension ** 2), which suits search code
+    that branches from the same position many times.
+
+    Returns:
+      A new Board that can be modified independently of this one.
+    """
+
+    snapshot = self._Clone(self._board[:])
+    self._row_owned = [False] * self.dimension
+    snapshot._row_owned = [False] * self.dimension
+    return snapshot
+
+  def __copy__(self):
+    return self.Copy()
+
+  def __deepcopy__(self, memo):
+    return self.Copy()
+
+  def __reduce__(self):
+    """Pickles the board in the packed format."""
+
+    return _UnpickleBoard, (self.ToBytes(),)
+
   def __str__(self):
     """String override to pretty print the board."""
 
@@ -403,3 +697,9 @@ class Board(object):
         index += 1
       rv = rv[:-2] + "\n"
     return rv
+
+
+def _UnpickleBoard(data):
+  """Rebuilds a pickled Board.  Static methods cannot be pickled directly."""
+
+  return Board.FromBytes(data)
@@ -0,0 +1,204 @@
+"""Immutable Tic Tac Toe board states for concurrent search."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+from model import board
+
+
+class FrozenSentinel(object):
+  """Immutable equivalent of board.UserSentinel."""
+
+  __slots__ = ("dimension", "row_counter", "col_counter",
+               "diagonal_desc_counter", "diagonal_asc_counter", "is_winner")
+
+  def __init__(self, dimension, row_counter, col_counter,
+               diagonal_desc_counter, diagonal_asc_counter, is_winner):
+    """Initializes the sentinel.
+
+    Args:
+      dimension: The dimension of the board.
+      row_counter: A tuple with the number of plays in each row.
+      col_counter: A tuple with the number of plays in each column.
+      diagonal_desc_counter: The number of plays in the descending diagonal.
+      diagonal_asc_counter: The number of plays in the ascending diagonal.
+      is_winner: Whether the user has won.
+    """
+
+    self.dimension = dimension
+    self.row_counter = row_counter
+    self.col_counter = col_counter
+    self.diagonal_desc_counter = diagonal_desc_counter
+    self.diagonal_asc_counter = diagonal_asc_counter
+    self.is_winner = is_winner
+
+  @staticmethod
+  def FromSentinel(sentinel):
+    """Freezes a board.UserSentinel."""
+
+    return FrozenSentinel(sentinel.dimension, tuple(sentinel.row_counter),
+                          tuple(sentinel.col_counter),
+                          sentinel.diagonal_desc_counter,
+                          sentinel.diagonal_asc_counter, sentinel.is_winner)
+
+  def Update(self, row, col):
+    """Returns the sentinel that results from a move.
+
+    Note: This does not validate the row/col pair.
+
+    Args:
+      row: The row the play was made in.
+      col: The column the play was made in.
+    """
+
+    dimension = self.dimension
+    row_count = self.row_counter[row] + 1
+    col_count = self.col_counter[col] + 1
+    desc_count = self.diagonal_desc_counter + (row == col)
+    asc_count = self.diagonal_asc_counter + (dimension - col - 1 == row)
+    return FrozenSentinel(
+        dimension,
+        self.row_counter[:row] + (row_count,) + self.row_counter[row + 1:],
+        self.col_counter[:col] + (col_count,) + self.col_counter[col + 1:],
+        desc_count, asc_count,
+        dimension in (row_count, col_count, desc_count, asc_count))
+
+  def IsWinner(self):
+    """Indicates whether this user has won."""
+
+    return self.is_winner
+
+
+class BoardState(board.Board):
+  """An immutable board.Board.
+
+  Play returns a new state that shares every untouched row, and the
+  sentinel of the user that did not move, with its parent.  States are never
+  modified after construction and can be shared freely between threads.  The
+  query API is that of board.Board; the setters raise InvalidBoardSetting.
+  """
+
+  def __init__(self, dimension=None):
+    """Initializes an empty state.
+
+    Args:
+      dimension: The length of the board to be played.  If None the default
+          value of Board.DEFAULT_DIMENSION is used.
+    """
+
+    if dimension is None:
+      dimension = board.Board.DEFAULT_DIMENSION
+
+    if dimension < 1:
+      raise RuntimeError("Dimension must be greater than 0.")
+
+    empty_counter = (0,) * dimension
+    empty_sentinel = FrozenSentinel(dimension, empty_counter, empty_counter,
+                                    0, 0, False)
+    self.dimension = dimension
+    self._board = ((board.BoardValue.NONE,) * dimension,) * dimension
+    self._set_counter = 0
+    self._user_x_sentinel = empty_sentinel
+    self._user_o_sentinel = empty_sentinel
+    self._row_owned = None
+
+  @staticmethod
+  def FromBoard(play_board):
+    """Returns the state equivalent to a board.Board."""
+
+    state = BoardState.__new__(BoardState)
+    state.dimension = play_board.dimension
+    state._board = tuple(tuple(row) for row in play_board._board)
+    state._set_counter = play_board._set_counter
+    state._user_x_sentinel = FrozenSentinel.FromSentinel(
+        play_board._user_x_sentinel)
+    state._user_o_sentinel = FrozenSentinel.FromSentinel(
+        play_board._user_o_sentinel)
+    state._row_owned = None
+    return state
+
+  def ToBoard(self):
+    """Returns a mutable board.Board equivalent to this state."""
+
+    return board.Board.FromBytes(self.ToBytes())
+
+  def Play(self, position, board_value=None):
+    """Returns the state that results from a move.
+
+    Args:
+      position: The position to play.
+      board_value: The BoardValue to play.  If None the side to move, as
+          given by GetSideToMove, is used.
+
+    Returns:
+      A new BoardState.
+
+    Raises:
+      InvalidBoardPosition if the position is invalid.
+      InvalidBoardSetting if the position is already taken.
+    """
+
+    if board_value is None:
+      board_value = self.GetSideToMove()
+    elif board_value not in (board.BoardValue.X, board.BoardValue.O):
+      raise board.InvalidBoardSetting("board_value must be X or O")
+
+    row, col = self.ToCoordinates(position)
+    old_row = self._board[row]
+    if old_row[col] != board.BoardValue.NONE:
+      raise board.InvalidBoardSetting("row: %s, col: %s" % (row, col))
+
+    state = BoardState.__new__(BoardState)
+    state.dimension = self.dimension
+    state._board = (self._board[:row]
+                    + (old_row[:col] + (board_value,) + old_row[col + 1:],)
+                    + self._board[row + 1:])
+    state._set_counter = self._set_counter + 1
+    state._row_owned = None
+    if board_value == board.BoardValue.X:
+      state._user_x_sentinel = self._user_x_sentinel.Update(row, col)
+      state._user_o_sentinel = self._user_o_sentinel
+    else:
+      state._user_x_sentinel = self._user_x_sentinel
+      state._user_o_sentinel = self._user_o_sentinel.Update(row, col)
+    return state
+
+  def SetPosition(self, position, board_value):
+    """Not supported, use Play instead."""
+
+    raise board.InvalidBoardSetting("BoardState is immutable, use Play.")
+
+  def SetCoordinates(self, row, col, board_value):
+    """Not supported, use Play instead."""
+
+    raise board.InvalidBoardSetting("BoardState is immutable, use Play.")
+
+  def IsWinner(self):
+    """Determines if the state has a winner.
+
+    States are shared between threads, so unlike boards they do not count
+    the calls.
+    """
+
+    return self._GetWinner()
+
+  def Copy(self):
+    """States are immutable, so the copy is the state itself."""
+
+    return self
+
+  def Snapshot(self):
+    """States are immutable, so the snapshot is the state itself."""
+
+    return self
+
+  def __reduce__(self):
+    """Pickles the state in the packed format."""
+
+    return _UnpickleBoardState, (self.ToBytes(),)
+
+
+def _UnpickleBoardState(data):
+  """Rebuilds a pickled BoardState."""
+
+  return BoardState.FromBoard(board.Board.FromBytes(data))
@@ -0,0 +1,82 @@
+"""Tests that correspond to board_state."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+import pickle
+import unittest
+
+from controller import strategy
+from model import board
+from model import board_state
+
+
+class BoardStateTest(unittest.TestCase):
+  """Class that tests BoardState functions."""
+
+  def testPlay(self):
+    root = board_state.BoardState(3)
+    child = root.Play(0)
+    grandchild = child.Play(4)
+    self.assertEqual(".........", root.ToPositionString())
+    self.assertEqual("X........", child.ToPositionString())
+    self.assertEqual("X...O....", grandchild.ToPositionString())
+    self.assertEqual(board.BoardValue.X, grandchild.GetSideToMove())
+    self.assertEqual(2, grandchild._set_counter)
+
+    # Untouched rows and the other user's sentinel are shared.
+    self.assertIs(child._board[2], grandchild._board[2])
+    self.assertIs(child._user_x_sentinel, grandchild._user_x_sentinel)
+
+    self.assertRaises(board.InvalidBoardSetting, child.Play, 0)
+    self.assertRaises(board.InvalidBoardPosition, child.Play, 9)
+    self.assertRaises(board.InvalidBoardSetting, child.SetPosition, 1,
+                      board.BoardValue.O)
+
+  def testQueriesMatchBoard(self):
+    moves = (0, 4, 1, 2, 6, 3, 5, 7, 8)
+    state = board_state.BoardState(3)
+    play_board = board.Board(3)
+    for position in moves:
+      board_value = play_board.GetSideToMove()
+      state = state.Play(position)
+      play_board.SetPosition(position, board_value)
+      self.assertEqual(play_board.ToPositionString(), state.ToPositionString())
+      self.assertEqual(play_board.IsWinner(), state.IsWinner())
+      self.assertEqual(play_board.IsFull(), state.IsFull())
+      for value in (board.BoardValue.X, board.BoardValue.O):
+        for index in xrange(3):
+          self.assertEqual(play_board.IsRowPossible(index, value),
+                           state.IsRowPossible(index, value))
+          self.assertEqual(play_board.IsColumnPossible(index, value),
+                           state.IsColumnPossible(index, value))
+        self.assertEqual(play_board.IsAscendingDiagonalPossible(value),
+                         state.IsAscendingDiagonalPossible(value))
+        self.assertEqual(play_board.IsDescendingDiagonalPossible(value),
+                         state.IsDescendingDiagonalPossible(value))
+
+  def testWinner(self):
+    state = board_state.BoardState(3)
+    for position in (2, 0, 4, 1, 6):
+      state = state.Play(position)
+    self.assertEqual(board.BoardValue.X, state.IsWinner())
+
+  def testConversions(self):
+    play_board = board.Board.FromPositionString("XO..X....")
+    state = board_state.BoardState.FromBoard(play_board)
+    self.assertEqual("XO..X....", state.ToPositionString())
+    self.assertEqual(8, strategy.GetNextMove(state, board.BoardValue.O))
+    self.assertEqual(8, strategy.GetNextMove(play_board, board.BoardValue.O))
+
+    round_trip = state.ToBoard()
+    self.assertIsInstance(round_trip, board.Board)
+    round_trip.SetPosition(8, board.BoardValue.O)
+    self.assertEqual("XO..X....", state.ToPositionString())
+
+    unpickled = pickle.loads(pickle.dumps(state, 2))
+    self.assertIsInstance(unpickled, board_state.BoardState)
+    self.assertEqual("XO..X....", unpickled.ToPositionString())
+
+
+if __name__ == '__main__':
+  unittest.main()
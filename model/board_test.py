@@ -3,6 +3,8 @@
 __author__ = "rishsharma@gmail.com"
 
 
+import copy
+import pickle
 import unittest
 
 from model import board
@@ -17,6 +19,14 @@ class BoardValueTest(unittest.TestCase):
     self.assertEqual(" ", board.BoardValue.ToString(board.BoardValue.NONE))
     self.assertRaises(board.InvalidBoardSetting, board.BoardValue.ToString, "Z")
 
+  def testCharConversion(self):
+    for board_value in board.BoardValue.ALL_VALUES:
+      self.assertEqual(board_value, board.BoardValue.FromChar(
+          board.BoardValue.ToChar(board_value)))
+    self.assertEqual(board.BoardValue.X, board.BoardValue.FromChar("x"))
+    self.assertRaises(board.InvalidBoardSetting, board.BoardValue.FromChar, "Z")
+    self.assertRaises(board.InvalidBoardSetting, board.BoardValue.ToChar, 7)
+
 
 class UserSentinelTest(unittest.TestCase):
   """Class that tests the UserSentinel object."""
@@ -154,6 +164,15 @@ class BoardTest(unittest.TestCase):
     play_board.SetPosition(8, board.BoardValue.O)
     self.assertIsNone(play_board.IsWinner())
 
+  def testIsWinnerCalls(self):
+    play_board = board.Board(3)
+    play_board.IsWinner()
+    copy = play_board.Copy()
+    copy.IsWinner()
+    copy.Snapshot().IsWinner()
+    self.assertEqual(1, play_board.is_winner_calls)
+    self.assertEqual(1, copy.is_winner_calls)
+
   def testIsDescendingDiagonalPossible(self):
     play_board = board.Board(3)
     self.assertEqual(0, play_board.IsDescendingDiagonalPossible(
@@ -188,6 +207,118 @@ class BoardTest(unittest.TestCase):
     self.assertEqual(-1, play_board.IsColumnPossible(2, board.BoardValue.X))
     self.assertEqual(1, play_board.IsColumnPossible(2, board.BoardValue.O))
 
+  def testPositionString(self):
+    play_board = board.Board(3)
+    self.assertEqual(".........", play_board.ToPositionString())
+    play_board.SetPosition(0, board.BoardValue.X)
+    play_board.SetPosition(4, board.BoardValue.O)
+    self.assertEqual("X...O....", play_board.ToPositionString())
+
+    parsed_board = board.Board.FromPositionString("X...O....\n")
+    self.assertEqual(3, parsed_board.dimension)
+    self.assertEqual(board.BoardValue.X, parsed_board.GetFromPosition(0))
+    self.assertEqual(board.BoardValue.O, parsed_board.GetFromPosition(4))
+    self.assertEqual(1, parsed_board.IsRowPossible(0, board.BoardValue.X))
+    self.assertEqual(1, parsed_board.IsRowPossible(1, board.BoardValue.O))
+
+    self.assertRaises(board.InvalidBoardSetting,
+                      board.Board.FromPositionString, "X...O...")
+    self.assertRaises(board.InvalidBoardSetting,
+                      board.Board.FromPositionString, "X...Z....")
+
+  def testGetSideToMove(self):
+    play_board = board.Board(3)
+    self.assertEqual(board.BoardValue.X, play_board.GetSideToMove())
+    play_board.SetPosition(0, board.BoardValue.X)
+    self.assertEqual(board.BoardValue.O, play_board.GetSideToMove())
+    play_board.SetPosition(1, board.BoardValue.O)
+    self.assertEqual(board.BoardValue.X, play_board.GetSideToMove())
+
+  def testToBytes(self):
+    play_board = board.Board.FromPositionString("XOX.O.X..")
+    self.assertEqual(board.Board.PackedSize(3), len(play_board.ToBytes()))
+    self.assertEqual(4, board.Board.PackedSize(3))
+    self.assertEqual(2 + 80, board.Board.PackedSize(20))
+    # X=2, O=1, X=2, NONE, O=1 in base 3 least significant first is 104.
+    self.assertEqual("\x00\x03\x68\x06", play_board.ToBytes())
+
+  def testFromBytes(self):
+    for text in ("X........", "XOX.O.X..", "XXXOO....", "X..OX.O.X",
+                 "OXOXO...O", "X" + "." * 24):
+      play_board = board.Board.FromPositionString(text)
+      parsed_board = board.Board.FromBytes(play_board.ToBytes())
+      self.assertEqual(text, parsed_board.ToPositionString())
+      self.assertEqual(play_board.IsWinner(), parsed_board.IsWinner())
+      self.assertEqual(play_board.IsFull(), parsed_board.IsFull())
+      for board_value in (board.BoardValue.X, board.BoardValue.O):
+        for index in xrange(play_board.dimension):
+          self.assertEqual(play_board.IsRowPossible(index, board_value),
+                           parsed_board.IsRowPossible(index, board_value))
+          self.assertEqual(play_board.IsColumnPossible(index, board_value),
+                           parsed_board.IsColumnPossible(index, board_value))
+        self.assertEqual(
+            play_board.IsAscendingDiagonalPossible(board_value),
+            parsed_board.IsAscendingDiagonalPossible(board_value))
+        self.assertEqual(
+            play_board.IsDescendingDiagonalPossible(board_value),
+            parsed_board.IsDescendingDiagonalPossible(board_value))
+
+  def testFromBytesBuffer(self):
+    packed = board.Board.FromPositionString("XOX.O.X..").ToBytes()
+    buf = bytearray("head" + packed + "tail")
+    self.assertEqual("XOX.O.X..", board.Board.FromBytes(
+        memoryview(buf)[4:]).ToPositionString())
+    self.assertEqual("XOX.O.X..", board.Board.FromBytes(
+        buf, 4).ToPositionString())
+
+  def testFromBytesInvalid(self):
+    self.assertRaises(board.InvalidBoardSetting, board.Board.FromBytes, "\x00")
+    self.assertRaises(board.InvalidBoardSetting,
+                      board.Board.FromBytes, "\x00\x00")
+    self.assertRaises(board.InvalidBoardSetting,
+                      board.Board.FromBytes, "\x00\x03\x00")
+    self.assertRaises(board.InvalidBoardSetting,
+                      board.Board.FromBytes, "\x00\x03\xff\x00")
+
+  def testCopy(self):
+    play_board = board.Board.FromPositionString("X...O....")
+    copied_board = play_board.Copy()
+    copied_board.SetPosition(1, board.BoardValue.X)
+    play_board.SetPosition(2, board.BoardValue.O)
+    self.assertEqual("X.O.O....", play_board.ToPositionString())
+    self.assertEqual("XX..O....", copied_board.ToPositionString())
+    self.assertEqual(-1, play_board.IsRowPossible(0, board.BoardValue.X))
+    self.assertEqual(2, copied_board.IsRowPossible(0, board.BoardValue.X))
+    self.assertEqual(
+        "XX..O....", copy.deepcopy(copied_board).ToPositionString())
+
+  def testSnapshot(self):
+    play_board = board.Board.FromPositionString("X...O....")
+    first = play_board.Snapshot()
+    second = play_board.Snapshot()
+    first.SetPosition(1, board.BoardValue.X)
+    second.SetPosition(2, board.BoardValue.X)
+    play_board.SetPosition(3, board.BoardValue.X)
+    self.assertEqual("X..XO....", play_board.ToPositionString())
+    self.assertEqual("XX..O....", first.ToPositionString())
+    self.assertEqual("X.X.O....", second.ToPositionString())
+
+    # Untouched rows are still shared.
+    self.assertIs(play_board._board[2], first._board[2])
+    self.assertIsNot(play_board._board[0], first._board[0])
+
+    # Snapshots of snapshots.
+    third = first.Snapshot()
+    third.SetPosition(2, board.BoardValue.X)
+    self.assertEqual("XX..O....", first.ToPositionString())
+    self.assertEqual(board.BoardValue.X, third.IsWinner())
+    self.assertEqual(board.BoardValue.NONE, first.IsWinner())
+
+  def testPickle(self):
+    play_board = board.Board.FromPositionString("XOX.O.X..")
+    unpickled_board = pickle.loads(pickle.dumps(play_board, 2))
+    self.assertEqual("XOX.O.X..", unpickled_board.ToPositionString())
+
 
 if __name__ == '__main__':
   unittest.main()
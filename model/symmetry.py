@@ -0,0 +1,98 @@
+"""Symmetries of a square Tic Tac Toe board.
+
+Positions are handled in the compact position string format of
+board.Board.ToPositionString.  A transform is a permutation tuple such that
+the transformed position holds text[permutation[i]] at index i, i.e.
+permutation maps a transformed position back to the original position.
+"""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+_TRANSFORMS = {}
+
+
+def GetTransforms(dimension):
+  """Returns the 8 symmetries of a board of the given dimension.
+
+  The identity transform is always first.
+
+  Args:
+    dimension: The dimension of the board.
+
+  Returns:
+    A tuple of permutation tuples.
+  """
+
+  transforms = _TRANSFORMS.get(dimension)
+  if transforms is not None:
+    return transforms
+
+  last = dimension - 1
+  mappings = (lambda row, col: (row, col),
+              lambda row, col: (col, last - row),
+              lambda row, col: (last - row, last - col),
+              lambda row, col: (last - col, row),
+              lambda row, col: (row, last - col),
+              lambda row, col: (last - row, col),
+              lambda row, col: (col, row),
+              lambda row, col: (last - col, last - row))
+  transforms = []
+  for mapping in mappings:
+    permutation = []
+    for position in xrange(dimension * dimension):
+      row, col = mapping(*divmod(position, dimension))
+      permutation.append(row * dimension + col)
+    transforms.append(tuple(permutation))
+
+  transforms = tuple(transforms)
+  _TRANSFORMS[dimension] = transforms
+  return transforms
+
+
+def Transform(text, permutation):
+  """Applies a transform to a position string.
+
+  Args:
+    text: A position string.
+    permutation: A permutation as returned by GetTransforms.
+
+  Returns:
+    The transformed position string.
+  """
+
+  return "".join([text[index] for index in permutation])
+
+
+def Invert(permutation):
+  """Returns the permutation that undoes the given one."""
+
+  inverse = [0] * len(permutation)
+  for index, original in enumerate(permutation):
+    inverse[original] = index
+  return tuple(inverse)
+
+
+def Canonicalize(text, dimension):
+  """Finds the canonical representative of a position under symmetry.
+
+  Args:
+    text: A position string.
+    dimension: The dimension of the board.
+
+  Returns:
+    A tuple of (canonical position string, permutation).  A position p in
+    the canonical string corresponds to position permutation[p] in text.
+  """
+
+  best_text = text
+  best_permutation = None
+  for permutation in GetTransforms(dimension):
+    if best_permutation is None:
+      best_permutation = permutation  # The identity.
+      continue
+    transformed = Transform(text, permutation)
+    if transformed < best_text:
+      best_text = transformed
+      best_permutation = permutation
+  return best_text, best_permutation
@@ -0,0 +1,46 @@
+"""Tests that correspond to symmetry."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+import unittest
+
+from model import symmetry
+
+
+class SymmetryTest(unittest.TestCase):
+  """Class that tests symmetry functions."""
+
+  def testGetTransforms(self):
+    transforms = symmetry.GetTransforms(3)
+    self.assertEqual(8, len(transforms))
+    self.assertEqual(tuple(xrange(9)), transforms[0])
+    self.assertEqual(8, len(set(transforms)))
+    for permutation in transforms:
+      self.assertEqual(range(9), sorted(permutation))
+      # The center never moves on an odd board.
+      self.assertEqual(4, permutation[4])
+
+  def testInvert(self):
+    for permutation in symmetry.GetTransforms(4):
+      inverse = symmetry.Invert(permutation)
+      text = "abcdefghijklmnop"
+      self.assertEqual(text, symmetry.Transform(
+          symmetry.Transform(text, permutation), inverse))
+
+  def testCanonicalize(self):
+    corners = ("X........", "..X......", "......X..", "........X")
+    canonical_texts = set()
+    for text in corners:
+      canonical, permutation = symmetry.Canonicalize(text, 3)
+      canonical_texts.add(canonical)
+      self.assertEqual(canonical, symmetry.Transform(text, permutation))
+    self.assertEqual(1, len(canonical_texts))
+
+    canonical, permutation = symmetry.Canonicalize("....X....", 3)
+    self.assertEqual("....X....", canonical)
+    self.assertEqual(tuple(xrange(9)), permutation)
+
+
+if __name__ == '__main__':
+  unittest.main()
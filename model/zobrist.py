@@ -0,0 +1,115 @@
+"""Zobrist hashing of Tic Tac Toe positions.
+
+The keys are generated from a fixed seed, so a hash computed in one process
+is valid in every other process and across runs.
+"""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+import random
+
+from model import board
+
+
+SEED = 0x7a0b7157
+
+# Mixed into a position hash to distinguish the side to move.
+SIDE_KEYS = {board.BoardValue.X: 0x5bd1e9955bd1e995,
+             board.BoardValue.O: 0x2545f4914f6cdd1d}
+
+_KEYS = {}
+_DIMENSION_KEYS = {}
+
+
+def GetKeys(dimension):
+  """Returns the per cell keys for a board of the given dimension.
+
+  Args:
+    dimension: The dimension of the board.
+
+  Returns:
+    A dictionary mapping board.BoardValue.X and board.BoardValue.O to a tuple
+    of 64 bit keys, one per position.
+  """
+
+  keys = _KEYS.get(dimension)
+  if keys is None:
+    generator = random.Random(SEED + dimension)
+    keys = {}
+    for board_value in (board.BoardValue.X, board.BoardValue.O):
+      keys[board_value] = tuple(generator.getrandbits(64)
+                                for _ in xrange(dimension * dimension))
+    _KEYS[dimension] = keys
+  return keys
+
+
+def GetDimensionKey(dimension):
+  """Returns the key that tells apart positions of different dimensions.
+
+  HashText does not include it, so that the empty board of any dimension
+  hashes to 0; tables that hold positions of several dimensions mix it in.
+
+  Args:
+    dimension: The dimension of the board.
+
+  Returns:
+    A 64 bit key.
+  """
+
+  key = _DIMENSION_KEYS.get(dimension)
+  if key is None:
+    key = random.Random(~SEED - dimension).getrandbits(64)
+    _DIMENSION_KEYS[dimension] = key
+  return key
+
+
+def HashText(text, dimension):
+  """Hashes a position string.
+
+  Args:
+    text: A position string as produced by board.Board.ToPositionString.
+    dimension: The dimension of the board.
+
+  Returns:
+    A 64 bit integer hash.  The empty board hashes to 0.
+  """
+
+  keys = GetKeys(dimension)
+  x_keys = keys[board.BoardValue.X]
+  o_keys = keys[board.BoardValue.O]
+  value = 0
+  for position, char in enumerate(text):
+    if char == "X":
+      value ^= x_keys[position]
+    elif char == "O":
+      value ^= o_keys[position]
+  return value
+
+
+def Hash(play_board):
+  """Hashes a board.Board.
+
+  Returns:
+    A 64 bit integer hash.  The empty board hashes to 0.
+  """
+
+  return HashText(play_board.ToPositionString(), play_board.dimension)
+
+
+def Update(value, dimension, position, board_value):
+  """Incrementally updates a hash with a move.
+
+  Applying the same move twice undoes it.
+
+  Args:
+    value: The hash before the move.
+    dimension: The dimension of the board.
+    position: The position that was played.
+    board_value: The board.BoardValue that was played.
+
+  Returns:
+    The hash after the move.
+  """
+
+  return value ^ GetKeys(dimension)[board_value][position]
@@ -0,0 +1,45 @@
+"""Tests that correspond to zobrist."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+import unittest
+
+from model import board
+from model import zobrist
+
+
+class ZobristTest(unittest.TestCase):
+  """Class that tests zobrist functions."""
+
+  def testHash(self):
+    play_board = board.Board(3)
+    self.assertEqual(0, zobrist.Hash(play_board))
+
+    value = 0
+    for position, board_value in ((0, board.BoardValue.X),
+                                  (4, board.BoardValue.O),
+                                  (8, board.BoardValue.X)):
+      play_board.SetPosition(position, board_value)
+      value = zobrist.Update(value, 3, position, board_value)
+      self.assertEqual(zobrist.Hash(play_board), value)
+
+    self.assertEqual(value, zobrist.HashText("X...O...X", 3))
+    self.assertNotEqual(value, zobrist.HashText("O...X...O", 3))
+    self.assertNotEqual(value, zobrist.HashText("X...O...X" + "." * 7, 4))
+
+  def testGetDimensionKey(self):
+    keys = [zobrist.GetDimensionKey(dimension) for dimension in xrange(1, 65)]
+    self.assertEqual(len(keys), len(set(keys)))
+    self.assertEqual(keys[2], zobrist.GetDimensionKey(3))
+    self.assertNotEqual(0, keys[2])
+
+  def testUpdateIsReversible(self):
+    value = zobrist.HashText("X...O....", 3)
+    self.assertEqual(value, zobrist.Update(
+        zobrist.Update(value, 3, 5, board.BoardValue.X),
+        3, 5, board.BoardValue.X))
+
+
+if __name__ == '__main__':
+  unittest.main()
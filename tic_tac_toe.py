@@ -3,57 +3,243 @@
 __author__ = "Rishi Sharma (rishsharma@gmail.com)"
 
 
+import argparse
+import multiprocessing
+import os
 import sys
+import time
 import traceback
 
+from controller import analyze
+from controller import book_builder
+from controller import distributed
+from controller import heuristics
+from controller import learned
+from controller import lockstep
+from controller import metrics
+from controller import move_cache
+from controller import move_service
+from controller import opening_book
+from controller import ponder
+from controller import position_cache
+from controller import profiling
+from controller import search_context
+from controller import self_play
 from controller import strategy
+from controller import tablebase
+from controller import tournament
 from model import board
 from view import interact
+from view import terminal
 
 
-def Main():
+def _PlayGame(dimension, cache, registry, ponderer=None,
+              move_strategy=strategy.Strategy.HEURISTICS):
+  """Plays a single game between the user and the AI.
+
+  Args:
+    dimension: The dimension of the board.
+    cache: The move_cache.MoveCache used to compute the AI's moves.
+    registry: The metrics.Registry the engine statistics are recorded in.
+    ponderer: An optional ponder.Ponderer that computes the AI's replies
+        while the user is thinking.
+    move_strategy: The strategy.Strategy computing the AI's moves.
+
+  Returns:
+    The winner as represented by BoardValue, None if it is a draw.
+  """
+
+  play_board = board.Board(dimension)
+  context = search_context.SearchContext()
+  has_won = board.BoardValue.NONE
+  while 1:
+    interact.DisplayBoard(play_board)
+    if ponderer is not None:
+      ponderer.Start(play_board)
+    try:
+      you_next_move = interact.GrabMove(play_board)
+    except EOFError:
+      if ponderer is not None:
+        ponderer.Stop()
+      raise
+    play_board.SetPosition(you_next_move, board.BoardValue.X)
+    interact.DisplayYouMove(you_next_move)
+
+    # Check if won:
+    has_won = play_board.IsWinner()
+    if has_won != board.BoardValue.NONE:
+      break
+
+    start = time.time()
+    i_next_move = -1
+    with profiling.Move(play_board, move_strategy):
+      if ponderer is not None:
+        i_next_move = ponderer.Finish(you_next_move)
+        used_strategy = ponderer.move_strategy
+        source = "ponder"
+      if i_next_move < 0:
+        hits = cache.hits
+        i_next_move = cache.GetNextMove(play_board, board.BoardValue.O,
+                                        move_strategy, context=context)
+        used_strategy = move_strategy
+        source = "cache" if cache.hits > hits else "search"
+      else:
+        profiling.MarkPondered()
+    registry.RecordMove(used_strategy, dimension, time.time() - start)
+    registry.Increment("move_source." + source)
+    play_board.SetPosition(i_next_move, board.BoardValue.O)
+    interact.DisplayIMove(i_next_move)
+
+    # Check if won:
+    has_won = play_board.IsWinner()
+    if has_won != board.BoardValue.NONE:
+      break
+
+  if ponderer is not None:
+    ponderer.Stop()
+  # Pondering works on copies of the board and is not counted.
+  registry.Increment("is_winner_calls", play_board.is_winner_calls)
+  registry.Increment("search.nodes", context.nodes)
+  registry.Increment("search.collected", context.collected)
+  interact.DisplayBoard(play_board)
+  interact.DisplayWinner(has_won)
+  return has_won
+
+
+def _AddScanWorkersArgument(parser):
+  """Adds the option of heuristics.SetWorkers to a command line parser."""
+
+  parser.add_argument("--scan-workers", type=int, default=0,
+                      help="Workers that score the rows of large boards in "
+                      "parallel (default: 0, scan in sequence).  Only the "
+                      "calling process uses them, worker processes scan in "
+                      "sequence.")
+
+
+def _AddProfileArguments(parser, scopes=profiling.Scope.ALL_SCOPES):
+  """Adds the profiling options to a command line parser.
+
+  Args:
+    parser: The argparse.ArgumentParser.
+    scopes: The profiling.Scope values the command supports.  Commands that
+        play no games only support profiling.Scope.MOVE.
+  """
+
+  parser.add_argument("--profile", metavar="PREFIX",
+                      help="Profiles the computed moves and writes the "
+                      "profiles and a timeline of the slowest moves to files "
+                      "starting with PREFIX.")
+  parser.add_argument("--profile-mode", default=profiling.Mode.CPROFILE,
+                      choices=profiling.Mode.ALL_MODES,
+                      help="cprofile writes pstats files per strategy and "
+                      "dimension, sample writes flame graph stacks.")
+  parser.add_argument("--profile-scope", default=profiling.Scope.MOVE,
+                      choices=scopes,
+                      help="Captures each move or each whole game.")
+  parser.add_argument("--profile-interval", type=float,
+                      default=profiling.DEFAULT_INTERVAL,
+                      help="Seconds between samples of the sample mode.")
+
+
+def _StartProfiler(args):
+  """Starts profiling if requested on the command line.
+
+  Returns:
+    The profiling.Profiler, None if not profiling.
+  """
+
+  if not args.profile:
+    return None
+  profiler = profiling.Profiler(args.profile_mode, args.profile_scope,
+                                args.profile_interval)
+  profiling.SetProfiler(profiler)
+  return profiler
+
+
+def _FinishProfiler(profiler, prefix):
+  """Stops profiling and writes the results."""
+
+  if profiler is None:
+    return
+  profiling.SetProfiler(None)
+  profiler.Close()
+  for path in profiler.Dump(prefix):
+    sys.stderr.write("Wrote %s\n" % path)
+
+
+def Main(argv=()):
   """Execution block.
 
+  Args:
+    argv: The command line arguments.
+
   Returns:
     An integer that represents the exit_code the application exits with.
   """
 
+  parser = argparse.ArgumentParser(prog="tic_tac_toe.py",
+                                   description="Plays tic tac toe.")
+  parser.add_argument("--metrics", metavar="FILE",
+                      help="Writes the engine metrics as JSON to FILE when "
+                      "the session ends.")
+  parser.add_argument("--script", metavar="FILE",
+                      help="Reads every answer from FILE, or - for stdin, "
+                      "instead of prompting.")
+  parser.add_argument("--no-board", action="store_true",
+                      help="Does not print the board before each move.")
+  parser.add_argument("--plain", action="store_true",
+                      help="Prints the whole board before each move instead "
+                      "of updating it in place.")
+  parser.add_argument("--ponder", action="store_true",
+                      help="Computes the AI's replies while waiting for the "
+                      "user's move.")
+  parser.add_argument("--locale",
+                      help="Language of the messages, e.g. fr (default: "
+                      "English).")
+  parser.add_argument("--book", metavar="FILE", action="append", default=[],
+                      help="Plays the moves of an opening book built with "
+                      "the book command.  May be repeated.")
+  _AddScanWorkersArgument(parser)
+  _AddProfileArguments(parser)
+  args = parser.parse_args(argv)
+  for path in args.book:
+    opening_book.Load(path)
+  heuristics.SetWorkers(args.scan_workers)
+
+  if args.script == "-":
+    interact.SetInput(interact.ScriptedInput.FromStream(sys.stdin))
+  elif args.script:
+    with open(args.script) as stream:
+      interact.SetInput(interact.ScriptedInput.FromStream(stream))
+  interact.SetShowBoard(not args.no_board)
+  interact.SetLocale(args.locale)
+  if not args.plain:
+    interact.SetRenderer(terminal.CreateRenderer(sys.stdout))
+  registry = metrics.REGISTRY
+
   x_wins = 0
   o_wins = 0
   draws = 0
 
   user_exit = False
 
+  # Shared by every game so that repeated openings are not recomputed.
+  cache = move_cache.MoveCache()
+  ponderer = ponder.Ponderer() if args.ponder else None
+
   interact.Welcome()
 
+  profiler = _StartProfiler(args)
   try:
 
     while not user_exit:
-      dimension = int(interact.GrabDimension())
-      play_board = board.Board(dimension)
-      has_won = board.BoardValue.NONE
-      while 1:
-        interact.DisplayBoard(play_board)
-        you_next_move = interact.GrabMove(play_board)
-        play_board.SetPosition(you_next_move, board.BoardValue.X)
-        interact.DisplayYouMove(you_next_move)
-
-        # Check if won:
-        has_won = play_board.IsWinner()
-        if has_won != board.BoardValue.NONE:
-          break
-
-        i_next_move = strategy.GetNextMove(play_board, board.BoardValue.O)
-        play_board.SetPosition(i_next_move, board.BoardValue.O)
-        interact.DisplayIMove(i_next_move)
-
-        # Check if won:
-        has_won = play_board.IsWinner()
-        if has_won != board.BoardValue.NONE:
-          break
-
-      interact.DisplayBoard(play_board)
-      interact.DisplayWinner(has_won)
+      try:
+        dimension = int(interact.GrabDimension())
+        with profiling.Game(dimension, strategy.Strategy.HEURISTICS):
+          has_won = _PlayGame(dimension, cache, registry, ponderer)
+      except EOFError:
+        break  # The input has ended, e.g. at the end of a script.
+
       if has_won == board.BoardValue.X:
         x_wins += 1
       elif has_won == board.BoardValue.O:
@@ -61,17 +247,488 @@ def Main():
       else:
         draws += 1
 
-      user_exit = not interact.PlayAgain()
+      try:
+        user_exit = not interact.PlayAgain()
+      except EOFError:
+        break
 
     interact.Summarize(x_wins, o_wins, draws)
 
+    if args.metrics:
+      registry.RecordCache("move_cache", cache)
+      if ponderer is not None:
+        registry.RecordCache("ponder", ponderer)
+      with open(args.metrics, "w") as stream:
+        registry.DumpJson(stream)
+
   except Exception as ex:
     print "Unexpected Exception has occurred: %s" % ex
     traceback.print_exc()
     return 1
+  finally:
+    interact.SetRenderer(None)
+    heuristics.SetWorkers(0)
+    _FinishProfiler(profiler, args.profile)
+  return 0
+
+
+def Analyze(argv):
+  """Non-interactive command that prints the best move for each position.
+
+  Args:
+    argv: The command line arguments following the command name.
+
+  Returns:
+    An integer that represents the exit_code the application exits with.
+  """
+
+  parser = argparse.ArgumentParser(
+      prog="tic_tac_toe.py analyze",
+      description="Reads positions one per line and writes the best moves.")
+  parser.add_argument("input", nargs="?", default="-",
+                      help="File of positions, or - for stdin.")
+  parser.add_argument("-j", "--processes", type=int, default=None,
+                      help="Worker processes (default: one per CPU, "
+                      "0 to analyze in process).")
+  parser.add_argument("--chunk-size", type=int,
+                      default=analyze.DEFAULT_CHUNK_SIZE,
+                      help="Positions sent to a worker at a time.")
+  parser.add_argument("--strategy", default="heuristics",
+                      choices=[strategy.Strategy.ToString(value) for value
+                               in strategy.Strategy.AVAILABLE_STRATEGIES])
+  parser.add_argument("--cache-slots", type=int,
+                      default=position_cache.DEFAULT_SLOTS,
+                      help="Slots of the position cache shared by the "
+                      "workers, 0 to disable.")
+  parser.add_argument("--book", metavar="FILE", action="append", default=[],
+                      help="Plays the moves of an opening book built with "
+                      "the book command.  May be repeated.")
+  parser.add_argument("--weights", metavar="FILE",
+                      help="Weights of the learned strategy, as written by "
+                      "the train command.")
+  _AddScanWorkersArgument(parser)
+  _AddProfileArguments(parser, (profiling.Scope.MOVE,))
+  args = parser.parse_args(argv)
+  for path in args.book:
+    opening_book.Load(path)
+  if args.weights:
+    learned.LoadWeights(args.weights)
+  heuristics.SetWorkers(args.scan_workers)
+
+  shared_cache = None
+  if args.cache_slots > 0:
+    shared_cache = position_cache.SharedPositionCache(args.cache_slots)
+
+  profiler = _StartProfiler(args)
+  in_stream = sys.stdin if args.input == "-" else open(args.input)
+  try:
+    # Only the positions analyzed by the calling process are profiled.
+    analyze.AnalyzeStream(in_stream, sys.stdout,
+                          strategy.Strategy.FromString(args.strategy),
+                          processes=0 if profiler is not None
+                          else args.processes,
+                          chunk_size=args.chunk_size,
+                          shared_cache=shared_cache)
+  finally:
+    if in_stream is not sys.stdin:
+      in_stream.close()
+    if shared_cache is not None:
+      shared_cache.Close()
+    heuristics.SetWorkers(0)
+    _FinishProfiler(profiler, args.profile)
+  return 0
+
+
+def Tournament(argv):
+  """Non-interactive command that plays a round-robin between strategies.
+
+  Args:
+    argv: The command line arguments following the command name.
+
+  Returns:
+    An integer that represents the exit_code the application exits with.
+  """
+
+  names = [strategy.Strategy.ToString(value)
+           for value in strategy.Strategy.AVAILABLE_STRATEGIES]
+  parser = argparse.ArgumentParser(
+      prog="tic_tac_toe.py tournament",
+      description="Plays every pairing of strategies with both colours and "
+      "reports Elo ratings and throughput.")
+  parser.add_argument("--strategies", nargs="+", default=names, choices=names)
+  parser.add_argument("--dimensions", nargs="+", type=int, default=[3])
+  parser.add_argument("--games", type=int, default=10,
+                      help="Games per ordered pairing and dimension.")
+  parser.add_argument("-j", "--processes", type=int, default=None,
+                      help="Worker processes (default: one per CPU, "
+                      "0 to play in process).")
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--weights", metavar="FILE",
+                      help="Weights of the learned strategy, as written by "
+                      "the train command.")
+  _AddScanWorkersArgument(parser)
+  _AddProfileArguments(parser)
+  args = parser.parse_args(argv)
+  if args.weights:
+    learned.LoadWeights(args.weights)
+  heuristics.SetWorkers(args.scan_workers)
+
+  profiler = _StartProfiler(args)
+  try:
+    # Only the games of the calling process are profiled.
+    result = tournament.RunTournament(
+        [strategy.Strategy.FromString(name) for name in args.strategies],
+        args.dimensions, args.games,
+        0 if profiler is not None else args.processes, args.seed)
+  finally:
+    heuristics.SetWorkers(0)
+    _FinishProfiler(profiler, args.profile)
+  print result.Report()
+  return 0
+
+
+def SelfPlay(argv):
+  """Non-interactive command that writes labelled positions from self-play.
+
+  Args:
+    argv: The command line arguments following the command name.
+
+  Returns:
+    An integer that represents the exit_code the application exits with.
+  """
+
+  names = [strategy.Strategy.ToString(value)
+           for value in strategy.Strategy.AVAILABLE_STRATEGIES]
+  parser = argparse.ArgumentParser(
+      prog="tic_tac_toe.py selfplay",
+      description="Plays strategies against each other and writes every "
+      "move as a (position, side, move, result) sample.")
+  parser.add_argument("output", help="The sample file to write.")
+  parser.add_argument("--dimension", type=int, default=3)
+  parser.add_argument("--games", type=int, default=1000)
+  parser.add_argument("--strategies", nargs="+", default=names, choices=names)
+  parser.add_argument("--random-plies", type=int,
+                      default=self_play.DEFAULT_RANDOM_PLIES,
+                      help="Random opening plays of every game.")
+  parser.add_argument("--no-augment", action="store_true",
+                      help="Does not add the symmetric positions.")
+  parser.add_argument("--chunk-size", type=int,
+                      default=self_play.DEFAULT_CHUNK_SIZE,
+                      help="Samples per chunk of the file.")
+  parser.add_argument("-j", "--processes", type=int, default=None,
+                      help="Worker processes (default: one per CPU, "
+                      "0 to play in process).")
+  parser.add_argument("--seed", type=int, default=0)
+  _AddScanWorkersArgument(parser)
+  _AddProfileArguments(parser)
+  args = parser.parse_args(argv)
+  heuristics.SetWorkers(args.scan_workers)
+
+  profiler = _StartProfiler(args)
+  start = time.time()
+  try:
+    with open(args.output, "wb") as stream:
+      # Only the games of the calling process are profiled.
+      stats = self_play.Generate(
+          stream, args.dimension, args.games,
+          [strategy.Strategy.FromString(name) for name in args.strategies],
+          processes=0 if profiler is not None else args.processes,
+          seed=args.seed, random_plies=args.random_plies,
+          augment=not args.no_augment, chunk_size=args.chunk_size)
+  finally:
+    heuristics.SetWorkers(0)
+    _FinishProfiler(profiler, args.profile)
+  elapsed = time.time() - start
+  print "%d games, %d samples, %d duplicates in %.1fs (%.0f samples/s)" % (
+      stats["games"], stats["samples"], stats["duplicates"], elapsed,
+      stats["samples"] / elapsed if elapsed else 0.0)
   return 0
 
 
+def Simulate(argv):
+  """Non-interactive command that plays many games in lockstep.
+
+  Args:
+    argv: The command line arguments following the command name.
+
+  Returns:
+    An integer that represents the exit_code the application exits with.
+  """
+
+  names = [strategy.Strategy.ToString(value) for value in lockstep.STRATEGIES]
+  parser = argparse.ArgumentParser(
+      prog="tic_tac_toe.py simulate",
+      description="Plays a batch of games at a time on one NumPy array and "
+      "reports the results and throughput.")
+  parser.add_argument("--dimension", type=int, default=3)
+  parser.add_argument("--games", type=int, default=10000)
+  parser.add_argument("-x", dest="x_strategy", default="random",
+                      choices=names, help="The strategy playing X.")
+  parser.add_argument("-o", dest="o_strategy", default="random",
+                      choices=names, help="The strategy playing O.")
+  parser.add_argument("--batch-size", type=int,
+                      default=lockstep.DEFAULT_BATCH_SIZE,
+                      help="Games played at once.")
+  parser.add_argument("--random-plies", type=int, default=0,
+                      help="Random opening plays of every game.")
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--weights", metavar="FILE",
+                      help="Weights of the learned strategy, as written by "
+                      "the train command.")
+  args = parser.parse_args(argv)
+
+  if not learned.IsAvailable():
+    print "The simulate command requires NumPy."
+    return 1
+  if args.weights:
+    learned.LoadWeights(args.weights)
+  simulator = lockstep.Simulator(
+      args.dimension, strategy.Strategy.FromString(args.x_strategy),
+      strategy.Strategy.FromString(args.o_strategy), args.batch_size,
+      args.seed, args.random_plies)
+  start = time.time()
+  stats = simulator.Run(args.games)
+  elapsed = time.time() - start
+  print "%d games: %d X wins, %d O wins, %d draws" % (
+      stats["games"], stats["x_wins"], stats["o_wins"], stats["draws"])
+  print "%d plays in %.1fs (%.0f games/s)" % (
+      stats["plies"], elapsed, stats["games"] / elapsed if elapsed else 0.0)
+  return 0
+
+
+def Train(argv):
+  """Non-interactive command that fits the learned strategy to samples.
+
+  Args:
+    argv: The command line arguments following the command name.
+
+  Returns:
+    An integer that represents the exit_code the application exits with.
+  """
+
+  parser = argparse.ArgumentParser(
+      prog="tic_tac_toe.py train",
+      description="Fits the weights of the learned strategy to the moves of "
+      "a selfplay sample file.")
+  parser.add_argument("samples", help="A file written by selfplay.")
+  parser.add_argument("output", help="The .npz weight file to write.")
+  parser.add_argument("--iterations", type=int, default=300)
+  args = parser.parse_args(argv)
+
+  if not learned.IsAvailable():
+    print "The train command requires NumPy."
+    return 1
+  with open(args.samples, "rb") as stream:
+    evaluator = learned.Fit(self_play.ReadChunks(stream), args.iterations)
+  evaluator.Save(args.output)
+  return 0
+
+
+def Serve(argv):
+  """Non-interactive command that answers move requests over a socket.
+
+  Args:
+    argv: The command line arguments following the command name.
+
+  Returns:
+    An integer that represents the exit_code the application exits with.
+  """
+
+  parser = argparse.ArgumentParser(
+      prog="tic_tac_toe.py serve",
+      description="Serves moves for positions sent one per line, batching "
+      "requests that arrive together.")
+  parser.add_argument("--port", type=int, default=0,
+                      help="Localhost TCP port (default: any free port).")
+  parser.add_argument("--unix", metavar="PATH",
+                      help="Listens on a Unix socket instead of TCP.")
+  parser.add_argument("--window-ms", type=float,
+                      default=move_service.DEFAULT_WINDOW * 1000,
+                      help="Milliseconds to wait for a batch to fill.")
+  parser.add_argument("--max-batch", type=int,
+                      default=move_service.DEFAULT_MAX_BATCH)
+  parser.add_argument("-j", "--processes", type=int, default=0,
+                      help="Worker processes per batch (default: 0, "
+                      "evaluate in process).")
+  parser.add_argument("--strategy", default="heuristics",
+                      choices=[strategy.Strategy.ToString(value) for value
+                               in strategy.Strategy.AVAILABLE_STRATEGIES])
+  parser.add_argument("--metrics", metavar="FILE",
+                      help="Writes the service metrics as JSON to FILE on "
+                      "exit.")
+  parser.add_argument("--book", metavar="FILE", action="append", default=[],
+                      help="Plays the moves of an opening book built with "
+                      "the book command.  May be repeated.")
+  args = parser.parse_args(argv)
+  for path in args.book:
+    opening_book.Load(path)
+
+  service = move_service.MoveService(
+      args.unix or ("127.0.0.1", args.port),
+      strategy.Strategy.FromString(args.strategy),
+      window=args.window_ms / 1000.0, max_batch=args.max_batch,
+      processes=args.processes)
+  service.Start()
+  print "Serving on %s" % (service.address,)
+  sys.stdout.flush()
+  try:
+    while 1:
+      time.sleep(3600)
+  except KeyboardInterrupt:
+    pass
+  finally:
+    service.Stop()
+    if args.metrics:
+      with open(args.metrics, "w") as stream:
+        service.registry.DumpJson(stream)
+  return 0
+
+
+def Book(argv):
+  """Non-interactive command that builds an opening book.
+
+  Args:
+    argv: The command line arguments following the command name.
+
+  Returns:
+    An integer that represents the exit_code the application exits with.
+  """
+
+  parser = argparse.ArgumentParser(
+      prog="tic_tac_toe.py book",
+      description="Precomputes the heuristics moves of the openings of "
+      "every dimension into a memory mapped book.")
+  parser.add_argument("output", help="The book file to write.")
+  parser.add_argument("--dimensions", nargs="+", type=int,
+                      default=range(7, 20))
+  parser.add_argument("--depth", type=int, default=book_builder.DEFAULT_DEPTH,
+                      help="Positions with fewer plays are included.")
+  parser.add_argument("-j", "--processes", type=int, default=None,
+                      help="Worker processes (default: one per CPU, "
+                      "0 to build in process).")
+  args = parser.parse_args(argv)
+
+  count = book_builder.Build(args.output, args.dimensions, args.depth,
+                             args.processes)
+  print "Wrote %d positions to %s" % (count, args.output)
+  return 0
+
+
+def Tablebase(argv):
+  """Non-interactive command that coordinates the solving of a tablebase.
+
+  Args:
+    argv: The command line arguments following the command name.
+
+  Returns:
+    An integer that represents the exit_code the application exits with.
+  """
+
+  parser = argparse.ArgumentParser(
+      prog="tic_tac_toe.py tablebase",
+      description="Hands out the partitions of a tablebase to workers over "
+      "TCP, checkpoints them and merges them into a book file.")
+  parser.add_argument("output", help="The tablebase file to write.")
+  parser.add_argument("--dimension", type=int, default=3)
+  parser.add_argument("--max-ply", type=int, default=9,
+                      help="Positions with fewer plays are solved.")
+  parser.add_argument("--shards", type=int, default=tablebase.DEFAULT_SHARDS,
+                      help="Partitions of each ply.")
+  parser.add_argument("--checkpoint", metavar="DIR",
+                      help="The directory of the completed partitions "
+                      "(default: OUTPUT.parts).")
+  parser.add_argument("--host", default="127.0.0.1",
+                      help="The address to listen on, 0.0.0.0 for remote "
+                      "workers.")
+  parser.add_argument("--port", type=int, default=0)
+  parser.add_argument("-j", "--workers", type=int, default=None,
+                      help="Local worker processes (default: one per CPU, "
+                      "0 to wait for tablebase-worker commands).")
+  _AddProfileArguments(parser, (profiling.Scope.MOVE,))
+  args = parser.parse_args(argv)
+
+  directory = args.checkpoint or args.output + ".parts"
+  if not os.path.isdir(directory):
+    os.makedirs(directory)
+  coordinator = distributed.Coordinator(
+      directory, args.dimension, args.max_ply, args.shards,
+      (args.host, args.port))
+  print "Coordinating on %s:%d, %d partitions already complete" % (
+      coordinator.address + (coordinator.resumed,))
+  sys.stdout.flush()
+  workers = args.workers
+  if workers is None:
+    workers = multiprocessing.cpu_count()
+  profiler = _StartProfiler(args)
+  start = time.time()
+  processes = []
+  coordinator.Start()
+  try:
+    if not coordinator.Wait(0):
+      if profiler is not None:
+        # Only the partitions solved by the calling process are profiled.
+        distributed.RunWorker(coordinator.address)
+      else:
+        processes = coordinator.StartWorkers(workers)
+      coordinator.Wait()
+  finally:
+    coordinator.Stop()
+    for process in processes:
+      process.join()
+    _FinishProfiler(profiler, args.profile)
+  count = coordinator.Merge(args.output)
+  print "Wrote %d positions to %s in %.1fs (%d stolen, %d duplicates)" % (
+      count, args.output, time.time() - start, coordinator.stolen,
+      coordinator.duplicates)
+  return 0
+
+
+def TablebaseWorker(argv):
+  """Non-interactive command that solves tablebase partitions.
+
+  Args:
+    argv: The command line arguments following the command name.
+
+  Returns:
+    An integer that represents the exit_code the application exits with.
+  """
+
+  parser = argparse.ArgumentParser(
+      prog="tic_tac_toe.py tablebase-worker",
+      description="Solves partitions for a tablebase coordinator until none "
+      "are left.")
+  parser.add_argument("host")
+  parser.add_argument("port", type=int)
+  _AddProfileArguments(parser, (profiling.Scope.MOVE,))
+  args = parser.parse_args(argv)
+
+  profiler = _StartProfiler(args)
+  try:
+    solved = distributed.RunWorker((args.host, args.port))
+  finally:
+    _FinishProfiler(profiler, args.profile)
+  print "Solved %d partitions" % solved
+  return 0
+
+
+# Headless commands selected by the first command line argument.  Without one
+# the interactive game is played.
+COMMANDS = {
+    "analyze": Analyze,
+    "book": Book,
+    "selfplay": SelfPlay,
+    "serve": Serve,
+    "simulate": Simulate,
+    "tablebase": Tablebase,
+    "tablebase-worker": TablebaseWorker,
+    "tournament": Tournament,
+    "train": Train,
+}
+
+
 if __name__ == "__main__":
-  exit_code = Main()
+  if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+    exit_code = COMMANDS[sys.argv[1]](sys.argv[2:])
+  else:
+    exit_code = Main(sys.argv[1:])
   sys.exit(exit_code)
@@ -7,34 +7,127 @@ from i18n import string_resources
 from model import board
 
 
+class ConsoleInput(object):
+  """Reads input from the user one line at a time."""
+
+  def ReadLine(self, prompt):
+    """Prompts the user and returns the line entered.
+
+    Raises:
+      EOFError if the input has ended.
+    """
+
+    return raw_input(prompt)
+
+
+class ScriptedInput(object):
+  """Replays a script of input lines without prompting."""
+
+  def __init__(self, text):
+    """Initializes the driver.
+
+    Args:
+      text: The whole script, one answer per line.
+    """
+
+    self._lines = iter(text.splitlines())
+
+  @staticmethod
+  def FromStream(stream):
+    """Creates a driver from a file or pipe with a single bulk read."""
+
+    return ScriptedInput(stream.read())
+
+  def ReadLine(self, prompt):
+    """Returns the next line of the script.
+
+    Raises:
+      EOFError if the script has ended.
+    """
+
+    try:
+      return next(self._lines)
+    except StopIteration:
+      raise EOFError()
+
+
+_input = ConsoleInput()
+_show_board = True
+_resources = string_resources.GetResources()
+_renderer = None
+
+
+def SetInput(driver):
+  """Sets where user input is read from.
+
+  Args:
+    driver: An object with a ReadLine(prompt) method such as ConsoleInput or
+        ScriptedInput.
+  """
+
+  global _input
+  _input = driver
+
+
+def SetShowBoard(show_board):
+  """Enables or disables printing of the board by DisplayBoard."""
+
+  global _show_board
+  _show_board = show_board
+
+
+def SetRenderer(renderer):
+  """Sets how DisplayBoard draws the board.
+
+  Args:
+    renderer: An object with Render(play_board) and Close() methods such as
+        terminal.TerminalRenderer, or None to print the whole board each
+        time.  The previous renderer is closed.
+  """
+
+  global _renderer
+  if _renderer is not None:
+    _renderer.Close()
+  _renderer = renderer
+
+
+def SetLocale(locale):
+  """Sets the locale of the messages, None for English."""
+
+  global _resources
+  _resources = string_resources.GetResources(locale)
+
+
 def GrabMove(play_board):
   """Returns an integer validated move from the user."""
 
-  try:
-    value = int(raw_input(string_resources.StringResources.WHERE_TO))
-    if not play_board.IsValidMoveFromPosition(value):
-      return GrabMove(play_board)
-    return value
-  except (ValueError, board.InvalidBoardPosition):
-    return GrabMove(play_board)
+  while 1:
+    try:
+      value = int(_input.ReadLine(
+          _resources.Get(string_resources.StringResources.WHERE_TO)))
+      if play_board.IsValidMoveFromPosition(value):
+        return value
+    except (ValueError, board.InvalidBoardPosition):
+      pass
 
 
 def GrabDimension():
   """Returns am integer valid inputted dimension from the user."""
 
-  try:
-    value = int(raw_input(string_resources.StringResources.DIMENSION))
-    if value < 2:
-      return GrabDimension()
-    return value
-  except ValueError:
-    return GrabDimension()
+  while 1:
+    try:
+      value = int(_input.ReadLine(
+          _resources.Get(string_resources.StringResources.DIMENSION)))
+      if value >= 2:
+        return value
+    except ValueError:
+      pass
 
 
 def Welcome():
   """Welcomes the user to the game."""
 
-  print string_resources.StringResources.WELCOME
+  print _resources.Get(string_resources.StringResources.WELCOME)
 
 
 def DisplayBoard(play_board):
@@ -44,7 +137,12 @@ def DisplayBoard(play_board):
     play_board: A model.board.Board object to display.
   """
 
-  print play_board
+  if not _show_board:
+    return
+  if _renderer is not None:
+    _renderer.Render(play_board)
+  else:
+    print play_board
 
 
 def DisplayYouMove(next_move):
@@ -54,7 +152,7 @@ def DisplayYouMove(next_move):
     next_move: The next move the first player had made.
   """
 
-  print string_resources.StringResources().GetYouString(next_move)
+  print _resources.GetYouString(next_move)
 
 
 def DisplayIMove(next_move):
@@ -64,7 +162,7 @@ def DisplayIMove(next_move):
     next_move: The next move the second player will make.
   """
 
-  print string_resources.StringResources().GetIString(next_move)
+  print _resources.GetIString(next_move)
 
 
 def DisplayWinner(has_won):
@@ -76,7 +174,7 @@ def DisplayWinner(has_won):
         indicates the game was a draw.
   """
 
-  print string_resources.StringResources().GetWinnerString(has_won)
+  print _resources.GetWinnerString(has_won)
 
 
 def Summarize(x_wins, o_wins, draws):
@@ -88,7 +186,7 @@ def Summarize(x_wins, o_wins, draws):
     draws: The number of times a draw has occurred.
   """
 
-  print string_resources.StringResources.SUMMARY % (x_wins, o_wins, draws)
+  print _resources.GetSummaryString(x_wins, o_wins, draws)
 
 
 def PlayAgain():
@@ -98,9 +196,10 @@ def PlayAgain():
       A boolean indicating True if yes, False if no.
   """
 
-  value = raw_input(string_resources.StringResources.PLAY_AGAIN).lower()
-  if value == "y":
-    return True
-  if value == "n":
-    return False
-  return PlayAgain()
+  while 1:
+    value = _input.ReadLine(
+        _resources.Get(string_resources.StringResources.PLAY_AGAIN)).lower()
+    if value == "y":
+      return True
+    if value == "n":
+      return False
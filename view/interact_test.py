@@ -0,0 +1,88 @@
+"""Tests that correspond to interact."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+import StringIO
+import unittest
+
+from i18n import string_resources
+from model import board
+from view import interact
+
+
+class _RecordingInput(interact.ScriptedInput):
+  """ScriptedInput that remembers the prompts it was given."""
+
+  def __init__(self, text):
+    interact.ScriptedInput.__init__(self, text)
+    self.prompts = []
+
+  def ReadLine(self, prompt):
+    self.prompts.append(prompt)
+    return interact.ScriptedInput.ReadLine(self, prompt)
+
+
+class InteractTest(unittest.TestCase):
+  """Class that tests interact functions."""
+
+  def tearDown(self):
+    interact.SetInput(interact.ConsoleInput())
+
+  def _SetInput(self, text):
+    driver = _RecordingInput(text)
+    interact.SetInput(driver)
+    return driver
+
+  def _GetPrompt(self, string_resource):
+    return string_resources.GetResources().Get(string_resource)
+
+  def testScriptedInput(self):
+    driver = interact.ScriptedInput.FromStream(StringIO.StringIO("3\ny\n"))
+    self.assertEqual("3", driver.ReadLine("?"))
+    self.assertEqual("y", driver.ReadLine("?"))
+    self.assertRaises(EOFError, driver.ReadLine, "?")
+
+  def testGrabMove(self):
+    play_board = board.Board(3)
+    play_board.SetPosition(4, board.BoardValue.O)
+    # Not a number, out of the board, taken, then valid.
+    driver = self._SetInput("x\n9\n4\n5\n")
+    self.assertEqual(5, interact.GrabMove(play_board))
+    self.assertEqual(
+        [self._GetPrompt(string_resources.StringResources.WHERE_TO)] * 4,
+        driver.prompts)
+
+  def testGrabMoveEOF(self):
+    driver = self._SetInput("x\n")
+    self.assertRaises(EOFError, interact.GrabMove, board.Board(3))
+    self.assertEqual(2, len(driver.prompts))
+
+  def testGrabDimension(self):
+    driver = self._SetInput("three\n1\n4\n")
+    self.assertEqual(4, interact.GrabDimension())
+    self.assertEqual(
+        [self._GetPrompt(string_resources.StringResources.DIMENSION)] * 3,
+        driver.prompts)
+
+  def testGrabDimensionEOF(self):
+    self._SetInput("")
+    self.assertRaises(EOFError, interact.GrabDimension)
+
+  def testPlayAgain(self):
+    driver = self._SetInput("maybe\nY\n")
+    self.assertTrue(interact.PlayAgain())
+    self.assertEqual(
+        [self._GetPrompt(string_resources.StringResources.PLAY_AGAIN)] * 2,
+        driver.prompts)
+    self._SetInput("\nn\n")
+    self.assertFalse(interact.PlayAgain())
+
+  def testPlayAgainEOF(self):
+    driver = self._SetInput("maybe\n")
+    self.assertRaises(EOFError, interact.PlayAgain)
+    self.assertEqual(2, len(driver.prompts))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,178 @@
+"""Incremental board rendering for ANSI terminals.
+
+The first render of a board clears the screen, draws the grid at the top and
+confines the scrolling of every later message to the lines below it.  Later
+renders of a board of the same dimension only rewrite the cells that
+changed, by moving the cursor to them and back.  The cells are laid out as
+in board.Board.__str__, where a free cell is as wide as its number, so when
+a play changes the width of a cell the rest of its row is rewritten.  Boards
+that do not fit on the screen are printed like plain output.
+"""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+
+import os
+import struct
+
+try:
+  import fcntl
+  import termios
+except ImportError:
+  fcntl = termios = None
+
+from model import board
+
+
+DEFAULT_ROWS = 24
+DEFAULT_COLUMNS = 80
+
+# The separator that follows every cell of a row but the last.
+_SEPARATOR = "| "
+
+_CLEAR = "\x1b[H\x1b[2J"
+_SAVE_CURSOR = "\x1b7"
+_RESTORE_CURSOR = "\x1b8"
+_RESET_SCROLL_REGION = "\x1b[r"
+
+
+def _GetSize(stream):
+  """Returns the (rows, columns) of the terminal attached to stream."""
+
+  rows = columns = 0
+  if termios is not None:
+    try:
+      rows, columns = struct.unpack("hh", fcntl.ioctl(
+          stream.fileno(), termios.TIOCGWINSZ, "\0" * 4))
+    except (AttributeError, IOError, ValueError):
+      pass
+  return (rows or int(os.environ.get("LINES", DEFAULT_ROWS)),
+          columns or int(os.environ.get("COLUMNS", DEFAULT_COLUMNS)))
+
+
+def _CellText(play_board, position):
+  """Returns the text of a cell as it appears in board.Board.__str__."""
+
+  value = play_board.GetFromPosition(position)
+  if value == board.BoardValue.NONE:
+    return "%03d " % position
+  return " " + board.BoardValue.ToString(value) + "  "
+
+
+def _GetOffsets(cells):
+  """Returns the column of every cell of a row of cell texts, from 0."""
+
+  offsets = []
+  offset = 0
+  for text in cells:
+    offsets.append(offset)
+    offset += len(text) + len(_SEPARATOR)
+  return offsets
+
+
+def IsSupported(stream):
+  """Determines if stream is a terminal that understands ANSI sequences."""
+
+  try:
+    is_tty = stream.isatty()
+  except AttributeError:
+    return False
+  return is_tty and os.environ.get("TERM", "dumb") != "dumb"
+
+
+class TerminalRenderer(object):
+  """Draws a board once and then redraws only the changed cells."""
+
+  def __init__(self, stream, rows=None, columns=None):
+    """Initializes the renderer.
+
+    Args:
+      stream: The terminal output stream.
+      rows: The number of rows of the terminal.  Queried from the terminal
+          if None.
+      columns: The number of columns of the terminal.  Queried from the
+          terminal if None.
+    """
+
+    self._stream = stream
+    self._rows = rows
+    self._columns = columns
+    # The cell texts of each row as last drawn, None if not drawn.
+    self._cells = None
+
+  def _GetSize(self):
+    """Returns the (rows, columns) of the terminal."""
+
+    if self._rows and self._columns:
+      return self._rows, self._columns
+    rows, columns = _GetSize(self._stream)
+    return self._rows or rows, self._columns or columns
+
+  def Render(self, play_board):
+    """Displays a board, drawing only what changed since the last render."""
+
+    dimension = play_board.dimension
+    cells = [[_CellText(play_board, row * dimension + col)
+              for col in xrange(dimension)] for row in xrange(dimension)]
+    if self._cells is None or len(cells) != len(self._cells):
+      self._Draw(play_board, cells)
+      return
+
+    updates = []
+    for row, (old, new) in enumerate(zip(self._cells, cells)):
+      if old == new:
+        continue
+      offsets = _GetOffsets(new)
+      if map(len, old) == map(len, new):
+        for col, text in enumerate(new):
+          if text != old[col]:
+            updates.append("\x1b[%d;%dH%s" % (row + 1, offsets[col] + 1,
+                                              text))
+      else:
+        # A cell changed width and moved those after it, so rewrite the rest
+        # of the row and erase what is left of the old one.
+        col = min(col for col, text in enumerate(new) if text != old[col])
+        updates.append("\x1b[%d;%dH%s\x1b[K" % (
+            row + 1, offsets[col] + 1, _SEPARATOR.join(new[col:])))
+    self._cells = cells
+    if updates:
+      self._stream.write(_SAVE_CURSOR + "".join(updates) + _RESTORE_CURSOR)
+      self._stream.flush()
+
+  def _Draw(self, play_board, cells):
+    """Clears the screen and draws the whole board at the top."""
+
+    rows, columns = self._GetSize()
+    top = play_board.dimension + 2
+    width = max(_GetOffsets(row)[-1] + len(row[-1]) for row in cells)
+    if top >= rows or width > columns:
+      # The board does not fit on the screen, so scroll it like plain output.
+      self._stream.write(_RESET_SCROLL_REGION + str(play_board) + "\n")
+      self._stream.flush()
+      self._cells = None
+      return
+
+    self._stream.write("%s%s\x1b[%d;%dr\x1b[%d;1H" % (
+        _CLEAR, play_board, top, rows, top))
+    self._stream.flush()
+    self._cells = cells
+
+  def Close(self):
+    """Gives the whole screen back to scrolling output."""
+
+    if self._cells is not None:
+      self._stream.write(_RESET_SCROLL_REGION + "\x1b[%d;1H" % (
+          self._GetSize()[0]))
+      self._stream.flush()
+    self._cells = None
+
+
+def CreateRenderer(stream):
+  """Returns a TerminalRenderer for stream, None if it is not a terminal.
+
+  Without termios, e.g. on Windows, the board is always printed plainly.
+  """
+
+  if termios is None or not IsSupported(stream):
+    return None
+  return TerminalRenderer(stream)
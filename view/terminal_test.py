@@ -0,0 +1,141 @@
+"""Tests that correspond to terminal."""
+
+__author__ = "Rishi Sharma (rishsharma@gmail.com)"
+
+import os
+import re
+import StringIO
+import unittest
+
+from model import board
+from view import terminal
+
+
+_SEQUENCE = re.compile(r"\x1b\[(\d*)(?:;(\d*))?([HJKr])|\x1b([78])|(\n)|(.)",
+                       re.DOTALL)
+
+
+def _GetScreen(output):
+  """Returns the text left on a screen by the output of a renderer."""
+
+  lines = []
+  row = col = 0
+  saved = (0, 0)
+  for match in _SEQUENCE.finditer(output):
+    first, second, command, cursor, newline, char = match.groups()
+    if command == "H":
+      row = int(first or 1) - 1
+      col = int(second or 1) - 1
+    elif command == "J":
+      lines = []
+    elif command == "K":
+      del lines[row][col:]
+    elif cursor == "7":
+      saved = (row, col)
+    elif cursor == "8":
+      row, col = saved
+    elif newline:
+      row += 1
+      col = 0
+    elif char:
+      while len(lines) <= row:
+        lines.append([])
+      line = lines[row]
+      line.extend(" " * (col + 1 - len(line)))
+      line[col] = char
+      col += 1
+  return "\n".join("".join(line) for line in lines)
+
+
+class _Terminal(StringIO.StringIO):
+  """StringIO that claims to be a terminal."""
+
+  def isatty(self):
+    return True
+
+
+class TerminalRendererTest(unittest.TestCase):
+  """Class that tests TerminalRenderer functions."""
+
+  def setUp(self):
+    self.stream = StringIO.StringIO()
+    self.renderer = terminal.TerminalRenderer(self.stream, rows=24,
+                                              columns=80)
+
+  def _Output(self):
+    output = self.stream.getvalue()
+    self.stream.truncate(0)
+    return output
+
+  def testDrawsOnceThenUpdatesChangedCells(self):
+    play_board = board.Board(3)
+    self.renderer.Render(play_board)
+    output = self._Output()
+    self.assertTrue(output.startswith("\x1b[H\x1b[2J" + str(play_board)))
+    self.assertTrue(output.endswith("\x1b[5;24r\x1b[5;1H"))
+
+    play_board.SetPosition(4, board.BoardValue.X)
+    play_board.SetPosition(8, board.BoardValue.O)
+    self.renderer.Render(play_board)
+    self.assertEqual("\x1b7\x1b[2;7H X  \x1b[3;13H O  \x1b8", self._Output())
+
+    self.renderer.Render(play_board)
+    self.assertEqual("", self._Output())
+
+    # A new dimension redraws the whole board.
+    self.renderer.Render(board.Board(4))
+    self.assertTrue(self._Output().startswith("\x1b[H\x1b[2J"))
+
+    self.renderer.Close()
+    self.assertEqual("\x1b[r\x1b[24;1H", self._Output())
+
+  def testCellsWiderThanThreeDigits(self):
+    renderer = terminal.TerminalRenderer(self.stream, rows=40, columns=300)
+    play_board = board.Board(32)
+    renderer.Render(play_board)
+    # Playing 1000 narrows its cell and moves the rest of its row left.
+    for position in (1000, 1023, 999, 4):
+      play_board.SetPosition(position, board.BoardValue.X)
+      renderer.Render(play_board)
+      self.assertEqual(str(play_board),
+                       _GetScreen(self.stream.getvalue()) + "\n")
+
+  def testScreenMatchesBoard(self):
+    play_board = board.Board(3)
+    for position in (4, 0, 8):
+      self.renderer.Render(play_board)
+      play_board.SetPosition(position, board.BoardValue.O)
+    self.renderer.Render(play_board)
+    self.assertEqual(str(play_board),
+                     _GetScreen(self.stream.getvalue()) + "\n")
+
+  def testBoardTallerThanScreen(self):
+    play_board = board.Board(30)
+    self.renderer.Render(play_board)
+    self.renderer.Render(play_board)
+    self.assertEqual(2 * ("\x1b[r" + str(play_board) + "\n"), self._Output())
+
+  def testBoardWiderThanScreen(self):
+    play_board = board.Board(14)
+    self.assertTrue(len(str(play_board).split("\n")[0]) > 80)
+    self.renderer.Render(play_board)
+    self.assertEqual("\x1b[r" + str(play_board) + "\n", self._Output())
+
+  def testCreateRenderer(self):
+    self.assertIsNone(terminal.CreateRenderer(self.stream))
+
+    tty = _Terminal()
+    self.addCleanup(os.environ.update, dict(os.environ))
+    self.addCleanup(os.environ.pop, "TERM", None)
+    os.environ["TERM"] = "xterm"
+    self.assertIsInstance(terminal.CreateRenderer(tty),
+                          terminal.TerminalRenderer)
+
+    # Hosts without termios always print plainly.
+    self.addCleanup(setattr, terminal, "termios", terminal.termios)
+    terminal.termios = None
+    self.assertIsNone(terminal.CreateRenderer(tty))
+
+
+if __name__ == '__main__':
+  unittest.main()